@@ -26,6 +26,12 @@ Environment Variables:
         - PUBSUB_PROJECT_ID: Pub/Sub project (defaults to GCP_PROJECT_ID)
         - CLOUD_TASKS_LOCATION: Cloud Tasks region
         - CLOUD_TASKS_QUEUE: Cloud Tasks queue name
+        - CLOUD_TASKS_TARGET_URL: Base URL tasks are delivered to
+        - CLOUD_TASKS_AUTH_TOKEN: Shared secret sent with every delivered task
+        
+    Scheduling:
+        - SCHEDULER_ENABLED: Run periodic jobs in-process (defaults to on
+          with the local task queue, off otherwise)
         
     Email:
         - SENDGRID_API_KEY: SendGrid API key
@@ -65,6 +71,7 @@ class GCPSettings(BaseSettings):
     cloud_tasks_location: str = Field(default="asia-south2", alias="CLOUD_TASKS_LOCATION")
     cloud_tasks_queue: str = Field(default="default", alias="CLOUD_TASKS_QUEUE")
     cloud_tasks_target_url: str = Field(default="", alias="CLOUD_TASKS_TARGET_URL")
+    cloud_tasks_auth_token: str = Field(default="", alias="CLOUD_TASKS_AUTH_TOKEN")
     
     @property
     def effective_pubsub_project(self) -> str:
@@ -167,6 +174,9 @@ class Settings(BaseSettings):
     api_host: str = Field(default="0.0.0.0", alias="API_HOST")
     api_port: int = Field(default=8080, alias="API_PORT")
     
+    # Periodic jobs (None: follow the task queue provider)
+    scheduler_enabled: Optional[bool] = Field(default=None, alias="SCHEDULER_ENABLED")
+    
     # CORS
     cors_origins: str = Field(
         default="http://localhost:3000,http://127.0.0.1:3000",
@@ -192,6 +202,13 @@ class Settings(BaseSettings):
         
         return origins
     
+    @property
+    def run_scheduler(self) -> bool:
+        """Whether this process should run the in-process scheduler."""
+        if self.scheduler_enabled is not None:
+            return self.scheduler_enabled
+        return self.cloud.get_queue_provider() == "local"
+    
     @property
     def is_production(self) -> bool:
         """Check if running in production."""
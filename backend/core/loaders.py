@@ -0,0 +1,106 @@
+"""
+Request-Scoped Loaders
+
+DataLoader-style primary-key lookups for assembling list responses. A list
+endpoint primes the keys it will need, the first lookup fetches all of them
+with one IN (...) query per model, and every result (including misses) is
+memoized for the rest of the request. Response building then costs a fixed
+number of queries however many rows are returned.
+
+Loaders hold ORM objects from the request's session, so never share one
+between requests.
+"""
+from typing import Dict, Generic, Iterable, Optional, Set, Type, TypeVar
+
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from backend.core.database import get_db
+from backend.core.models import User, Project, MarketListing
+
+T = TypeVar("T")
+
+# Keeps IN lists well under driver parameter limits
+MAX_KEYS_PER_QUERY = 500
+
+
+def profile_display_name(profile_data: Optional[dict], email: Optional[str]) -> Optional[str]:
+    """Name shown for a user: company, then personal name, then email"""
+    profile = profile_data or {}
+    return profile.get("company") or profile.get("name") or email
+
+
+def display_name(user: Optional[User], default: Optional[str] = None) -> Optional[str]:
+    if user is None:
+        return default
+    return profile_display_name(user.profile_data, user.email) or default
+
+
+class BatchLoader(Generic[T]):
+    """Batched, memoized primary-key lookups for one model"""
+
+    def __init__(self, db: Session, model: Type[T]):
+        self.db = db
+        self.model = model
+        self._cache: Dict[int, Optional[T]] = {}
+        self._pending: Set[int] = set()
+
+    def prime(self, keys: Iterable[Optional[int]]) -> "BatchLoader[T]":
+        """Queue keys for the next batch. None and already loaded keys are ignored."""
+        for key in keys:
+            if key is not None and key not in self._cache:
+                self._pending.add(key)
+        return self
+
+    def get(self, key: Optional[int]) -> Optional[T]:
+        """One row by primary key, loading it together with anything primed"""
+        if key is None:
+            return None
+        if key not in self._cache:
+            self._pending.add(key)
+            self._dispatch()
+        return self._cache[key]
+
+    def load_many(self, keys: Iterable[Optional[int]]) -> Dict[int, Optional[T]]:
+        keys = [key for key in keys if key is not None]
+        self.prime(keys)
+        self._dispatch()
+        return {key: self._cache[key] for key in keys}
+
+    def _dispatch(self):
+        if not self._pending:
+            return
+        pending = sorted(self._pending)
+        self._pending.clear()
+
+        for i in range(0, len(pending), MAX_KEYS_PER_QUERY):
+            chunk = pending[i:i + MAX_KEYS_PER_QUERY]
+            for row in self.db.query(self.model).filter(self.model.id.in_(chunk)):
+                self._cache[row.id] = row
+            for key in chunk:
+                self._cache.setdefault(key, None)
+
+
+class Loaders:
+    """The loaders of one request"""
+
+    def __init__(self, db: Session):
+        self.users: BatchLoader[User] = BatchLoader(db, User)
+        self.projects: BatchLoader[Project] = BatchLoader(db, Project)
+        self.listings: BatchLoader[MarketListing] = BatchLoader(db, MarketListing)
+
+    def user_name(self, user_id: Optional[int], default: Optional[str] = None) -> Optional[str]:
+        return display_name(self.users.get(user_id), default)
+
+    def user_email(self, user_id: Optional[int]) -> Optional[str]:
+        user = self.users.get(user_id)
+        return user.email if user else None
+
+    def project_name(self, project_id: Optional[int], default: Optional[str] = None) -> Optional[str]:
+        project = self.projects.get(project_id)
+        return project.name if project else default
+
+
+def get_loaders(db: Session = Depends(get_db)) -> Loaders:
+    """FastAPI dependency: fresh loaders sharing the request's session"""
+    return Loaders(db)
@@ -1,5 +1,5 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, JSON, Text, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, JSON, Text, Enum, Index, func, text
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime
 import enum
 from .database import Base
@@ -58,17 +58,93 @@ class Project(Base):
     name = Column(String)
     code = Column(String, unique=True, index=True) # Auto-generated
     
+    # Copied out of wizard_data whenever it is assigned so they can be filtered in SQL
+    registry = Column(String, index=True)
+    country = Column(String, index=True)
+    region = Column(String, index=True)
+    location = Column(String, index=True)
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     developer = relationship("User", back_populates="projects")
     documents = relationship("Document", back_populates="project")
 
-    @property
-    def country(self):
-        if self.wizard_data and isinstance(self.wizard_data, dict):
-            return self.wizard_data.get("country")
+    @validates("wizard_data")
+    def _sync_wizard_fields(self, key, wizard_data):
+        fields = extract_wizard_fields(wizard_data)
+        self.registry = fields["registry"]
+        self.country = fields["country"]
+        self.region = fields["region"]
+        self.location = fields["location"]
+        return wizard_data
+
+
+def extract_wizard_fields(wizard_data) -> dict:
+    """
+    Read registry, country, region and location out of a project's wizard data.
+    
+    Handles both the nested sections (credit_estimation, basic_info) and the
+    flat keys written by the project wizard pages.
+    """
+    data = wizard_data if isinstance(wizard_data, dict) else {}
+    estimation = data.get("credit_estimation") if isinstance(data.get("credit_estimation"), dict) else {}
+    basic_info = data.get("basic_info") if isinstance(data.get("basic_info"), dict) else {}
+    
+    def first(*values):
+        for value in values:
+            if isinstance(value, str) and value.strip():
+                return value.strip()
         return None
+    
+    country = first(data.get("country"), basic_info.get("country"))
+    region = first(data.get("stateProvince"), basic_info.get("region"), basic_info.get("state"))
+    location = first(basic_info.get("location"), data.get("location"))
+    if location is None and (region or country):
+        location = ", ".join(part for part in (region, country) if part)
+    
+    return {
+        "registry": first(estimation.get("registry"), data.get("registry")),
+        "country": country,
+        "region": region,
+        "location": location,
+    }
+
+
+# Shown for projects without a registry or location, and searched as such
+DEFAULT_PROJECT_REGISTRY = "VCS"
+DEFAULT_PROJECT_LOCATION = "India"
+
+
+def project_search_document(project=None):
+    """
+    Text that marketplace search matches against: name, location, type and
+    registry, with the same defaults listings display. Built from constants
+    only, so on Postgres the query expression is identical to the indexed
+    one below.
+    """
+    project = project if project is not None else Project.__table__.c
+    defaults = {"location": DEFAULT_PROJECT_LOCATION, "registry": DEFAULT_PROJECT_REGISTRY}
+    parts = [
+        func.coalesce(getattr(project, name), text(f"'{defaults.get(name, '')}'"))
+        for name in ("name", "location", "project_type", "registry")
+    ]
+    document = parts[0]
+    for part in parts[1:]:
+        document = document.op("||")(text("' '")).op("||")(part)
+    return document
+
+
+def project_search_vector(project=None):
+    return func.to_tsvector(text("'simple'"), project_search_document(project))
+
+
+# Full-text index for marketplace search (Postgres only; other databases fall back to LIKE)
+Index(
+    "ix_projects_search",
+    project_search_vector(),
+    postgresql_using="gin",
+).ddl_if(dialect="postgresql")
 
 class Document(Base):
     __tablename__ = "documents"
@@ -141,6 +217,11 @@ class CreditHolding(Base):
     user = relationship("User", backref="holdings")
     project = relationship("Project", backref="holdings")
 
+    __table_args__ = (
+        # One owner's position in a (project, vintage): trade settlement and reconciliation
+        Index("ix_credit_holdings_owner_series", "user_id", "project_id", "vintage"),
+    )
+
 
 class TransactionType(str, enum.Enum):
     PURCHASE = "purchase"
@@ -175,6 +256,11 @@ class Transaction(Base):
     user = relationship("User", foreign_keys=[user_id], backref="transactions")
     project = relationship("Project", backref="transactions")
 
+    __table_args__ = (
+        # Keyset-paginated history per user, newest first
+        Index("ix_transactions_user_created", "user_id", "created_at", "id"),
+    )
+
 
 class RetirementStatus(str, enum.Enum):
     PENDING = "PENDING"
@@ -196,6 +282,7 @@ class Retirement(Base):
     beneficiary_address = Column(String)
     purpose = Column(String)
     serial_range = Column(String)
+    transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=True)  # The RETIREMENT transaction, completed with it
     status = Column(Enum(RetirementStatus), default=RetirementStatus.PENDING)
     retirement_date = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -203,6 +290,11 @@ class Retirement(Base):
     user = relationship("User", backref="retirements")
     project = relationship("Project", backref="retirements")
 
+    __table_args__ = (
+        # A user's retirements by status: listings and summary aggregates
+        Index("ix_retirements_user_status", "user_id", "status"),
+    )
+
 
 class ListingStatus(str, enum.Enum):
     ACTIVE = "active"
@@ -231,6 +323,12 @@ class MarketListing(Base):
     project = relationship("Project", backref="listings")
     holding = relationship("CreditHolding", backref="listings")
 
+    __table_args__ = (
+        # Marketplace browsing and search only ever read active listings
+        Index("ix_market_listings_status_price", "status", "price_per_ton_cents"),
+        Index("ix_market_listings_status_project", "status", "project_id", "vintage"),
+    )
+
 
 class OfferStatus(str, enum.Enum):
     PENDING = "pending"
@@ -29,6 +29,10 @@ class EventBusPort(ABC):
         """Subscribe to a topic."""
         pass
 
+    async def close(self) -> None:
+        """Release subscriptions (called on shutdown)."""
+        pass
+
 class TaskQueuePort(ABC):
     @abstractmethod
     async def enqueue(self, task_name: str, payload: Dict[str, Any], deploy_at: Optional[datetime] = None) -> str:
@@ -0,0 +1,101 @@
+"""
+Background Tasks
+
+Named task handlers shared by every task queue backend, plus a small
+in-process scheduler for periodic jobs.
+
+Handlers are plain synchronous functions taking the task payload. Modules
+register them with @register_task. The local queue adapter runs them in a
+worker thread; on GCP, Cloud Tasks delivers them to POST /api/tasks/{name}.
+
+The scheduler only decides *when* to enqueue; execution always goes through
+the TaskQueuePort, so a periodic job behaves like any other task.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.core.ports import TaskQueuePort
+
+logger = logging.getLogger(__name__)
+
+TaskHandler = Callable[[Dict[str, Any]], Any]
+
+_handlers: Dict[str, TaskHandler] = {}
+
+
+def register_task(name: str) -> Callable[[TaskHandler], TaskHandler]:
+    """Decorator registering a handler under a task name."""
+    def decorator(handler: TaskHandler) -> TaskHandler:
+        _handlers[name] = handler
+        return handler
+    return decorator
+
+
+def get_task_handler(name: str) -> Optional[TaskHandler]:
+    return _handlers.get(name)
+
+
+def run_task(name: str, payload: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Run a registered task synchronously.
+
+    Raises:
+        KeyError: If no handler is registered under the name
+    """
+    handler = _handlers.get(name)
+    if handler is None:
+        raise KeyError(f"Unknown task: {name}")
+    return handler(payload or {})
+
+
+@dataclass
+class PeriodicJob:
+    task_name: str
+    interval_seconds: float
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+
+class LocalScheduler:
+    """
+    In-process scheduler that enqueues tasks at fixed intervals.
+
+    Meant for local development and single-instance deployments. With
+    several instances, disable it (SCHEDULER_ENABLED=false) and trigger the
+    same task names from Cloud Scheduler instead.
+    """
+
+    def __init__(self):
+        self._jobs: List[PeriodicJob] = []
+        self._running: List[asyncio.Task] = []
+
+    def every(self, interval_seconds: float, task_name: str, payload: Optional[Dict[str, Any]] = None):
+        """Run a task now and then every interval_seconds once started."""
+        self._jobs.append(PeriodicJob(task_name, interval_seconds, payload or {}))
+
+    async def start(self, task_queue: TaskQueuePort):
+        if self._running:
+            return
+        for job in self._jobs:
+            self._running.append(asyncio.create_task(self._run(job, task_queue)))
+        logger.info(f"Scheduler started with {len(self._jobs)} periodic job(s)")
+
+    async def stop(self):
+        for task in self._running:
+            task.cancel()
+        self._running = []
+
+    @staticmethod
+    async def _run(job: PeriodicJob, task_queue: TaskQueuePort):
+        while True:
+            try:
+                await task_queue.enqueue(job.task_name, job.payload)
+            except Exception as e:
+                logger.error(f"Scheduler failed to enqueue {job.task_name}: {e}")
+            await asyncio.sleep(job.interval_seconds)
+
+
+# Global scheduler instance
+scheduler = LocalScheduler()
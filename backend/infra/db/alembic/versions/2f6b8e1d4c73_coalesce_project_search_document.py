@@ -0,0 +1,40 @@
+"""Coalesce project search document
+
+Revision ID: 2f6b8e1d4c73
+Revises: 7b4e9d2a6c15
+Create Date: 2026-10-20 11:02:18.640391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6b8e1d4c73'
+down_revision: Union[str, None] = '7b4e9d2a6c15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_search_index(location: str, registry: str) -> None:
+    op.execute(
+        "CREATE INDEX ix_projects_search ON projects USING gin ("
+        f"to_tsvector('simple', (((((coalesce(name, '') || ' ') || coalesce(location, '{location}')) || ' ') "
+        f"|| coalesce(project_type, '')) || ' ') || coalesce(registry, '{registry}')))"
+    )
+
+
+def upgrade() -> None:
+    # Rebuild the index on the document listings display: a missing
+    # registry or location searches as VCS / India
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_projects_search")
+        _create_search_index('India', 'VCS')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_projects_search")
+        _create_search_index('', '')
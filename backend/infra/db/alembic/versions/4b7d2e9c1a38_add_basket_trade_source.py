@@ -0,0 +1,37 @@
+"""Add basket trade source
+
+Revision ID: 4b7d2e9c1a38
+Revises: e6aa6c8f0841
+Create Date: 2026-10-19 16:42:11.508331
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7d2e9c1a38'
+down_revision: Union[str, None] = 'e6aa6c8f0841'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    # The enum type is created with market_trades by the application, so it
+    # may not exist yet; create_all will then create it with the new value
+    exists = bind.execute(sa.text("SELECT 1 FROM pg_type WHERE typname = 'tradesource'")).scalar()
+    if exists:
+        # ALTER TYPE ... ADD VALUE cannot run inside a transaction block
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE tradesource ADD VALUE IF NOT EXISTS 'BASKET'")
+
+
+def downgrade() -> None:
+    # Postgres cannot drop a value from an enum type
+    pass
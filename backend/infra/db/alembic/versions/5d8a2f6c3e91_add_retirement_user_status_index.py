@@ -0,0 +1,33 @@
+"""Add retirement user status index
+
+Revision ID: 5d8a2f6c3e91
+Revises: 9c1e5f3a7b20
+Create Date: 2026-10-19 18:02:11.384520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8a2f6c3e91'
+down_revision: Union[str, None] = '9c1e5f3a7b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # retirements is created by the application (create_all), not by an
+    # earlier revision, so it may not exist yet
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('retirements'):
+        existing = {ix['name'] for ix in inspector.get_indexes('retirements')}
+        if 'ix_retirements_user_status' not in existing:
+            op.create_index('ix_retirements_user_status', 'retirements', ['user_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table('retirements'):
+        op.drop_index('ix_retirements_user_status', table_name='retirements')
@@ -0,0 +1,40 @@
+"""Add retirement transaction link
+
+Revision ID: 7b4e9d2a6c15
+Revises: a3f1c7d94b52
+Create Date: 2026-10-20 10:14:32.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b4e9d2a6c15'
+down_revision: Union[str, None] = 'a3f1c7d94b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # retirements is created by the application (create_all), not by an
+    # earlier revision, so it may not exist yet
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('retirements'):
+        existing = {c['name'] for c in inspector.get_columns('retirements')}
+        if 'transaction_id' not in existing:
+            with op.batch_alter_table('retirements') as batch_op:
+                batch_op.add_column(sa.Column('transaction_id', sa.Integer(), nullable=True))
+                batch_op.create_foreign_key(
+                    'fk_retirements_transaction_id', 'transactions', ['transaction_id'], ['id']
+                )
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('retirements') and 'transaction_id' in {c['name'] for c in inspector.get_columns('retirements')}:
+        with op.batch_alter_table('retirements') as batch_op:
+            batch_op.drop_constraint('fk_retirements_transaction_id', type_='foreignkey')
+            batch_op.drop_column('transaction_id')
@@ -0,0 +1,40 @@
+"""Key serial series by project and vintage
+
+Revision ID: 8e3c5a7f1b26
+Revises: 2f6b8e1d4c73
+Create Date: 2026-10-20 11:41:05.287316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3c5a7f1b26'
+down_revision: Union[str, None] = '2f6b8e1d4c73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # serial_ranges is created by the application (create_all), not by an
+    # earlier revision, so it may not exist yet
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('serial_ranges'):
+        existing = {ix['name'] for ix in inspector.get_indexes('serial_ranges')}
+        if 'uq_serial_ranges_project_vintage_start' not in existing:
+            op.create_index('uq_serial_ranges_project_vintage_start', 'serial_ranges', ['project_id', 'vintage', 'serial_start'], unique=True)
+        if 'uq_serial_ranges_series_start' in existing:
+            op.drop_index('uq_serial_ranges_series_start', table_name='serial_ranges')
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('serial_ranges'):
+        existing = {ix['name'] for ix in inspector.get_indexes('serial_ranges')}
+        if 'uq_serial_ranges_series_start' not in existing:
+            op.create_index('uq_serial_ranges_series_start', 'serial_ranges', ['registry', 'project_id', 'vintage', 'serial_start'], unique=True)
+        if 'uq_serial_ranges_project_vintage_start' in existing:
+            op.drop_index('uq_serial_ranges_project_vintage_start', table_name='serial_ranges')
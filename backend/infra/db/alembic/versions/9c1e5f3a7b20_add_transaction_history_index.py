@@ -0,0 +1,33 @@
+"""Add transaction history index
+
+Revision ID: 9c1e5f3a7b20
+Revises: 4b7d2e9c1a38
+Create Date: 2026-10-19 17:26:48.730914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c1e5f3a7b20'
+down_revision: Union[str, None] = '4b7d2e9c1a38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # transactions is created by the application (create_all), not by an
+    # earlier revision, so it may not exist yet
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('transactions'):
+        existing = {ix['name'] for ix in inspector.get_indexes('transactions')}
+        if 'ix_transactions_user_created' not in existing:
+            op.create_index('ix_transactions_user_created', 'transactions', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table('transactions'):
+        op.drop_index('ix_transactions_user_created', table_name='transactions')
@@ -0,0 +1,33 @@
+"""Add credit holdings owner series index
+
+Revision ID: a3f1c7d94b52
+Revises: 5d8a2f6c3e91
+Create Date: 2026-10-19 19:11:47.206318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f1c7d94b52'
+down_revision: Union[str, None] = '5d8a2f6c3e91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # credit_holdings is created by the application (create_all), not by an
+    # earlier revision, so it may not exist yet
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table('credit_holdings'):
+        existing = {ix['name'] for ix in inspector.get_indexes('credit_holdings')}
+        if 'ix_credit_holdings_owner_series' not in existing:
+            op.create_index('ix_credit_holdings_owner_series', 'credit_holdings', ['user_id', 'project_id', 'vintage'], unique=False)
+
+
+def downgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table('credit_holdings'):
+        op.drop_index('ix_credit_holdings_owner_series', table_name='credit_holdings')
@@ -0,0 +1,111 @@
+"""Add project registry/location columns
+
+Revision ID: bc43b490c5e7
+Revises: 37ffeba1613a
+Create Date: 2026-10-19 13:45:12.418305
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bc43b490c5e7'
+down_revision: Union[str, None] = '37ffeba1613a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def _first(*values):
+    for value in values:
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return None
+
+
+def _extract(wizard_data):
+    # Frozen copy of backend.core.models.extract_wizard_fields at this revision
+    if isinstance(wizard_data, str):
+        try:
+            wizard_data = json.loads(wizard_data)
+        except ValueError:
+            wizard_data = None
+    data = wizard_data if isinstance(wizard_data, dict) else {}
+    estimation = data.get("credit_estimation") if isinstance(data.get("credit_estimation"), dict) else {}
+    basic_info = data.get("basic_info") if isinstance(data.get("basic_info"), dict) else {}
+
+    country = _first(data.get("country"), basic_info.get("country"))
+    region = _first(data.get("stateProvince"), basic_info.get("region"), basic_info.get("state"))
+    location = _first(basic_info.get("location"), data.get("location"))
+    if location is None and (region or country):
+        location = ", ".join(part for part in (region, country) if part)
+
+    return {
+        "registry": _first(estimation.get("registry"), data.get("registry")),
+        "country": country,
+        "region": region,
+        "location": location,
+    }
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('registry', sa.String(), nullable=True))
+    op.add_column('projects', sa.Column('country', sa.String(), nullable=True))
+    op.add_column('projects', sa.Column('region', sa.String(), nullable=True))
+    op.add_column('projects', sa.Column('location', sa.String(), nullable=True))
+    op.create_index(op.f('ix_projects_registry'), 'projects', ['registry'], unique=False)
+    op.create_index(op.f('ix_projects_country'), 'projects', ['country'], unique=False)
+    op.create_index(op.f('ix_projects_region'), 'projects', ['region'], unique=False)
+    op.create_index(op.f('ix_projects_location'), 'projects', ['location'], unique=False)
+
+    # Backfill from wizard_data in id-ordered batches
+    bind = op.get_bind()
+    projects = sa.table(
+        'projects',
+        sa.column('id', sa.Integer),
+        sa.column('wizard_data', sa.JSON),
+        sa.column('registry', sa.String),
+        sa.column('country', sa.String),
+        sa.column('region', sa.String),
+        sa.column('location', sa.String),
+    )
+
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(projects.c.id, projects.c.wizard_data)
+            .where(projects.c.id > last_id)
+            .order_by(projects.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+
+        bind.execute(
+            projects.update()
+            .where(projects.c.id == sa.bindparam('project_id'))
+            .values(
+                registry=sa.bindparam('registry'),
+                country=sa.bindparam('country'),
+                region=sa.bindparam('region'),
+                location=sa.bindparam('location'),
+            ),
+            [{"project_id": row.id, **_extract(row.wizard_data)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_projects_location'), table_name='projects')
+    op.drop_index(op.f('ix_projects_region'), table_name='projects')
+    op.drop_index(op.f('ix_projects_country'), table_name='projects')
+    op.drop_index(op.f('ix_projects_registry'), table_name='projects')
+    op.drop_column('projects', 'location')
+    op.drop_column('projects', 'region')
+    op.drop_column('projects', 'country')
+    op.drop_column('projects', 'registry')
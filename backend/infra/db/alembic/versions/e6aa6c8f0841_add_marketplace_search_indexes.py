@@ -0,0 +1,48 @@
+"""Add marketplace search indexes
+
+Revision ID: e6aa6c8f0841
+Revises: bc43b490c5e7
+Create Date: 2026-10-19 14:05:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6aa6c8f0841'
+down_revision: Union[str, None] = 'bc43b490c5e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # market_listings is created by the application (create_all), not by an
+    # earlier revision, so it may not exist yet
+    if inspector.has_table('market_listings'):
+        existing = {ix['name'] for ix in inspector.get_indexes('market_listings')}
+        if 'ix_market_listings_status_price' not in existing:
+            op.create_index('ix_market_listings_status_price', 'market_listings', ['status', 'price_per_ton_cents'], unique=False)
+        if 'ix_market_listings_status_project' not in existing:
+            op.create_index('ix_market_listings_status_project', 'market_listings', ['status', 'project_id', 'vintage'], unique=False)
+
+    if bind.dialect.name == 'postgresql':
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_projects_search ON projects USING gin ("
+            "to_tsvector('simple', (((((coalesce(name, '') || ' ') || coalesce(location, '')) || ' ') "
+            "|| coalesce(project_type, '')) || ' ') || coalesce(registry, '')))"
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_projects_search")
+    if sa.inspect(bind).has_table('market_listings'):
+        op.drop_index('ix_market_listings_status_project', table_name='market_listings')
+        op.drop_index('ix_market_listings_status_price', table_name='market_listings')
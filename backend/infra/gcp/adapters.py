@@ -13,6 +13,7 @@ Environment Variables:
     - GCP_PROJECT_ID: Google Cloud project ID
     - GCS_BUCKET_NAME: Default GCS bucket name
     - PUBSUB_PROJECT_ID: Pub/Sub project (defaults to GCP_PROJECT_ID)
+    - PUBSUB_INSTANCE_ID: Suffix of this instance's subscriptions (defaults to hostname + random id)
     - CLOUD_TASKS_LOCATION: Cloud Tasks location (e.g., 'asia-south2')
     - CLOUD_TASKS_QUEUE: Default queue name
     - SENDGRID_API_KEY: SendGrid API key for email
@@ -20,7 +21,10 @@ Environment Variables:
 """
 
 import os
+import re
 import json
+import socket
+import uuid
 from typing import Any, Dict, Optional
 from datetime import datetime, timedelta
 import logging
@@ -152,15 +156,29 @@ class PubSubEventBusAdapter(CloudEventBusBase):
     
     Uses Pub/Sub for asynchronous event-driven communication.
     Topics are automatically created if they don't exist.
+    
+    Every instance subscribes through its own subscription, so each message
+    reaches every instance (fan-out) instead of being load-balanced between
+    them. Subscriptions are deleted on close(); ones left by crashed
+    instances expire after SUBSCRIPTION_TTL_SECONDS without a pull.
     """
     
     provider = "gcp"
     
-    def __init__(self, project_id: Optional[str] = None):
+    # Pub/Sub's minimum expiration TTL
+    SUBSCRIPTION_TTL_SECONDS = 24 * 3600
+    # Undelivered messages are only useful to a live instance
+    MESSAGE_RETENTION_SECONDS = 600
+    
+    def __init__(self, project_id: Optional[str] = None, instance_id: Optional[str] = None):
         super().__init__()
         self.project_id = project_id or os.getenv("PUBSUB_PROJECT_ID") or os.getenv("GCP_PROJECT_ID")
+        instance_id = instance_id or os.getenv("PUBSUB_INSTANCE_ID") or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        # Subscription ids allow letters, digits and -_.~+%
+        self.instance_id = re.sub(r"[^A-Za-z0-9_.~+%-]+", "-", instance_id)
         self._publisher = None
         self._subscriber = None
+        self._subscriptions: Dict[str, Any] = {}  # subscription path -> streaming pull future
     
     @property
     def publisher(self):
@@ -195,13 +213,33 @@ class PubSubEventBusAdapter(CloudEventBusBase):
     
     async def _do_subscribe(self, topic: str, handler: Any) -> None:
         """
-        Subscribe to a Pub/Sub topic.
+        Subscribe this instance to a Pub/Sub topic.
+        
+        Creates the subscription <topic>-<instance id> (and the topic if
+        needed) and starts a streaming pull on it. A subscription shared by
+        all instances would hand each message to only one of them.
         
         Note: In production, subscriptions are usually managed via Cloud Run
         push subscriptions or Cloud Functions triggers, not long-lived pulls.
         """
-        subscription_name = f"{topic}-sub"
-        subscription_path = self.subscriber.subscription_path(self.project_id, subscription_name)
+        from google.api_core.exceptions import AlreadyExists
+        
+        topic_path = self._get_topic_path(topic)
+        subscription_path = self.subscriber.subscription_path(self.project_id, f"{topic}-{self.instance_id}")
+        
+        try:
+            self.publisher.create_topic(request={"name": topic_path})
+        except AlreadyExists:
+            pass
+        try:
+            self.subscriber.create_subscription(request={
+                "name": subscription_path,
+                "topic": topic_path,
+                "expiration_policy": {"ttl": {"seconds": self.SUBSCRIPTION_TTL_SECONDS}},
+                "message_retention_duration": {"seconds": self.MESSAGE_RETENTION_SECONDS},
+            })
+        except AlreadyExists:
+            pass  # Same PUBSUB_INSTANCE_ID as before a restart
         
         def callback(message):
             try:
@@ -213,7 +251,17 @@ class PubSubEventBusAdapter(CloudEventBusBase):
                 message.nack()
         
         # Start subscription (non-blocking)
-        self.subscriber.subscribe(subscription_path, callback=callback)
+        self._subscriptions[subscription_path] = self.subscriber.subscribe(subscription_path, callback=callback)
+    
+    async def close(self) -> None:
+        """Stop pulling and delete this instance's subscriptions."""
+        for subscription_path, future in list(self._subscriptions.items()):
+            future.cancel()
+            try:
+                self.subscriber.delete_subscription(request={"subscription": subscription_path})
+            except Exception as e:
+                logger.warning(f"Could not delete Pub/Sub subscription {subscription_path}: {e}")
+        self._subscriptions.clear()
 
 
 class CloudTasksQueueAdapter(CloudTaskQueueBase):
@@ -264,13 +312,18 @@ class CloudTasksQueueAdapter(CloudTaskQueueBase):
         
         queue_path = self._get_queue_path()
         
+        headers = {"Content-Type": "application/json"}
+        auth_token = os.getenv("CLOUD_TASKS_AUTH_TOKEN")
+        if auth_token:
+            headers["X-Task-Token"] = auth_token
+        
         # Build the task
         task = {
             "http_request": {
                 "http_method": tasks_v2.HttpMethod.POST,
                 "url": f"{self.target_url}/tasks/{task_name}",
-                "headers": {"Content-Type": "application/json"},
-                "body": json.dumps(payload).encode(),
+                "headers": headers,
+                "body": json.dumps(payload, default=str).encode(),
             }
         }
         
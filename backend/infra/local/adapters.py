@@ -10,11 +10,13 @@ Set CLOUD_PROVIDER=local to use these adapters.
 
 import os
 import json
+import asyncio
 import aiofiles
 from typing import Any, Dict, Optional
 from datetime import datetime
 import logging
 
+from backend.core.tasks import get_task_handler
 from backend.infra.adapters.base import (
     CloudFileStorageBase,
     CloudEventBusBase,
@@ -118,10 +120,11 @@ class LocalEventBusAdapter(CloudEventBusBase):
 
 class LocalTaskQueueAdapter(CloudTaskQueueBase):
     """
-    Local task queue adapter (console logging).
+    Local task queue adapter (in-process execution).
     
-    For development, just logs tasks to console.
-    Tasks are not actually executed - use Celery for real background processing.
+    Tasks with a handler registered in backend.core.tasks run in a worker
+    thread of this process, after deploy_at if given. Unknown tasks are only
+    logged. Nothing survives a restart.
     """
     
     provider = "local"
@@ -129,6 +132,7 @@ class LocalTaskQueueAdapter(CloudTaskQueueBase):
     def __init__(self):
         super().__init__()
         self._task_counter = 0
+        self._pending: set = set()
     
     async def _do_enqueue(
         self, 
@@ -143,7 +147,26 @@ class LocalTaskQueueAdapter(CloudTaskQueueBase):
         schedule_info = f" (scheduled: {deploy_at.isoformat()})" if deploy_at else ""
         logger.info(f"[LocalTaskQueue] Enqueued {task_name}{schedule_info}: {json.dumps(payload, default=str)}")
         
+        handler = get_task_handler(task_name)
+        if handler is not None:
+            delay = (deploy_at - datetime.utcnow()).total_seconds() if deploy_at else 0
+            task = asyncio.get_running_loop().create_task(
+                self._execute(task_id, task_name, handler, payload, max(0.0, delay))
+            )
+            # Keep a reference until done so the task is not garbage collected
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+        
         return task_id
+    
+    async def _execute(self, task_id: str, task_name: str, handler: Any, payload: Dict[str, Any], delay: float):
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            result = await asyncio.to_thread(handler, payload)
+            logger.info(f"[LocalTaskQueue] {task_id} {task_name} completed: {json.dumps(result, default=str)}")
+        except Exception as e:
+            logger.error(f"[LocalTaskQueue] {task_id} {task_name} failed: {e}")
 
 
 class LocalEmailAdapter(CloudEmailBase):
@@ -16,6 +16,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from backend.core.config import settings
+from backend.core.container import container
+from backend.core.tasks import scheduler
 from backend.core.database import Base, engine
 
 # Import routers
@@ -26,20 +28,31 @@ from backend.modules.notification.router import router as notification_router
 from backend.modules.wallet.router import router as wallet_router
 from backend.modules.dashboard.router import router as dashboard_router
 from backend.modules.marketplace.router import router as marketplace_router
-from backend.modules.retirement.router import router as retirement_router
+from backend.modules.retirement.router import router as retirement_router, public_router as public_retirement_router
 from backend.modules.generation.router import router as generation_router
 from backend.modules.superadmin.router import router as superadmin_router
 from backend.modules.vvb.router import router as vvb_router
 from backend.modules.registry.router import router as registry_router
 from backend.modules.admin.router import router as admin_router
 from backend.modules.subscription.router import router as subscription_router
+from backend.modules.tasks.router import router as tasks_router
+from backend.modules.ledger.router import router as ledger_router
+from backend.modules.marketplace.feed import market_feed
+import backend.modules.marketplace.expiry  # noqa: registers the expiry task
+import backend.modules.ledger.service  # noqa: registers the ledger tasks
+import backend.modules.retirement.service  # noqa: registers the certificate task
+import backend.modules.retirement.lookup  # noqa: registers the publish task
+import backend.modules.registry.reconciliation  # noqa: registers the reconciliation task
 
 # Import models for SQLAlchemy table creation
 from backend.core.models import *  # noqa
 from backend.modules.vvb.models import ValidationTask, VerificationTask, VVBQuery, VVBQueryResponse  # noqa
-from backend.modules.registry.models import RegistryReview, RegistryQuery, IssuanceRecord, CreditBatch  # noqa
+from backend.modules.registry.models import RegistryReview, RegistryQuery, IssuanceRecord, CreditBatch, ReconciliationRun  # noqa
 from backend.modules.generation.models import *  # noqa
 from backend.modules.subscription.models import Subscription, TierFeature  # noqa
+from backend.modules.marketplace.models import MarketOrder, OrderEvent, Trade, PriceCandle, IdempotencyKey  # noqa
+from backend.modules.ledger.models import LedgerAccount, LedgerEntry, LedgerSnapshot, SerialRange  # noqa
+from backend.modules.retirement.models import CertificateFile, CertificateRenderRequest, PublicRetirement, PublicRetirementSerial  # noqa
 
 
 # Configure logging
@@ -62,9 +75,20 @@ async def lifespan(app: FastAPI):
         logger.error(f"Database connection failed: {e}")
         logger.warning("Application will continue but database operations may fail")
     
+    try:
+        await market_feed.start(container.event_bus)
+    except Exception as e:
+        logger.error(f"Marketplace live feed unavailable: {e}")
+    
+    if settings.run_scheduler:
+        await scheduler.start(container.task_queue)
+    
     yield
     
     # Shutdown
+    await scheduler.stop()
+    await market_feed.stop()
+    await container.event_bus.close()
     logger.info("Shutting down CredoCarbon API")
 
 
@@ -83,6 +107,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Keyset-paginated lists return the next page's cursor in this header
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Register routers
@@ -94,12 +120,15 @@ app.include_router(wallet_router, prefix="/api")
 app.include_router(dashboard_router, prefix="/api")
 app.include_router(marketplace_router, prefix="/api")
 app.include_router(retirement_router, prefix="/api")
+app.include_router(public_retirement_router, prefix="/api")
 app.include_router(generation_router, prefix="/api")
 app.include_router(superadmin_router, prefix="/api")
 app.include_router(vvb_router, prefix="/api")
 app.include_router(registry_router, prefix="/api")
 app.include_router(admin_router, prefix="/api")
 app.include_router(subscription_router, prefix="/api")
+app.include_router(tasks_router, prefix="/api")
+app.include_router(ledger_router, prefix="/api")
 
 
 @app.get("/")
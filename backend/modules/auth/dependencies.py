@@ -2,7 +2,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
-from backend.core.database import get_db
+from backend.core.database import SessionLocal, get_db
 from backend.core.models import User
 from backend.modules.auth.service import SECRET_KEY, ALGORITHM
 
@@ -26,3 +26,14 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     if user is None:
         raise credentials_exception
     return user
+
+def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
+    """
+    Authenticate with a short-lived session, for streaming responses: a
+    get_db session would stay checked out for as long as the stream is open
+    """
+    db = SessionLocal()
+    try:
+        return get_current_user(token, db).id
+    finally:
+        db.close()
@@ -3,6 +3,7 @@ Dashboard API Module
 Database-backed aggregated data for dashboards
 """
 from fastapi import APIRouter, Depends
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
@@ -99,14 +100,13 @@ def get_buyer_stats(current_user: User = Depends(get_current_user), db: Session
     """Get buyer dashboard statistics from database"""
     
     holdings = db.query(CreditHolding).filter(CreditHolding.user_id == current_user.id).all()
-    retirements = db.query(Retirement).filter(
+    credits_retired = int(db.query(func.coalesce(func.sum(Retirement.quantity), 0)).filter(
         Retirement.user_id == current_user.id,
         Retirement.status == RetirementStatus.COMPLETED
-    ).all()
+    ).scalar())
     
     total_credits = sum(h.quantity for h in holdings)
     total_value = sum(h.quantity * (h.unit_price / 100.0) for h in holdings)
-    credits_retired = sum(r.quantity for r in retirements)
     
     # Count pending and active items
     from backend.core.models import Offer, OfferStatus
@@ -472,11 +472,8 @@ def get_featured_listings(current_user: User = Depends(get_current_user), db: Se
         
         project_name = project.name if project else f"Project {listing.project_id}"
         project_type = project.project_type if project else "unknown"
-        registry = "VCS"
-        location = "India"
-        if project and project.wizard_data:
-            registry = project.wizard_data.get("credit_estimation", {}).get("registry", "VCS")
-            location = project.wizard_data.get("basic_info", {}).get("location", "India")
+        registry = (project.registry if project else None) or "VCS"
+        location = (project.location if project else None) or "India"
         
         seller_name = seller.profile_data.get("company", seller.email) if seller and seller.profile_data else "Unknown"
         
@@ -1,22 +1,41 @@
 # Methodology Library
 # Plugin system for carbon credit calculation methodologies
+#
+# Methodology classes are exported lazily so that importing this package only
+# registers manifests; calculation modules load on first attribute access.
 
-from .base import BaseMethodology
+import importlib
+
+from .base import BaseMethodology, MethodologyResult, BatchMethodologyResult
+from .manifest import MethodologyManifest
 from .registry import MethodologyRegistry
-from .cdm_ams_id import CDM_AMS_ID
-from .cdm_acm0002 import CDM_ACM0002
-from .cdm_ams_iii_d import CDM_AMS_III_D
-from .verra_am0123 import VERRA_AM0123
-from .gcc_gccm001 import GCC_GCCM001
-from .gold_standard import GoldStandard_RE
+
+_LAZY_EXPORTS = {
+    "CDM_AMS_ID": ".cdm_ams_id",
+    "CDM_ACM0002": ".cdm_acm0002",
+    "CDM_AMS_III_D": ".cdm_ams_iii_d",
+    "VERRA_AM0123": ".verra_am0123",
+    "GCC_GCCM001": ".gcc_gccm001",
+    "GoldStandard_RE": ".gold_standard",
+}
 
 __all__ = [
     "BaseMethodology",
+    "MethodologyResult",
+    "BatchMethodologyResult",
+    "MethodologyManifest",
     "MethodologyRegistry",
     "CDM_AMS_ID",
-    "CDM_ACM0002", 
+    "CDM_ACM0002",
     "CDM_AMS_III_D",
     "VERRA_AM0123",
     "GCC_GCCM001",
     "GoldStandard_RE",
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(_LAZY_EXPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,6 +6,8 @@ from abc import ABC, abstractmethod
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, field
 
+import numpy as np
+
 
 @dataclass
 class MethodologyResult:
@@ -21,6 +23,29 @@ class MethodologyResult:
     registry: str = ""
 
 
+@dataclass
+class BatchMethodologyResult:
+    """Columnar result format for vectorized methodology calculations (one element per scenario)"""
+    total_er_tco2e: np.ndarray
+    baseline_emissions_tco2e: np.ndarray
+    project_emissions_tco2e: np.ndarray
+    leakage_tco2e: np.ndarray
+    methodology_id: str = ""
+    registry: str = ""
+
+    def __len__(self) -> int:
+        return len(self.total_er_tco2e)
+
+    def row(self, index: int) -> Dict[str, float]:
+        """Get the results of a single scenario"""
+        return {
+            "total_er_tco2e": float(self.total_er_tco2e[index]),
+            "baseline_emissions_tco2e": float(self.baseline_emissions_tco2e[index]),
+            "project_emissions_tco2e": float(self.project_emissions_tco2e[index]),
+            "leakage_tco2e": float(self.leakage_tco2e[index]),
+        }
+
+
 class BaseMethodology(ABC):
     """
     Abstract base class for carbon credit calculation methodologies.
@@ -93,6 +118,106 @@ class BaseMethodology(ABC):
         """
         pass
     
+    def compute_emission_reductions_batch(
+        self,
+        inputs: Dict[str, Any]
+    ) -> BatchMethodologyResult:
+        """
+        Calculate emission reductions for many scenarios in one call.
+        
+        Args:
+            inputs: Columnar version of the compute_emission_reductions inputs.
+                Numeric fields may be 1-D arrays (one value per scenario) or
+                scalars, which are broadcast to every scenario. Categorical
+                fields (project_type, biogas_utilization, ...) must be scalars.
+                
+        Returns:
+            BatchMethodologyResult with one element per scenario
+            
+        The default implementation calls compute_emission_reductions once per
+        scenario. Methodologies override it with array maths.
+        """
+        numeric_fields = [
+            name for name, spec in self.required_inputs_schema().items()
+            if spec.get("type") == "number" and inputs.get(name) is not None
+        ]
+        columns = self._batch_columns(inputs, {name: None for name in numeric_fields})
+        size = len(next(iter(columns.values()))) if columns else 1
+        
+        results = []
+        for i in range(size):
+            row_inputs = dict(inputs)
+            row_inputs.update({name: float(values[i]) for name, values in columns.items()})
+            results.append(self.compute_emission_reductions(row_inputs))
+        
+        return BatchMethodologyResult(
+            total_er_tco2e=np.array([r.total_er_tco2e for r in results], dtype=float),
+            baseline_emissions_tco2e=np.array([r.baseline_emissions_tco2e for r in results], dtype=float),
+            project_emissions_tco2e=np.array([r.project_emissions_tco2e for r in results], dtype=float),
+            leakage_tco2e=np.array([r.leakage_tco2e for r in results], dtype=float),
+            methodology_id=self.id,
+            registry=self.registry,
+        )
+    
+    @staticmethod
+    def _batch_columns(
+        inputs: Dict[str, Any],
+        columns: Dict[str, Optional[float]]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Read numeric columns from batch inputs and broadcast them to a common length.
+        
+        Args:
+            inputs: Columnar inputs
+            columns: Column name -> default value (None marks a required column)
+            
+        Returns:
+            Dictionary of equal-length 1-D float arrays
+            
+        Raises:
+            ValueError: If a required column is missing or column lengths differ
+        """
+        missing = [
+            f"{name} is required" for name, default in columns.items()
+            if default is None and inputs.get(name) is None
+        ]
+        if missing:
+            raise ValueError(f"Invalid inputs: {'; '.join(missing)}")
+        
+        names = list(columns.keys())
+        arrays = []
+        for name in names:
+            value = inputs.get(name)
+            if value is None:
+                value = columns[name]
+            arrays.append(np.atleast_1d(np.asarray(value, dtype=float)))
+        
+        if any(arr.ndim != 1 for arr in arrays):
+            raise ValueError("Invalid inputs: batch columns must be scalars or 1-D arrays")
+        
+        try:
+            broadcast = np.broadcast_arrays(*arrays) if arrays else []
+        except ValueError:
+            raise ValueError("Invalid inputs: batch columns must all have the same length")
+        
+        return dict(zip(names, broadcast))
+    
+    def _batch_result(
+        self,
+        baseline: np.ndarray,
+        project: np.ndarray,
+        leakage: np.ndarray
+    ) -> BatchMethodologyResult:
+        """Assemble a batch result from baseline, project and leakage emission arrays."""
+        return BatchMethodologyResult(
+            total_er_tco2e=baseline - project - leakage,
+            baseline_emissions_tco2e=baseline,
+            project_emissions_tco2e=project,
+            leakage_tco2e=leakage,
+            methodology_id=self.id,
+            registry=self.registry,
+        )
+    
     def check_eligibility(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """
         Check if project is eligible for this methodology.
@@ -6,7 +6,10 @@ Applicable to renewable energy projects > 15 MW supplying electricity to the gri
 Reference: https://cdm.unfccc.int/methodologies/DB/N8QWQBT0TP7HQV8W6YWSWGEO4FTRDT
 """
 from typing import Dict, List, Any
-from .base import BaseMethodology, MethodologyResult
+
+import numpy as np
+
+from .base import BaseMethodology, MethodologyResult, BatchMethodologyResult
 from .registry import MethodologyRegistry
 
 
@@ -185,6 +188,50 @@ class CDM_ACM0002(BaseMethodology):
             registry=self.registry,
         )
     
+    def compute_emission_reductions_batch(self, inputs: Dict[str, Any]) -> BatchMethodologyResult:
+        """
+        Vectorized ACM0002: ER = BE - PE - LE; BE = EG × EF_grid.
+        
+        PE = auxiliary_power_mwh × EF_grid + fossil_fuel_consumption_gj × EF_fossil
+        """
+        columns = self._batch_columns(inputs, {
+            "generation_mwh": None,
+            "ef_grid": None,
+            "capacity_mw": None,
+            "auxiliary_power_mwh": 0.0,
+            "fossil_fuel_consumption_gj": 0.0,
+            "ef_fossil_fuel": 0.074,
+        })
+        generation = columns["generation_mwh"]
+        ef_grid = columns["ef_grid"]
+        
+        errors = []
+        if np.any(generation < 0):
+            errors.append("generation_mwh must be non-negative")
+        if np.any(ef_grid < 0):
+            errors.append("ef_grid must be non-negative")
+        
+        project_type = inputs.get("project_type", "")
+        if project_type and project_type not in self.applicable_project_types:
+            errors.append(f"Invalid project_type: {project_type}")
+        
+        if project_type == "biomass" and not inputs.get("biomass_sustainable", True):
+            errors.append("Biomass must be sustainably sourced for ACM0002 eligibility")
+        
+        if errors:
+            raise ValueError(f"Invalid inputs: {'; '.join(errors)}")
+        
+        baseline_emissions = generation * ef_grid
+        
+        # Same sources as _calculate_project_emissions; non-positive inputs contribute nothing
+        auxiliary = np.clip(columns["auxiliary_power_mwh"], 0, None)
+        fossil_gj = np.clip(columns["fossil_fuel_consumption_gj"], 0, None)
+        project_emissions = auxiliary * ef_grid + fossil_gj * columns["ef_fossil_fuel"]
+        
+        leakage = np.zeros_like(baseline_emissions)
+        
+        return self._batch_result(baseline_emissions, project_emissions, leakage)
+    
     def _calculate_project_emissions(self, inputs: Dict[str, Any]) -> float:
         """
         Calculate project emissions from auxiliary consumption and fossil fuels.
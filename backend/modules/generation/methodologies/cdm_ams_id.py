@@ -6,7 +6,10 @@ Applicable to renewable energy projects ≤ 15 MW supplying electricity to the g
 Reference: https://cdm.unfccc.int/methodologies/DB/GNFWB3Y5IZGG3SHZTJYF8OPHXOGW3U
 """
 from typing import Dict, List, Any
-from .base import BaseMethodology, MethodologyResult
+
+import numpy as np
+
+from .base import BaseMethodology, MethodologyResult, BatchMethodologyResult
 from .registry import MethodologyRegistry
 
 
@@ -169,3 +172,46 @@ class CDM_AMS_ID(BaseMethodology):
             methodology_id=self.id,
             registry=self.registry,
         )
+    
+    def compute_emission_reductions_batch(self, inputs: Dict[str, Any]) -> BatchMethodologyResult:
+        """
+        Vectorized AMS-I.D: ER = EG × EF_grid - PE - LE with PE = LE = 0.
+        """
+        columns = self._batch_columns(inputs, {
+            "generation_mwh": None,
+            "ef_grid": None,
+            "capacity_mw": 0.0,
+        })
+        generation = columns["generation_mwh"]
+        ef_grid = columns["ef_grid"]
+        
+        errors = []
+        if np.any(generation < 0):
+            errors.append("generation_mwh must be non-negative")
+        if np.any(ef_grid < 0):
+            errors.append("ef_grid must be non-negative")
+        
+        project_type = inputs.get("project_type", "")
+        if project_type and project_type not in self.applicable_project_types:
+            errors.append(f"Invalid project_type: {project_type}")
+        
+        if np.any(columns["capacity_mw"] > self.max_capacity_mw):
+            errors.append(
+                f"Capacity exceeds AMS-I.D limit of {self.max_capacity_mw} MW. "
+                "Use ACM0002 for large-scale projects."
+            )
+        
+        if project_type == "hydro" and inputs.get("hydro_type") in ["reservoir"]:
+            power_density = self._batch_columns(inputs, {"power_density": 0.0})["power_density"]
+            if np.any(power_density <= 4):
+                errors.append(
+                    "Reservoir hydro projects require power density > 4 W/m² for eligibility"
+                )
+        
+        if errors:
+            raise ValueError(f"Invalid inputs: {'; '.join(errors)}")
+        
+        baseline_emissions = generation * ef_grid
+        zeros = np.zeros_like(baseline_emissions)
+        
+        return self._batch_result(baseline_emissions, zeros, zeros.copy())
@@ -6,7 +6,10 @@ Applicable to biogas projects recovering methane from livestock manure.
 Reference: https://cdm.unfccc.int/methodologies/DB/
 """
 from typing import Dict, List, Any
-from .base import BaseMethodology, MethodologyResult
+
+import numpy as np
+
+from .base import BaseMethodology, MethodologyResult, BatchMethodologyResult
 from .registry import MethodologyRegistry
 
 
@@ -185,6 +188,59 @@ class CDM_AMS_III_D(BaseMethodology):
             registry=self.registry,
         )
     
+    def compute_emission_reductions_batch(self, inputs: Dict[str, Any]) -> BatchMethodologyResult:
+        """
+        Vectorized AMS-III.D: ER = CH4_captured × GWP - PE - LE.
+        
+        Biogas volume, methane fraction, physical leakage and flare efficiency
+        may all vary per scenario; biogas_utilization is shared.
+        """
+        columns = self._batch_columns(inputs, {
+            "biogas_captured_m3": None,
+            "methane_fraction": 0.60,
+            "physical_leakage_fraction": 0.05,
+            "flare_efficiency": 0.98,
+        })
+        biogas_m3 = columns["biogas_captured_m3"]
+        ch4_fraction = columns["methane_fraction"]
+        
+        errors = []
+        if np.any(biogas_m3 < 0):
+            errors.append("biogas_captured_m3 must be non-negative")
+        
+        if "biogas_utilization" not in inputs:
+            errors.append("biogas_utilization is required")
+        
+        if np.any((ch4_fraction <= 0) | (ch4_fraction > 1)):
+            errors.append("methane_fraction must be between 0 and 1")
+        
+        if inputs.get("average_temperature_c") is not None:
+            temperature = self._batch_columns(inputs, {"average_temperature_c": None})["average_temperature_c"]
+            if np.any(temperature <= 5):
+                errors.append(
+                    "AMS-III.D requires annual average temperature > 5°C for eligibility"
+                )
+        
+        if errors:
+            raise ValueError(f"Invalid inputs: {'; '.join(errors)}")
+        
+        ch4_captured_tonnes = biogas_m3 * ch4_fraction * self.CH4_DENSITY
+        baseline_emissions = ch4_captured_tonnes * self.GWP_CH4
+        
+        # Mirrors _calculate_project_emissions
+        leakage_fraction = columns["physical_leakage_fraction"]
+        project_emissions = ch4_captured_tonnes * leakage_fraction * self.GWP_CH4
+        
+        if inputs.get("biogas_utilization", "flared") in ["flared", "combined"]:
+            unburned_fraction = 1 - columns["flare_efficiency"]
+            project_emissions = project_emissions + (
+                ch4_captured_tonnes * (1 - leakage_fraction) * unburned_fraction * self.GWP_CH4
+            )
+        
+        leakage = np.zeros_like(baseline_emissions)
+        
+        return self._batch_result(baseline_emissions, project_emissions, leakage)
+    
     def _calculate_project_emissions(
         self, 
         inputs: Dict[str, Any],
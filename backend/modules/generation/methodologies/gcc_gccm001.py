@@ -6,7 +6,10 @@ Global Carbon Council methodology for grid-connected renewable energy.
 Reference: https://globalcarboncouncil.com/gcc-methodologies/
 """
 from typing import Dict, List, Any
-from .base import BaseMethodology, MethodologyResult
+
+import numpy as np
+
+from .base import BaseMethodology, MethodologyResult, BatchMethodologyResult
 from .registry import MethodologyRegistry
 
 
@@ -183,3 +186,37 @@ class GCC_GCCM001(BaseMethodology):
             methodology_id=self.id,
             registry=self.registry,
         )
+    
+    def compute_emission_reductions_batch(self, inputs: Dict[str, Any]) -> BatchMethodologyResult:
+        """
+        Vectorized GCCM001: ER = EG × EF_grid - onsite consumption × EF_grid.
+        """
+        columns = self._batch_columns(inputs, {
+            "generation_mwh": None,
+            "ef_grid": None,
+            "onsite_power_consumption_mwh": 0.0,
+        })
+        generation = columns["generation_mwh"]
+        ef_grid = columns["ef_grid"]
+        
+        errors = []
+        if np.any(generation < 0):
+            errors.append("generation_mwh must be non-negative")
+        if np.any(ef_grid < 0):
+            errors.append("ef_grid must be non-negative")
+        
+        project_type = inputs.get("project_type", "")
+        if project_type and project_type not in self.applicable_project_types:
+            errors.append(f"Invalid project_type: {project_type}")
+        
+        if inputs.get("has_bess") and not inputs.get("bess_capacity_mwh"):
+            errors.append("bess_capacity_mwh is required when has_bess is true")
+        
+        if errors:
+            raise ValueError(f"Invalid inputs: {'; '.join(errors)}")
+        
+        baseline_emissions = generation * ef_grid
+        project_emissions = columns["onsite_power_consumption_mwh"] * ef_grid
+        leakage = np.zeros_like(baseline_emissions)
+        
+        return self._batch_result(baseline_emissions, project_emissions, leakage)
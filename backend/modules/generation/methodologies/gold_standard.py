@@ -6,11 +6,18 @@ Gold Standard wrapper that uses CDM methodologies with additional SDG requiremen
 Reference: https://globalgoals.goldstandard.org/standards/
 """
 from typing import Dict, List, Any
-from .base import BaseMethodology, MethodologyResult
+
+import numpy as np
+
+from .base import BaseMethodology, MethodologyResult, BatchMethodologyResult
 from .registry import MethodologyRegistry
 from .cdm_ams_id import CDM_AMS_ID
 from .cdm_acm0002 import CDM_ACM0002
 
+# Underlying CDM engines are stateless, so one shared instance of each is reused
+_SMALL_SCALE = CDM_AMS_ID()
+_LARGE_SCALE = CDM_ACM0002()
+
 
 @MethodologyRegistry.register
 class GoldStandard_RE(BaseMethodology):
@@ -51,6 +58,9 @@ class GoldStandard_RE(BaseMethodology):
     # SDG contributions (Gold Standard requirement)
     mandatory_sdgs = [7, 13]  # SDG 7: Clean Energy, SDG 13: Climate Action
     
+    # Capacity threshold between small-scale (AMS-I.D) and large-scale (ACM0002)
+    small_scale_limit_mw = 15.0
+    
     def required_inputs_schema(self) -> Dict[str, Any]:
         return {
             "generation_mwh": {
@@ -138,10 +148,10 @@ class GoldStandard_RE(BaseMethodology):
         project_type = inputs.get("project_type", "solar")
         
         # Determine which CDM methodology to use based on capacity
-        if capacity_mw <= 15:
-            underlying_methodology = CDM_AMS_ID()
+        if capacity_mw <= self.small_scale_limit_mw:
+            underlying_methodology = _SMALL_SCALE
         else:
-            underlying_methodology = CDM_ACM0002()
+            underlying_methodology = _LARGE_SCALE
         
         # Prepare inputs for underlying methodology
         cdm_inputs = {
@@ -169,6 +179,45 @@ class GoldStandard_RE(BaseMethodology):
         
         return result
     
+    def compute_emission_reductions_batch(self, inputs: Dict[str, Any]) -> BatchMethodologyResult:
+        """
+        Vectorized Gold Standard calculation.
+        
+        Each scenario is routed to AMS-I.D or ACM0002 by its capacity, and each
+        underlying methodology evaluates its share of scenarios in one batch.
+        """
+        errors = self.validate_inputs(inputs)
+        if errors:
+            raise ValueError(f"Invalid inputs: {'; '.join(errors)}")
+        
+        columns = self._batch_columns(inputs, {
+            "generation_mwh": None,
+            "ef_grid": None,
+            "capacity_mw": None,
+        })
+        capacity = columns["capacity_mw"]
+        size = len(capacity)
+        
+        baseline_emissions = np.zeros(size)
+        project_emissions = np.zeros(size)
+        leakage = np.zeros(size)
+        
+        small_scale = capacity <= self.small_scale_limit_mw
+        for underlying, mask in ((_SMALL_SCALE, small_scale), (_LARGE_SCALE, ~small_scale)):
+            if not mask.any():
+                continue
+            partial = underlying.compute_emission_reductions_batch({
+                "generation_mwh": columns["generation_mwh"][mask],
+                "ef_grid": columns["ef_grid"][mask],
+                "capacity_mw": capacity[mask],
+                "project_type": inputs.get("project_type", "solar"),
+            })
+            baseline_emissions[mask] = partial.baseline_emissions_tco2e
+            project_emissions[mask] = partial.project_emissions_tco2e
+            leakage[mask] = partial.leakage_tco2e
+        
+        return self._batch_result(baseline_emissions, project_emissions, leakage)
+    
     def check_eligibility(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """
         Check Gold Standard eligibility including SDG requirements.
@@ -0,0 +1,170 @@
+"""
+Methodology Manifests
+Lightweight metadata used to register methodologies without importing their calculation modules
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple, Type
+
+
+@dataclass(frozen=True)
+class MethodologyManifest:
+    """
+    Static description of a methodology plugin.
+
+    The registry lists, filters and describes methodologies from their manifests.
+    The module named in `module` is only imported the first time the methodology
+    is actually used for a calculation.
+    """
+    id: str
+    module: str
+    class_name: str
+    registry: str
+    name: str
+    version: str = ""
+    description: str = ""
+    applicable_project_types: Tuple[str, ...] = field(default_factory=tuple)
+    min_capacity_mw: Optional[float] = None
+    max_capacity_mw: Optional[float] = None
+    methodology_url: Optional[str] = None
+    tool_references: Tuple[str, ...] = field(default_factory=tuple)
+
+    @classmethod
+    def from_class(cls, methodology_class: Type) -> "MethodologyManifest":
+        """Build a manifest from an already imported methodology class"""
+        return cls(
+            id=methodology_class.id,
+            module=methodology_class.__module__,
+            class_name=methodology_class.__name__,
+            registry=methodology_class.registry,
+            name=methodology_class.name,
+            version=methodology_class.version,
+            description=methodology_class.description,
+            applicable_project_types=tuple(methodology_class.applicable_project_types),
+            min_capacity_mw=methodology_class.min_capacity_mw,
+            max_capacity_mw=methodology_class.max_capacity_mw,
+            methodology_url=methodology_class.methodology_url,
+            tool_references=tuple(methodology_class.tool_references),
+        )
+
+    def get_info(self) -> Dict[str, Any]:
+        """Get methodology information for display (same shape as BaseMethodology.get_info)"""
+        return {
+            "id": self.id,
+            "registry": self.registry,
+            "name": self.name,
+            "version": self.version,
+            "description": self.description,
+            "applicable_project_types": list(self.applicable_project_types),
+            "min_capacity_mw": self.min_capacity_mw,
+            "max_capacity_mw": self.max_capacity_mw,
+            "methodology_url": self.methodology_url,
+            "tool_references": list(self.tool_references),
+        }
+
+
+# Methodologies shipped with the platform.
+# Keep in sync with the class attributes of each methodology; once a class is
+# imported its own attributes replace the manifest entry in the registry.
+_PACKAGE = __name__.rsplit(".", 1)[0]
+
+BUILTIN_MANIFESTS: List[MethodologyManifest] = [
+    MethodologyManifest(
+        id="CDM_AMS_ID",
+        module=f"{_PACKAGE}.cdm_ams_id",
+        class_name="CDM_AMS_ID",
+        registry="CDM",
+        name="Grid-connected renewable electricity generation (small-scale)",
+        version="19.0",
+        description=(
+            "Applies to renewable energy projects up to 15 MW capacity that supply "
+            "electricity to a national or regional grid. Covers solar PV, wind, "
+            "hydro (run-of-river), geothermal, and tidal/wave power."
+        ),
+        applicable_project_types=("solar", "wind", "hydro", "geothermal", "tidal", "wave"),
+        max_capacity_mw=15.0,
+        methodology_url="https://cdm.unfccc.int/methodologies/DB/GNFWB3Y5IZGG3SHZTJYF8OPHXOGW3U",
+        tool_references=("TOOL07", "TOOL01"),
+    ),
+    MethodologyManifest(
+        id="CDM_ACM0002",
+        module=f"{_PACKAGE}.cdm_acm0002",
+        class_name="CDM_ACM0002",
+        registry="CDM",
+        name="Grid-connected electricity generation from renewable sources",
+        version="21.0",
+        description=(
+            "Consolidated methodology for large-scale grid-connected renewable energy projects. "
+            "Applies to solar PV, wind, hydro, geothermal, and renewable biomass projects "
+            "with no capacity limit."
+        ),
+        applicable_project_types=("solar", "wind", "hydro", "geothermal", "biomass"),
+        min_capacity_mw=15.0,
+        methodology_url="https://cdm.unfccc.int/methodologies/DB/N8QWQBT0TP7HQV8W6YWSWGEO4FTRDT",
+        tool_references=("TOOL07", "TOOL01", "TOOL02", "TOOL03"),
+    ),
+    MethodologyManifest(
+        id="CDM_AMS_III_D",
+        module=f"{_PACKAGE}.cdm_ams_iii_d",
+        class_name="CDM_AMS_III_D",
+        registry="CDM",
+        name="Methane recovery in animal manure management systems",
+        version="22.0",
+        description=(
+            "Applies to projects that recover and destroy/utilize methane from "
+            "animal manure management systems. Includes anaerobic digesters, "
+            "covered lagoons, and biogas capture systems."
+        ),
+        applicable_project_types=("biogas",),
+        methodology_url="https://cdm.unfccc.int/methodologies/DB/",
+        tool_references=("TOOL03", "Project and leakage emissions from anaerobic digesters"),
+    ),
+    MethodologyManifest(
+        id="VERRA_AM0123",
+        module=f"{_PACKAGE}.verra_am0123",
+        class_name="VERRA_AM0123",
+        registry="VERRA",
+        name="Renewable energy generation for captive use",
+        version="1.0",
+        description=(
+            "Applies to project activities that generate renewable electricity for captive "
+            "consumption at industrial, commercial, or residential facilities. The renewable "
+            "energy plant may supply electricity directly via dedicated line or through "
+            "the grid via wheeling arrangements."
+        ),
+        applicable_project_types=("solar", "wind", "hydro", "biomass"),
+        methodology_url="https://verra.org/methodologies/am0123-renewable-energy-generation-for-captive-use-v1-0/",
+        tool_references=("VT0011", "VT0010"),
+    ),
+    MethodologyManifest(
+        id="GCC_GCCM001",
+        module=f"{_PACKAGE}.gcc_gccm001",
+        class_name="GCC_GCCM001",
+        registry="GCC",
+        name="Grid-connected renewable energy generation",
+        version="4.0",
+        description=(
+            "Global Carbon Council methodology for grid-connected renewable energy projects. "
+            "Supports solar PV, wind (onshore/offshore), tidal, and wave energy. "
+            "Version 4.0 includes support for battery storage systems."
+        ),
+        applicable_project_types=("solar", "wind", "tidal", "wave"),
+        methodology_url="https://globalcarboncouncil.com/gcc-methodologies/",
+        tool_references=("TOOL07 (CDM)", "TOOL01 (CDM)"),
+    ),
+    MethodologyManifest(
+        id="GS_RE",
+        module=f"{_PACKAGE}.gold_standard",
+        class_name="GoldStandard_RE",
+        registry="GOLD_STANDARD",
+        name="Gold Standard Renewable Energy",
+        version="1.0",
+        description=(
+            "Gold Standard for the Global Goals renewable energy activities. "
+            "Uses approved CDM methodologies with additional requirements for SDG impacts, "
+            "stakeholder engagement, and environmental/social safeguards."
+        ),
+        applicable_project_types=("solar", "wind", "hydro", "geothermal", "biogas", "biomass"),
+        methodology_url="https://globalgoals.goldstandard.org/standards/431_V1.2_AR_Renewable-Energy-Activity-Requirements.pdf",
+        tool_references=("CDM AMS-I.D", "CDM ACM0002", "CDM AMS-III.D"),
+    ),
+]
@@ -1,145 +1,269 @@
 """
 Methodology Registry
 Central registry for all available carbon credit methodologies
+
+Methodologies are discovered as lightweight manifests at startup and their
+calculation modules are imported on first use. Manifests come from:
+
+    1. The built-in list in `manifest.BUILTIN_MANIFESTS`
+    2. Installed packages exposing the `credocarbon.methodologies` entry point group
+    3. Modules listed in the METHODOLOGY_PLUGINS environment variable
+       (comma-separated), each defining a `METHODOLOGY_MANIFESTS` list
+
+Entry points may resolve to a MethodologyManifest, a list of manifests, or a
+BaseMethodology subclass (which is registered eagerly).
 """
-from typing import Dict, List, Type, Optional
+import importlib
+import logging
+import os
+from importlib.metadata import entry_points
+from typing import Any, Dict, List, Type, Optional
 from .base import BaseMethodology
+from .manifest import MethodologyManifest, BUILTIN_MANIFESTS
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "credocarbon.methodologies"
 
 
 class MethodologyRegistry:
     """
     Singleton registry for managing carbon credit calculation methodologies.
-    
+
     Usage:
         # Register a methodology
         @MethodologyRegistry.register
         class MyMethodology(BaseMethodology):
             ...
-        
-        # Get a methodology instance
+
+        # Register a methodology without importing it
+        MethodologyRegistry.register_manifest(MethodologyManifest(
+            id="MY_METHODOLOGY_ID", module="my_pkg.my_methodology",
+            class_name="MyMethodology", registry="VERRA", name="...",
+        ))
+
+        # Get a methodology instance (imports its module on first use)
         methodology = MethodologyRegistry.get("MY_METHODOLOGY_ID")
-        
+
         # List methodologies for a project type
         methodologies = MethodologyRegistry.list_for_project_type("solar")
     """
-    
+
+    _manifests: Dict[str, MethodologyManifest] = {}
     _methodologies: Dict[str, Type[BaseMethodology]] = {}
     _initialized: bool = False
-    
+
     @classmethod
     def register(cls, methodology_class: Type[BaseMethodology]) -> Type[BaseMethodology]:
         """
         Decorator to register a methodology class.
-        
+
         Args:
             methodology_class: Class inheriting from BaseMethodology
-            
+
         Returns:
             The registered class (unchanged)
         """
         if not methodology_class.id:
             raise ValueError(f"Methodology class {methodology_class.__name__} must have an 'id' attribute")
-        
+
         cls._methodologies[methodology_class.id] = methodology_class
+        # The loaded class is authoritative over any manifest registered for it
+        cls._manifests[methodology_class.id] = MethodologyManifest.from_class(methodology_class)
         return methodology_class
-    
+
+    @classmethod
+    def register_manifest(cls, manifest: MethodologyManifest) -> MethodologyManifest:
+        """
+        Register a methodology by manifest without importing its module.
+
+        Args:
+            manifest: Methodology metadata and import location
+
+        Returns:
+            The registered manifest
+        """
+        if not manifest.id:
+            raise ValueError(f"Methodology manifest for {manifest.module} must have an 'id'")
+
+        # Never replace the metadata of a class that is already loaded
+        if manifest.id not in cls._methodologies:
+            cls._manifests[manifest.id] = manifest
+        return manifest
+
     @classmethod
     def get(cls, methodology_id: str) -> BaseMethodology:
         """
         Get an instance of a registered methodology.
-        
+
         Args:
             methodology_id: Unique identifier of the methodology
-            
+
         Returns:
             Instance of the methodology class
-            
+
         Raises:
             ValueError: If methodology_id is not registered
         """
+        return cls.get_class(methodology_id)()
+
+    @classmethod
+    def get_class(cls, methodology_id: str) -> Type[BaseMethodology]:
+        """
+        Get a registered methodology class, importing its module if needed.
+
+        Raises:
+            ValueError: If methodology_id is not registered or cannot be loaded
+        """
         cls._ensure_initialized()
-        
-        if methodology_id not in cls._methodologies:
-            available = ", ".join(cls._methodologies.keys())
+
+        if methodology_id in cls._methodologies:
+            return cls._methodologies[methodology_id]
+
+        if methodology_id not in cls._manifests:
+            available = ", ".join(cls._manifests.keys())
             raise ValueError(
                 f"Unknown methodology: {methodology_id}. "
                 f"Available: {available}"
             )
-        
-        return cls._methodologies[methodology_id]()
-    
+
+        return cls._load(cls._manifests[methodology_id])
+
+    @classmethod
+    def get_manifest(cls, methodology_id: str) -> Optional[MethodologyManifest]:
+        """Get the manifest of a methodology without loading it"""
+        cls._ensure_initialized()
+        return cls._manifests.get(methodology_id)
+
+    @classmethod
+    def is_loaded(cls, methodology_id: str) -> bool:
+        """Check whether a methodology's calculation module has been imported"""
+        return methodology_id in cls._methodologies
+
     @classmethod
     def list_all(cls) -> List[Dict]:
         """
         List all registered methodologies.
-        
+
         Returns:
             List of methodology info dictionaries
         """
         cls._ensure_initialized()
-        
+
         return [
-            cls._methodologies[m_id]().get_info()
-            for m_id in sorted(cls._methodologies.keys())
+            cls._manifests[m_id].get_info()
+            for m_id in sorted(cls._manifests.keys())
         ]
-    
+
     @classmethod
     def list_for_project_type(cls, project_type: str) -> List[Dict]:
         """
         List methodologies applicable for a given project type.
-        
+
         Args:
             project_type: Type of project (solar, wind, hydro, biogas, etc.)
-            
+
         Returns:
             List of applicable methodology info dictionaries
         """
         cls._ensure_initialized()
-        
+
         result = []
-        for m_id, m_class in cls._methodologies.items():
-            instance = m_class()
-            if project_type.lower() in [t.lower() for t in instance.applicable_project_types]:
-                result.append(instance.get_info())
-        
+        for m_id, manifest in cls._manifests.items():
+            if project_type.lower() in [t.lower() for t in manifest.applicable_project_types]:
+                result.append(manifest.get_info())
+
         return result
-    
+
     @classmethod
     def list_for_registry(cls, registry: str) -> List[Dict]:
         """
         List methodologies for a specific registry.
-        
+
         Args:
             registry: Registry name (CDM, VERRA, GOLD_STANDARD, GCC, etc.)
-            
+
         Returns:
             List of methodology info dictionaries for that registry
         """
         cls._ensure_initialized()
-        
+
         result = []
-        for m_id, m_class in cls._methodologies.items():
-            instance = m_class()
-            if instance.registry.upper() == registry.upper():
-                result.append(instance.get_info())
-        
+        for m_id, manifest in cls._manifests.items():
+            if manifest.registry.upper() == registry.upper():
+                result.append(manifest.get_info())
+
         return result
-    
+
     @classmethod
     def get_ids(cls) -> List[str]:
         """Get all registered methodology IDs"""
         cls._ensure_initialized()
-        return list(cls._methodologies.keys())
-    
+        return list(cls._manifests.keys())
+
+    @classmethod
+    def _load(cls, manifest: MethodologyManifest) -> Type[BaseMethodology]:
+        """Import a methodology module and return its registered class"""
+        try:
+            module = importlib.import_module(manifest.module)
+        except ImportError as e:
+            raise ValueError(f"Methodology {manifest.id} could not be loaded: {e}")
+
+        if manifest.id not in cls._methodologies:
+            # Module did not use the @register decorator
+            methodology_class = getattr(module, manifest.class_name, None)
+            if methodology_class is None:
+                raise ValueError(
+                    f"Methodology {manifest.id}: class {manifest.class_name} "
+                    f"not found in {manifest.module}"
+                )
+            cls.register(methodology_class)
+
+        logger.debug(f"Loaded methodology {manifest.id} from {manifest.module}")
+        return cls._methodologies[manifest.id]
+
+    @classmethod
+    def _register_plugin(cls, plugin: Any, source: str):
+        """Register whatever a plugin source resolved to"""
+        if isinstance(plugin, MethodologyManifest):
+            cls.register_manifest(plugin)
+        elif isinstance(plugin, (list, tuple)):
+            for item in plugin:
+                cls._register_plugin(item, source)
+        elif isinstance(plugin, type) and issubclass(plugin, BaseMethodology):
+            cls.register(plugin)
+        else:
+            logger.warning(f"Ignoring methodology plugin {source}: unsupported object {plugin!r}")
+
+    @classmethod
+    def _discover_entry_points(cls):
+        """Register manifests exposed by installed packages"""
+        for ep in entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                cls._register_plugin(ep.load(), f"entry point '{ep.name}'")
+            except Exception as e:
+                logger.warning(f"Failed to load methodology entry point '{ep.name}': {e}")
+
+    @classmethod
+    def _discover_configured_modules(cls):
+        """Register manifests from modules listed in METHODOLOGY_PLUGINS"""
+        configured = os.getenv("METHODOLOGY_PLUGINS", "")
+        for module_name in [m.strip() for m in configured.split(",") if m.strip()]:
+            try:
+                module = importlib.import_module(module_name)
+                cls._register_plugin(
+                    getattr(module, "METHODOLOGY_MANIFESTS", []),
+                    f"module '{module_name}'"
+                )
+            except ImportError as e:
+                logger.warning(f"Failed to import methodology plugin module '{module_name}': {e}")
+
     @classmethod
     def _ensure_initialized(cls):
-        """Ensure all methodology modules are imported"""
+        """Ensure all methodology manifests are registered (modules are not imported)"""
         if not cls._initialized:
-            # Import all methodology modules to trigger registration
-            from . import cdm_ams_id
-            from . import cdm_acm0002
-            from . import cdm_ams_iii_d
-            from . import verra_am0123
-            from . import gcc_gccm001
-            from . import gold_standard
             cls._initialized = True
+            for manifest in BUILTIN_MANIFESTS:
+                cls.register_manifest(manifest)
+            cls._discover_entry_points()
+            cls._discover_configured_modules()
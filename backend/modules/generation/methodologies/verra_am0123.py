@@ -6,7 +6,10 @@ Applicable to renewable energy projects supplying electricity to captive consume
 Reference: https://verra.org/methodologies/am0123-renewable-energy-generation-for-captive-use-v1-0/
 """
 from typing import Dict, List, Any
-from .base import BaseMethodology, MethodologyResult
+
+import numpy as np
+
+from .base import BaseMethodology, MethodologyResult, BatchMethodologyResult
 from .registry import MethodologyRegistry
 
 
@@ -168,3 +171,32 @@ class VERRA_AM0123(BaseMethodology):
             methodology_id=self.id,
             registry=self.registry,
         )
+    
+    def compute_emission_reductions_batch(self, inputs: Dict[str, Any]) -> BatchMethodologyResult:
+        """
+        Vectorized AM0123: ER = EG_captive × (1 - wheeling losses) × EF_baseline.
+        """
+        columns = self._batch_columns(inputs, {
+            "captive_generation_mwh": None,
+            "ef_baseline": None,
+            "wheeling_losses_percent": 0.0,
+        })
+        captive_mwh = columns["captive_generation_mwh"]
+        ef_baseline = columns["ef_baseline"]
+        
+        errors = []
+        if np.any(captive_mwh < 0):
+            errors.append("captive_generation_mwh must be non-negative")
+        if np.any(ef_baseline < 0):
+            errors.append("ef_baseline must be non-negative")
+        if "baseline_type" not in inputs:
+            errors.append("baseline_type is required")
+        
+        if errors:
+            raise ValueError(f"Invalid inputs: {'; '.join(errors)}")
+        
+        effective_generation = captive_mwh * (1 - columns["wheeling_losses_percent"] / 100)
+        baseline_emissions = effective_generation * ef_baseline
+        zeros = np.zeros_like(baseline_emissions)
+        
+        return self._batch_result(baseline_emissions, zeros, zeros.copy())
@@ -32,10 +32,17 @@ from .schemas import (
     MonthlyBreakdown,
     AnnualBreakdown,
     ProcessingStatusResponse,
+    UncertaintyRequest,
+    UncertaintyResponse,
+    SensitivityRequest,
+    SensitivityResponse,
+    ForecastRequest,
+    ForecastResponse,
 )
 from .methodologies.registry import MethodologyRegistry
 from .grid_ef_database import get_grid_ef, get_all_grid_efs, get_countries_list
 from .services.credit_calculator import CreditCalculator
+from .services.forecasting import GenerationForecaster
 
 router = APIRouter(prefix="/generation", tags=["Generation Data"])
 
@@ -631,31 +638,10 @@ async def estimate_credits(
         raise HTTPException(status_code=404, detail="Project not found")
     
     # Get generation data
-    timeseries = db.query(GenerationTimeseries).filter(
-        GenerationTimeseries.project_id == request.project_id
+    generation_data = _load_generation_data(
+        db, request.project_id, request.period_start, request.period_end
     )
     
-    if request.period_start:
-        timeseries = timeseries.filter(GenerationTimeseries.ts_utc >= request.period_start)
-    if request.period_end:
-        timeseries = timeseries.filter(GenerationTimeseries.ts_utc <= request.period_end)
-    
-    timeseries = timeseries.all()
-    
-    # If no timeseries data, check for uploaded files with mappings
-    if not timeseries:
-        # Try to get data from wizard_data or use sample calculation
-        raise HTTPException(
-            status_code=400,
-            detail="No generation data found. Please upload and process data first."
-        )
-    
-    # Prepare generation data for calculator
-    generation_data = [
-        {"timestamp": ts.ts_utc, "energy_mwh": float(ts.energy_mwh)}
-        for ts in timeseries
-    ]
-    
     # Run calculation
     try:
         calculator = CreditCalculator(request.methodology_id)
@@ -717,6 +703,84 @@ async def estimate_credits(
     )
 
 
+@router.post("/estimate/uncertainty", response_model=UncertaintyResponse)
+async def estimate_credits_uncertainty(
+    request: UncertaintyRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Monte Carlo confidence intervals for a project's credit estimation.
+    
+    Samples generation metering error, grid EF uncertainty and methodology
+    parameters, and returns percentiles for the total, each month and each
+    vintage. Results are not saved.
+    """
+    project = db.query(Project).filter(
+        Project.id == request.project_id,
+        Project.developer_id == current_user.id
+    ).first()
+    
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    generation_data = _load_generation_data(
+        db, request.project_id, request.period_start, request.period_end
+    )
+    
+    try:
+        calculator = CreditCalculator(request.methodology_id)
+        result = calculator.calculate_uncertainty(
+            generation_data=generation_data,
+            country_code=request.country_code,
+            project_type=project.project_type,
+            ef_override=request.ef_value,
+            additional_inputs=request.additional_inputs,
+            n_draws=request.n_draws,
+            uncertainty=request.uncertainty,
+            percentiles=request.percentiles,
+            seed=request.seed,
+            workers=request.workers,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return UncertaintyResponse(project_id=project.id, **result)
+
+
+def _load_generation_data(
+    db: Session,
+    project_id: int,
+    period_start: Optional[datetime],
+    period_end: Optional[datetime]
+) -> List[dict]:
+    """Load a project's processed generation timeseries for the calculator."""
+    timeseries = db.query(GenerationTimeseries).filter(
+        GenerationTimeseries.project_id == project_id
+    )
+    
+    if period_start:
+        timeseries = timeseries.filter(GenerationTimeseries.ts_utc >= period_start)
+    if period_end:
+        timeseries = timeseries.filter(GenerationTimeseries.ts_utc <= period_end)
+    
+    timeseries = timeseries.all()
+    
+    # If no timeseries data, check for uploaded files with mappings
+    if not timeseries:
+        # Try to get data from wizard_data or use sample calculation
+        raise HTTPException(
+            status_code=400,
+            detail="No generation data found. Please upload and process data first."
+        )
+    
+    # Prepare generation data for calculator
+    return [
+        {"timestamp": ts.ts_utc, "energy_mwh": float(ts.energy_mwh)}
+        for ts in timeseries
+    ]
+
+
 @router.post("/quick-estimate")
 async def quick_estimate(
     generation_mwh: float = Form(...),
@@ -741,6 +805,102 @@ async def quick_estimate(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/sensitivity", response_model=SensitivityResponse)
+async def sensitivity_sweep(request: SensitivityRequest):
+    """
+    Sensitivity of emission reductions to methodology inputs.
+    
+    Evaluates every combination of the given parameter grids in one
+    vectorized batch and returns a tornado table, replacing repeated
+    quick-estimate calls. Nothing is saved.
+    """
+    parameters = {}
+    for name, spec in request.parameters.items():
+        if spec.values:
+            parameters[name] = spec.values
+        elif spec.min is not None and spec.max is not None:
+            step = (spec.max - spec.min) / (spec.steps - 1)
+            parameters[name] = [spec.min + step * i for i in range(spec.steps)]
+        else:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Parameter {name} needs either values or min and max"
+            )
+    
+    try:
+        calculator = CreditCalculator(request.methodology_id)
+        return calculator.sensitivity_sweep(
+            total_generation_mwh=request.generation_mwh,
+            country_code=request.country_code,
+            project_type=request.project_type,
+            parameters=parameters,
+            ef_override=request.ef_value,
+            region_code=request.region_code,
+            additional_inputs=request.additional_inputs,
+            include_grid=request.include_grid,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/forecast", response_model=ForecastResponse)
+async def forecast_credits(
+    request: ForecastRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Ex-ante generation and credit projections for one or more projects.
+    
+    Seasonal profiles come from each project's generation history, or from
+    installed capacity and project-type defaults when there is none.
+    The whole portfolio is projected in one request. Nothing is saved.
+    """
+    project_ids = [p.project_id for p in request.projects]
+    projects = {
+        p.id: p for p in db.query(Project).filter(
+            Project.id.in_(project_ids),
+            Project.developer_id == current_user.id
+        ).all()
+    }
+    
+    missing = [str(pid) for pid in project_ids if pid not in projects]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Project not found: {', '.join(missing)}")
+    
+    specs = [
+        {
+            "project": projects[p.project_id],
+            "methodology_id": p.methodology_id or request.methodology_id,
+            "country_code": p.country_code or request.country_code,
+            "region_code": p.region_code,
+            "ef_override": p.ef_value,
+            "capacity_mw": p.capacity_mw,
+            "degradation_rate": p.degradation_rate,
+            "additional_inputs": p.additional_inputs,
+        }
+        for p in request.projects
+    ]
+    
+    try:
+        forecasts = GenerationForecaster(db).forecast_portfolio(
+            specs,
+            years=request.years,
+            start_year=request.start_year,
+            start_month=request.start_month,
+            include_monthly=request.include_monthly,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return ForecastResponse(
+        years=request.years,
+        total_generation_mwh=round(sum(f["total_generation_mwh"] for f in forecasts), 4),
+        total_er_tco2e=round(sum(f["total_er_tco2e"] for f in forecasts), 4),
+        forecasts=forecasts,
+    )
+
+
 @router.get("/estimations/{project_id}")
 async def list_estimations(
     project_id: int,
@@ -166,6 +166,164 @@ class EstimationResponse(BaseModel):
         from_attributes = True
 
 
+# ============ Uncertainty Schemas ============
+
+class UncertaintyRequest(BaseModel):
+    project_id: int
+    methodology_id: str
+    country_code: str
+    ef_value: Optional[float] = None  # Uses published if not provided
+    period_start: Optional[datetime] = None
+    period_end: Optional[datetime] = None
+    additional_inputs: Optional[Dict[str, Any]] = None
+    n_draws: int = Field(10000, ge=1000, le=100000)
+    uncertainty: Optional[Dict[str, float]] = None  # Relative 1-sigma per input, e.g. {"ef_grid": 0.05}
+    percentiles: List[float] = [5, 50, 95]
+    seed: Optional[int] = None
+    workers: int = Field(1, ge=1, le=8)
+
+
+class DistributionSummary(BaseModel):
+    mean_tco2e: float
+    std_tco2e: float
+    percentiles_tco2e: Dict[str, float]  # e.g. {"p5": ..., "p50": ..., "p95": ...}
+
+
+class MonthlyDistribution(DistributionSummary):
+    month: str  # YYYY-MM format
+    generation_mwh: float
+
+
+class AnnualDistribution(DistributionSummary):
+    vintage: int  # Year
+    generation_mwh: float
+
+
+class UncertaintyResponse(BaseModel):
+    project_id: int
+    methodology_id: str
+    registry: str
+    total_generation_mwh: float
+    
+    # Grid EF info
+    country_code: str
+    ef_value: float
+    ef_source: Optional[str] = None
+    ef_year: Optional[int] = None
+    
+    # Simulation settings
+    n_draws: int
+    percentiles: List[float]
+    seed: Optional[int] = None
+    uncertainty: Dict[str, float]
+    
+    # Distributions
+    total: DistributionSummary
+    monthly_breakdown: List[MonthlyDistribution]
+    annual_breakdown: List[AnnualDistribution]
+    
+    calculation_date: datetime
+
+
+# ============ Sensitivity Sweep Schemas ============
+
+class SweepParameter(BaseModel):
+    """Either explicit values or an evenly spaced range"""
+    values: Optional[List[float]] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    steps: int = Field(5, ge=2, le=1000)
+
+
+class SensitivityRequest(BaseModel):
+    generation_mwh: float = Field(..., ge=0)
+    country_code: str
+    project_type: str = "solar"
+    methodology_id: str = "CDM_AMS_ID"
+    ef_value: Optional[float] = None  # Uses published if not provided
+    region_code: Optional[str] = None
+    additional_inputs: Optional[Dict[str, Any]] = None  # Base values
+    parameters: Dict[str, SweepParameter]
+    include_grid: bool = False
+
+
+class TornadoRow(BaseModel):
+    parameter: str
+    base_value: float
+    values: List[float]
+    er_tco2e: List[float]
+    low_value: float
+    low_er_tco2e: float
+    high_value: float
+    high_er_tco2e: float
+    swing_tco2e: float
+
+
+class SensitivityResponse(BaseModel):
+    methodology_id: str
+    registry: str
+    total_generation_mwh: float
+    
+    # Grid EF info
+    country_code: str
+    ef_value: float
+    ef_source: Optional[str] = None
+    ef_year: Optional[int] = None
+    
+    base_er_tco2e: float
+    combinations: int
+    tornado: List[TornadoRow]  # Sorted by swing, largest first
+    min_er_tco2e: float
+    min_inputs: Dict[str, float]
+    max_er_tco2e: float
+    max_inputs: Dict[str, float]
+    grid: Optional[List[Dict[str, float]]] = None
+
+
+# ============ Forecast Schemas ============
+
+class ForecastProject(BaseModel):
+    project_id: int
+    methodology_id: Optional[str] = None  # Defaults to the request methodology
+    country_code: Optional[str] = None  # Defaults to the request country
+    region_code: Optional[str] = None
+    ef_value: Optional[float] = None
+    capacity_mw: Optional[float] = Field(None, gt=0)  # Defaults to the wizard capacity
+    degradation_rate: Optional[float] = Field(None, ge=0, lt=1)  # Per year
+    additional_inputs: Optional[Dict[str, Any]] = None
+
+
+class ForecastRequest(BaseModel):
+    projects: List[ForecastProject] = Field(..., min_length=1, max_length=500)
+    methodology_id: str = "CDM_AMS_ID"
+    country_code: str = "IN"
+    years: int = Field(10, ge=1, le=30)
+    start_year: Optional[int] = None  # Defaults to next calendar year
+    start_month: int = Field(1, ge=1, le=12)
+    include_monthly: bool = True
+
+
+class ProjectForecast(BaseModel):
+    project_id: int
+    project_name: Optional[str] = None
+    project_type: Optional[str] = None
+    methodology_id: str
+    country_code: str
+    profile_source: str  # historical or default
+    degradation_rate: float
+    total_generation_mwh: float
+    total_er_tco2e: float
+    annual_breakdown: List[AnnualBreakdown]
+    monthly_breakdown: Optional[List[MonthlyBreakdown]] = None
+
+
+class ForecastResponse(BaseModel):
+    years: int
+    total_generation_mwh: float
+    total_er_tco2e: float
+    forecasts: List[ProjectForecast]
+
+
 # ============ Processing Status ============
 
 class ProcessingStatusResponse(BaseModel):
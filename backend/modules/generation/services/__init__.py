@@ -1,2 +1,3 @@
 # Services package
 from .credit_calculator import CreditCalculator, quick_estimate
+from .forecasting import GenerationForecaster
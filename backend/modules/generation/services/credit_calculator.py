@@ -2,15 +2,59 @@
 Credit Calculator Service
 Core calculation engine for carbon credit estimation
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from datetime import datetime
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 
 from ..methodologies.registry import MethodologyRegistry
 from ..methodologies.base import MethodologyResult
 from ..grid_ef_database import get_grid_ef, GridEFData
 
 
+# ============ Uncertainty Settings ============
+
+# Relative standard deviations (1 sigma) used when a caller does not supply its own.
+# generation_mwh is metering error and is drawn independently for every month;
+# every other parameter is a systematic error drawn once per scenario.
+DEFAULT_UNCERTAINTY = {
+    "generation_mwh": 0.02,
+    "ef_grid": 0.10,
+    "biogas_captured_m3": 0.10,
+    "methane_fraction": 0.05,
+}
+
+# Inputs that are totals over the crediting period. For a monthly breakdown they
+# are apportioned to months by each month's share of generation.
+PERIOD_QUANTITY_INPUTS = (
+    "generation_mwh",
+    "captive_generation_mwh",
+    "biogas_captured_m3",
+    "electricity_generated_mwh",
+    "auxiliary_power_mwh",
+    "fossil_fuel_consumption_gj",
+    "captive_consumption_mwh",
+    "onsite_power_consumption_mwh",
+)
+
+# Inputs that are fractions and must stay within (0, 1] when sampled
+FRACTION_INPUTS = ("methane_fraction", "flare_efficiency", "physical_leakage_fraction")
+
+# Inputs that default from another input when not supplied: name -> (source, ratio)
+LINKED_INPUTS = {
+    "captive_generation_mwh": ("generation_mwh", 1.0),
+    "biogas_captured_m3": ("generation_mwh", 500.0),  # ~500 m3/MWh
+    "ef_baseline": ("ef_grid", 1.0),
+}
+
+MAX_UNCERTAINTY_DRAWS = 100_000
+DRAWS_PER_CHUNK = 10_000
+
+MAX_SWEEP_COMBINATIONS = 100_000
+
+
 class CreditCalculator:
     """
     Service for calculating carbon credit estimations.
@@ -57,37 +101,13 @@ class CreditCalculator:
             Dictionary with estimation results, breakdowns, and metadata
         """
         # Get grid emission factor
-        if ef_override is not None:
-            ef_grid = ef_override
-            ef_source = "Manual override"
-            ef_year = datetime.now().year
-        else:
-            ef_data = get_grid_ef(country_code, region_code)
-            if not ef_data:
-                raise ValueError(f"No emission factor data for country: {country_code}")
-            ef_grid = ef_data.combined_margin
-            ef_source = ef_data.source_name
-            ef_year = ef_data.data_year
+        ef_grid, ef_source, ef_year = self._resolve_grid_ef(country_code, region_code, ef_override)
         
         # Calculate total generation
         total_generation = sum(item.get("energy_mwh", 0) for item in generation_data)
         
         # Prepare inputs for methodology with sensible defaults for all methodologies
-        inputs = {
-            "generation_mwh": total_generation,
-            "ef_grid": ef_grid,
-            "project_type": project_type,
-            # Add default capacity for methodologies that require it (ACM0002, Gold Standard)
-            "capacity_mw": additional_inputs.get("capacity_mw", 10) if additional_inputs else 10,
-            # Defaults for VERRA AM0123 captive use methodology
-            "captive_generation_mwh": additional_inputs.get("captive_generation_mwh", total_generation) if additional_inputs else total_generation,
-            "ef_baseline": additional_inputs.get("ef_baseline", ef_grid) if additional_inputs else ef_grid,
-            "baseline_type": additional_inputs.get("baseline_type", "grid") if additional_inputs else "grid",
-            # Defaults for CDM AMS-III.D biogas methodology
-            "biogas_captured_m3": additional_inputs.get("biogas_captured_m3", total_generation * 500) if additional_inputs else total_generation * 500,  # ~500 m3/MWh
-            "biogas_utilization": additional_inputs.get("biogas_utilization", "electricity") if additional_inputs else "electricity",
-            **(additional_inputs or {})
-        }
+        inputs = self._build_inputs(total_generation, ef_grid, project_type, additional_inputs)
         
         # Run methodology calculation
         result = self.methodology.compute_emission_reductions(inputs)
@@ -160,12 +180,421 @@ class CreditCalculator:
             ef_override=ef_override
         )
     
-    def _calculate_monthly_breakdown(
+    def calculate_uncertainty(
         self,
         generation_data: List[Dict[str, Any]],
-        ef_grid: float
-    ) -> List[Dict[str, Any]]:
-        """Calculate emission reductions by month."""
+        country_code: str,
+        project_type: str,
+        ef_override: Optional[float] = None,
+        region_code: Optional[str] = None,
+        additional_inputs: Optional[Dict[str, Any]] = None,
+        n_draws: int = 10_000,
+        uncertainty: Optional[Dict[str, float]] = None,
+        percentiles: Sequence[float] = (5, 50, 95),
+        seed: Optional[int] = None,
+        workers: int = 1,
+    ) -> Dict[str, Any]:
+        """
+        Monte Carlo confidence intervals for emission reductions.
+        
+        Every draw perturbs the calculation inputs and the whole set of draws
+        is evaluated month by month through the methodology's vectorized
+        batch calculation.
+        
+        Args:
+            generation_data: List of dicts with 'timestamp' and 'energy_mwh'
+            country_code: ISO country code for grid EF lookup
+            project_type: Type of renewable energy project
+            ef_override: Optional manual EF value (overrides database lookup)
+            region_code: Optional region code for sub-national grids
+            additional_inputs: Additional methodology-specific inputs
+            n_draws: Number of Monte Carlo draws (up to 100,000)
+            uncertainty: Relative 1-sigma uncertainty per numeric input, merged
+                over DEFAULT_UNCERTAINTY (e.g. {"ef_grid": 0.05})
+            percentiles: Percentiles to report (0-100)
+            seed: Optional seed for reproducible results
+            workers: Number of threads used to evaluate chunks of draws
+            
+        Returns:
+            Dictionary with total, monthly and per-vintage distributions
+        """
+        if not 1 <= n_draws <= MAX_UNCERTAINTY_DRAWS:
+            raise ValueError(f"n_draws must be between 1 and {MAX_UNCERTAINTY_DRAWS}")
+        if not percentiles or any(not 0 <= q <= 100 for q in percentiles):
+            raise ValueError("percentiles must be between 0 and 100")
+        
+        ef_grid, ef_source, ef_year = self._resolve_grid_ef(country_code, region_code, ef_override)
+        
+        months = self._monthly_generation(generation_data)
+        if not months:
+            raise ValueError("No generation data to simulate")
+        month_keys = [month for month, _ in months]
+        monthly_generation = np.array([gen for _, gen in months], dtype=float)
+        total_generation = float(monthly_generation.sum())
+        
+        inputs = self._build_inputs(total_generation, ef_grid, project_type, additional_inputs)
+        
+        sigmas = {**DEFAULT_UNCERTAINTY, **(uncertainty or {})}
+        negative = [name for name, sigma in sigmas.items() if sigma < 0]
+        if negative:
+            raise ValueError(f"Uncertainty must be non-negative: {', '.join(negative)}")
+        
+        schema = self.methodology.required_inputs_schema()
+        for name in (uncertainty or {}):
+            if name not in inputs and name not in schema:
+                raise ValueError(f"Unknown input for uncertainty: {name}")
+        
+        # Inputs that default from generation or the grid EF follow the sampled
+        # value unless the caller supplied them explicitly
+        supplied = set(additional_inputs or {})
+        linked = {name: link for name, link in LINKED_INPUTS.items() if name not in supplied}
+        
+        # Numeric inputs that vary by month or by draw become batch columns
+        base_values = {}
+        for name in ["generation_mwh", "ef_grid"] + list(inputs.keys()) + list(sigmas.keys()):
+            if name in base_values:
+                continue
+            if name not in ("generation_mwh", "ef_grid") and name not in schema:
+                continue
+            if name not in PERIOD_QUANTITY_INPUTS and name not in sigmas and name not in linked:
+                continue
+            value = inputs.get(name, schema.get(name, {}).get("default"))
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                base_values[name] = float(value)
+        
+        share = (
+            monthly_generation / total_generation if total_generation > 0
+            else np.full(len(months), 1.0 / len(months))
+        )
+        n_months = len(months)
+        
+        def simulate(rng: np.random.Generator, size: int) -> np.ndarray:
+            sampled = {}
+            for name, value in base_values.items():
+                if name == "generation_mwh":
+                    column = monthly_generation * self._sample_factors(
+                        rng, sigmas.get(name, 0.0), (size, n_months)
+                    )
+                else:
+                    if name in linked and linked[name][0] in sampled:
+                        source, ratio = linked[name]
+                        column = sampled[source] * ratio
+                    elif name in PERIOD_QUANTITY_INPUTS:
+                        column = value * share
+                    else:
+                        column = np.full(n_months, value)
+                    if sigmas.get(name):
+                        column = column * self._sample_factors(rng, sigmas[name], (size, 1))
+                    if name in FRACTION_INPUTS:
+                        column = np.clip(column, 1e-9, 1.0)
+                sampled[name] = np.broadcast_to(column, (size, n_months))
+            
+            batch_inputs = dict(inputs)
+            batch_inputs.update({name: column.ravel() for name, column in sampled.items()})
+            result = self.methodology.compute_emission_reductions_batch(batch_inputs)
+            return result.total_er_tco2e.reshape(size, n_months)
+        
+        # Draws are evaluated in fixed-size chunks with independent seeds, so
+        # results do not depend on the number of workers
+        sizes = [DRAWS_PER_CHUNK] * (n_draws // DRAWS_PER_CHUNK)
+        if n_draws % DRAWS_PER_CHUNK:
+            sizes.append(n_draws % DRAWS_PER_CHUNK)
+        rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(len(sizes))]
+        
+        if workers > 1 and len(sizes) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                chunks = list(executor.map(simulate, rngs, sizes))
+        else:
+            chunks = [simulate(rng, size) for rng, size in zip(rngs, sizes)]
+        
+        monthly_er = np.concatenate(chunks, axis=0)
+        
+        # Months are sorted, so each vintage is a contiguous block of columns
+        vintages = sorted({int(month[:4]) for month in month_keys})
+        starts = [next(i for i, m in enumerate(month_keys) if int(m[:4]) == year) for year in vintages]
+        annual_er = np.add.reduceat(monthly_er, starts, axis=1)
+        annual_generation = np.add.reduceat(monthly_generation, starts)
+        
+        monthly_stats = self._summarize_draws(monthly_er, percentiles)
+        annual_stats = self._summarize_draws(annual_er, percentiles)
+        total_stats = self._summarize_draws(monthly_er.sum(axis=1, keepdims=True), percentiles)[0]
+        
+        return {
+            "project_type": project_type,
+            "methodology_id": self.methodology.id,
+            "registry": self.methodology.registry,
+            "total_generation_mwh": round(total_generation, 4),
+            
+            # Grid EF info
+            "country_code": country_code,
+            "region_code": region_code,
+            "ef_value": ef_grid,
+            "ef_source": ef_source,
+            "ef_year": ef_year,
+            
+            # Simulation settings
+            "n_draws": n_draws,
+            "percentiles": list(percentiles),
+            "seed": seed,
+            "uncertainty": {name: sigmas[name] for name in base_values if sigmas.get(name)},
+            
+            # Distributions
+            "total": total_stats,
+            "monthly_breakdown": [
+                {"month": month, "generation_mwh": round(float(gen), 4), **stats}
+                for month, gen, stats in zip(month_keys, monthly_generation, monthly_stats)
+            ],
+            "annual_breakdown": [
+                {"vintage": year, "generation_mwh": round(float(gen), 4), **stats}
+                for year, gen, stats in zip(vintages, annual_generation, annual_stats)
+            ],
+            
+            "calculation_date": datetime.utcnow().isoformat(),
+        }
+    
+    def sensitivity_sweep(
+        self,
+        total_generation_mwh: float,
+        country_code: str,
+        project_type: str,
+        parameters: Dict[str, Sequence[float]],
+        ef_override: Optional[float] = None,
+        region_code: Optional[str] = None,
+        additional_inputs: Optional[Dict[str, Any]] = None,
+        include_grid: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Evaluate the methodology over a grid of input values in one batch.
+        
+        The batch holds the Cartesian product of all parameter grids plus a
+        one-at-a-time sweep of each parameter around the base inputs, which
+        drives the tornado table.
+        
+        Args:
+            total_generation_mwh: Total electricity generated (MWh)
+            country_code: ISO country code for grid EF lookup
+            project_type: Type of renewable energy project
+            parameters: Numeric input name -> values to evaluate
+                (e.g. {"capacity_mw": [5, 10, 20]})
+            ef_override: Optional manual EF value (overrides database lookup)
+            region_code: Optional region code for sub-national grids
+            additional_inputs: Base methodology-specific inputs
+            include_grid: Also return the result of every combination
+            
+        Returns:
+            Dictionary with the base result, tornado table and ER range
+        """
+        if not parameters:
+            raise ValueError("At least one parameter to sweep is required")
+        
+        ef_grid, ef_source, ef_year = self._resolve_grid_ef(country_code, region_code, ef_override)
+        inputs = self._build_inputs(total_generation_mwh, ef_grid, project_type, additional_inputs)
+        schema = self.methodology.required_inputs_schema()
+        
+        names = list(parameters.keys())
+        grids = {}
+        base_values = {}
+        for name in names:
+            spec = schema.get(name, {})
+            if name not in ("generation_mwh", "ef_grid") and spec.get("type") != "number":
+                raise ValueError(f"{name} is not a numeric input of {self.methodology.id}")
+            values = np.unique(np.asarray(parameters[name], dtype=float))
+            if values.size == 0:
+                raise ValueError(f"No values given for {name}")
+            grids[name] = values
+            # Parameters without a base value are held at their lowest grid value
+            base = inputs.get(name, spec.get("default"))
+            base_values[name] = float(base) if base is not None else float(values[0])
+        
+        combinations = int(np.prod([grid.size for grid in grids.values()]))
+        if combinations > MAX_SWEEP_COMBINATIONS:
+            raise ValueError(
+                f"Sweep has {combinations} combinations; the limit is {MAX_SWEEP_COMBINATIONS}"
+            )
+        
+        # Rows: [base] + one-at-a-time sweeps + full Cartesian product
+        mesh = np.meshgrid(*[grids[name] for name in names], indexing="ij")
+        columns = {}
+        for i, name in enumerate(names):
+            one_at_a_time = [
+                grids[name] if other == name else np.full(grids[other].size, base_values[name])
+                for other in names
+            ]
+            columns[name] = np.concatenate(
+                [[base_values[name]]] + one_at_a_time + [mesh[i].ravel()]
+            )
+        
+        batch_inputs = dict(inputs)
+        batch_inputs.update(columns)
+        # Inputs that default from a swept input follow it unless supplied explicitly
+        supplied = set(additional_inputs or {})
+        for name, (source, ratio) in LINKED_INPUTS.items():
+            if name not in supplied and name not in columns and source in columns:
+                batch_inputs[name] = columns[source] * ratio
+        
+        result = self.methodology.compute_emission_reductions_batch(batch_inputs)
+        er = result.total_er_tco2e
+        base_er = float(er[0])
+        
+        tornado = []
+        offset = 1
+        for name in names:
+            values = grids[name]
+            sweep_er = er[offset:offset + values.size]
+            offset += values.size
+            low, high = int(np.argmin(sweep_er)), int(np.argmax(sweep_er))
+            tornado.append({
+                "parameter": name,
+                "base_value": base_values[name],
+                "values": [float(v) for v in values],
+                "er_tco2e": [round(float(v), 4) for v in sweep_er],
+                "low_value": float(values[low]),
+                "low_er_tco2e": round(float(sweep_er[low]), 4),
+                "high_value": float(values[high]),
+                "high_er_tco2e": round(float(sweep_er[high]), 4),
+                "swing_tco2e": round(float(sweep_er[high] - sweep_er[low]), 4),
+            })
+        tornado.sort(key=lambda row: row["swing_tco2e"], reverse=True)
+        
+        grid_er = er[offset:]
+        
+        def grid_inputs(row: int) -> Dict[str, float]:
+            return {name: float(columns[name][offset + row]) for name in names}
+        
+        lowest, highest = int(np.argmin(grid_er)), int(np.argmax(grid_er))
+        
+        response = {
+            "project_type": project_type,
+            "methodology_id": self.methodology.id,
+            "registry": self.methodology.registry,
+            "total_generation_mwh": round(total_generation_mwh, 4),
+            
+            # Grid EF info
+            "country_code": country_code,
+            "region_code": region_code,
+            "ef_value": ef_grid,
+            "ef_source": ef_source,
+            "ef_year": ef_year,
+            
+            "base_er_tco2e": round(base_er, 4),
+            "combinations": combinations,
+            "tornado": tornado,
+            "min_er_tco2e": round(float(grid_er[lowest]), 4),
+            "min_inputs": grid_inputs(lowest),
+            "max_er_tco2e": round(float(grid_er[highest]), 4),
+            "max_inputs": grid_inputs(highest),
+        }
+        
+        if include_grid:
+            response["grid"] = [
+                {**grid_inputs(row), "total_er_tco2e": round(float(grid_er[row]), 4)}
+                for row in range(grid_er.size)
+            ]
+        
+        return response
+    
+    def calculate_projection(
+        self,
+        generation_mwh: np.ndarray,
+        ef_grid: Any,
+        project_type: str,
+        additional_inputs: Optional[Dict[str, Any]] = None
+    ) -> np.ndarray:
+        """
+        Emission reductions for an array of generation values in one batch.
+        
+        Used for ex-ante projections, where generation is a matrix of
+        projected monthly values (e.g. projects x months).
+        
+        Args:
+            generation_mwh: Generation per element (any shape)
+            ef_grid: Grid EF, scalar or broadcastable to generation_mwh
+            project_type: Type of renewable energy project
+            additional_inputs: Methodology inputs; numeric values may be arrays
+                broadcastable to generation_mwh and are applied per element
+                
+        Returns:
+            Emission reductions (tCO2e) with the shape of generation_mwh
+        """
+        generation = np.asarray(generation_mwh, dtype=float)
+        shape = generation.shape
+        
+        inputs = self._build_inputs(generation, ef_grid, project_type, additional_inputs)
+        # Scalar defaults such as capacity_mw may come back as Python numbers
+        for name, value in inputs.items():
+            if isinstance(value, (int, float, np.ndarray)) and not isinstance(value, bool):
+                inputs[name] = np.broadcast_to(np.asarray(value, dtype=float), shape).ravel()
+        
+        result = self.methodology.compute_emission_reductions_batch(inputs)
+        return result.total_er_tco2e.reshape(shape)
+    
+    def _resolve_grid_ef(
+        self,
+        country_code: str,
+        region_code: Optional[str],
+        ef_override: Optional[float]
+    ) -> Tuple[float, str, int]:
+        """Get the grid emission factor, its source and data year."""
+        if ef_override is not None:
+            return ef_override, "Manual override", datetime.now().year
+        
+        ef_data = get_grid_ef(country_code, region_code)
+        if not ef_data:
+            raise ValueError(f"No emission factor data for country: {country_code}")
+        return ef_data.combined_margin, ef_data.source_name, ef_data.data_year
+    
+    def _build_inputs(
+        self,
+        total_generation: float,
+        ef_grid: float,
+        project_type: str,
+        additional_inputs: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Prepare methodology inputs with sensible defaults for all methodologies."""
+        return {
+            "generation_mwh": total_generation,
+            "ef_grid": ef_grid,
+            "project_type": project_type,
+            # Add default capacity for methodologies that require it (ACM0002, Gold Standard)
+            "capacity_mw": additional_inputs.get("capacity_mw", 10) if additional_inputs else 10,
+            # Defaults for VERRA AM0123 captive use methodology
+            "captive_generation_mwh": additional_inputs.get("captive_generation_mwh", total_generation) if additional_inputs else total_generation,
+            "ef_baseline": additional_inputs.get("ef_baseline", ef_grid) if additional_inputs else ef_grid,
+            "baseline_type": additional_inputs.get("baseline_type", "grid") if additional_inputs else "grid",
+            # Defaults for CDM AMS-III.D biogas methodology
+            "biogas_captured_m3": additional_inputs.get("biogas_captured_m3", total_generation * 500) if additional_inputs else total_generation * 500,  # ~500 m3/MWh
+            "biogas_utilization": additional_inputs.get("biogas_utilization", "electricity") if additional_inputs else "electricity",
+            **(additional_inputs or {})
+        }
+    
+    @staticmethod
+    def _sample_factors(rng: np.random.Generator, sigma: float, shape: Tuple[int, ...]) -> np.ndarray:
+        """Draw non-negative multiplicative error factors (1 + N(0, sigma))."""
+        if not sigma:
+            return np.ones(shape)
+        return np.clip(1.0 + sigma * rng.standard_normal(shape), 0.0, None)
+    
+    @staticmethod
+    def _summarize_draws(draws: np.ndarray, percentiles: Sequence[float]) -> List[Dict[str, Any]]:
+        """Mean, standard deviation and percentiles for each column of a draws matrix."""
+        values = np.percentile(draws, list(percentiles), axis=0)
+        means = draws.mean(axis=0)
+        stds = draws.std(axis=0)
+        
+        return [
+            {
+                "mean_tco2e": round(float(means[i]), 4),
+                "std_tco2e": round(float(stds[i]), 4),
+                "percentiles_tco2e": {
+                    f"p{q:g}": round(float(values[j, i]), 4)
+                    for j, q in enumerate(percentiles)
+                },
+            }
+            for i in range(draws.shape[1])
+        ]
+    
+    def _monthly_generation(self, generation_data: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
+        """Total generation per month (YYYY-MM), sorted by month."""
         monthly = defaultdict(float)
         
         for item in generation_data:
@@ -180,13 +609,21 @@ class CreditCalculator:
             
             monthly[key] += item.get("energy_mwh", 0)
         
+        return sorted(monthly.items())
+    
+    def _calculate_monthly_breakdown(
+        self,
+        generation_data: List[Dict[str, Any]],
+        ef_grid: float
+    ) -> List[Dict[str, Any]]:
+        """Calculate emission reductions by month."""
         return [
             {
                 "month": month,
                 "generation_mwh": round(gen, 4),
                 "emission_reductions_tco2e": round(gen * ef_grid, 4)
             }
-            for month, gen in sorted(monthly.items())
+            for month, gen in self._monthly_generation(generation_data)
         ]
     
     def _calculate_annual_breakdown(
@@ -0,0 +1,326 @@
+"""
+Generation Forecasting Service
+Ex-ante generation and credit projections for PDDs
+"""
+import calendar
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+from collections import defaultdict
+
+import numpy as np
+from sqlalchemy import func, extract
+from sqlalchemy.orm import Session
+
+from backend.core.models import Project
+from ..models import GenerationTimeseries
+from ..grid_ef_database import get_grid_ef
+from .credit_calculator import CreditCalculator
+
+
+# ============ Project Type Defaults ============
+
+# Typical net capacity factors used when a project has no generation history
+DEFAULT_CAPACITY_FACTORS = {
+    "solar": 0.19,
+    "wind": 0.30,
+    "hydro": 0.45,
+    "geothermal": 0.85,
+    "biomass": 0.70,
+    "biogas": 0.80,
+    "tidal": 0.25,
+    "wave": 0.25,
+}
+FALLBACK_CAPACITY_FACTOR = 0.25
+
+# Relative monthly output (January..December, mean 1.0)
+DEFAULT_SEASONAL_SHAPES = {
+    "solar": [0.86, 0.95, 1.10, 1.14, 1.15, 1.02, 0.92, 0.93, 0.98, 1.00, 0.93, 0.84],
+    "wind": [0.95, 0.90, 0.85, 0.80, 1.05, 1.30, 1.35, 1.25, 1.00, 0.80, 0.85, 0.90],
+    "hydro": [0.70, 0.65, 0.65, 0.70, 0.85, 1.20, 1.50, 1.55, 1.35, 1.05, 0.95, 0.85],
+}
+
+# Annual output degradation (compound, fraction per year)
+DEFAULT_DEGRADATION_RATES = {
+    "solar": 0.005,
+    "wind": 0.002,
+}
+
+# wizard_data keys holding installed capacity (MW), in order of preference
+CAPACITY_KEYS = ("installedCapacityAC", "installedCapacity", "installedCapacityDC", "capacity_mw")
+
+# Calendar months of history required before a fitted profile is used
+MIN_HISTORY_MONTHS = 3
+
+MAX_FORECAST_YEARS = 30
+
+
+def _numeric(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class GenerationForecaster:
+    """
+    Service for projecting monthly generation and emission reductions.
+
+    Seasonal profiles are fitted from each project's GenerationTimeseries
+    (mean output per calendar month) or, without enough history, derived
+    from capacity and project-type defaults. Degradation is applied per
+    projection year and the resulting generation matrix is credited through
+    the methodology's vectorized calculation.
+
+    Usage:
+        forecaster = GenerationForecaster(db)
+        results = forecaster.forecast_portfolio(
+            projects=[{"project": project, "methodology_id": "CDM_AMS_ID",
+                       "country_code": "IN"}],
+            years=10,
+        )
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def fit_profiles(self, project_ids: List[int]) -> Dict[int, np.ndarray]:
+        """
+        Fit 12-month generation profiles (MWh per calendar month) from history.
+
+        All projects are rolled up in a single grouped query. Calendar months
+        without data are filled from the project type's seasonal shape, scaled
+        to the observed months.
+
+        Returns:
+            Project ID -> profile, for projects with enough history
+        """
+        if not project_ids:
+            return {}
+
+        year = extract("year", GenerationTimeseries.ts_utc)
+        month = extract("month", GenerationTimeseries.ts_utc)
+        rows = self.db.query(
+            GenerationTimeseries.project_id,
+            year,
+            month,
+            func.sum(GenerationTimeseries.energy_mwh),
+        ).filter(
+            GenerationTimeseries.project_id.in_(project_ids)
+        ).group_by(
+            GenerationTimeseries.project_id, year, month
+        ).all()
+
+        if not rows:
+            return {}
+
+        index = {project_id: i for i, project_id in enumerate(project_ids)}
+        project_idx = np.array([index[r[0]] for r in rows])
+        month_idx = np.array([int(r[2]) - 1 for r in rows])
+        totals = np.array([float(r[3] or 0) for r in rows])
+
+        sums = np.zeros((len(project_ids), 12))
+        counts = np.zeros((len(project_ids), 12))
+        np.add.at(sums, (project_idx, month_idx), totals)
+        np.add.at(counts, (project_idx, month_idx), 1)
+
+        project_types = dict(
+            self.db.query(Project.id, Project.project_type).filter(Project.id.in_(project_ids)).all()
+        )
+
+        profiles = {}
+        for project_id, i in index.items():
+            observed = counts[i] > 0
+            if observed.sum() < MIN_HISTORY_MONTHS:
+                continue
+
+            profile = np.divide(sums[i], counts[i], out=np.zeros(12), where=observed)
+            if not observed.all():
+                shape = self.seasonal_shape(project_types.get(project_id))
+                scale = profile[observed].sum() / shape[observed].sum()
+                profile = np.where(observed, profile, shape * scale)
+            profiles[project_id] = profile
+
+        return profiles
+
+    def default_profile(self, project_type: Optional[str], capacity_mw: float) -> np.ndarray:
+        """12-month generation profile (MWh) from capacity and project-type defaults."""
+        capacity_factor = DEFAULT_CAPACITY_FACTORS.get(
+            (project_type or "").lower(), FALLBACK_CAPACITY_FACTOR
+        )
+        hours = np.array([calendar.monthrange(2023, m)[1] * 24 for m in range(1, 13)], dtype=float)
+        return capacity_mw * capacity_factor * hours * self.seasonal_shape(project_type)
+
+    @staticmethod
+    def seasonal_shape(project_type: Optional[str]) -> np.ndarray:
+        """Relative monthly output for a project type (flat if unknown)."""
+        shape = np.array(
+            DEFAULT_SEASONAL_SHAPES.get((project_type or "").lower(), [1.0] * 12), dtype=float
+        )
+        return shape / shape.mean()
+
+    @staticmethod
+    def project_capacity_mw(project: Project) -> Optional[float]:
+        """Installed capacity from the project wizard, if entered."""
+        data = project.wizard_data if isinstance(project.wizard_data, dict) else {}
+        for key in CAPACITY_KEYS:
+            try:
+                value = float(data.get(key))
+            except (TypeError, ValueError):
+                continue
+            if value > 0:
+                return value
+        return None
+
+    def forecast_portfolio(
+        self,
+        projects: List[Dict[str, Any]],
+        years: int = 10,
+        start_year: Optional[int] = None,
+        start_month: int = 1,
+        include_monthly: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Project generation and emission reductions for a set of projects.
+
+        Args:
+            projects: Dicts with 'project' (Project), 'methodology_id' and
+                'country_code', and optionally 'region_code', 'ef_override',
+                'capacity_mw', 'degradation_rate' and 'additional_inputs'
+            years: Projection horizon in years
+            start_year: First projected year (default: next calendar year)
+            start_month: First projected month (1-12)
+            include_monthly: Include the monthly series in the results
+
+        Returns:
+            One forecast dictionary per project, in input order
+        """
+        if not 1 <= years <= MAX_FORECAST_YEARS:
+            raise ValueError(f"years must be between 1 and {MAX_FORECAST_YEARS}")
+        if not 1 <= start_month <= 12:
+            raise ValueError("start_month must be between 1 and 12")
+        if start_year is None:
+            start_year = datetime.utcnow().year + 1
+
+        n_months = years * 12
+        offsets = np.arange(n_months)
+        calendar_month = (start_month - 1 + offsets) % 12
+        projection_year = offsets // 12
+        month_keys = [
+            f"{start_year + (start_month - 1 + i) // 12}-{(start_month - 1 + i) % 12 + 1:02d}"
+            for i in range(n_months)
+        ]
+        vintages = sorted({int(key[:4]) for key in month_keys})
+        # Months are consecutive, so each vintage is a contiguous block of columns
+        vintage_starts = [0] + [
+            i for i in range(1, n_months) if month_keys[i][:4] != month_keys[i - 1][:4]
+        ]
+
+        fitted = self.fit_profiles([spec["project"].id for spec in projects])
+
+        # Build the generation matrix (projects x months)
+        generation = np.zeros((len(projects), n_months))
+        profile_sources = []
+        degradation_rates = []
+        for i, spec in enumerate(projects):
+            project = spec["project"]
+            if project.id in fitted:
+                profile = fitted[project.id]
+                profile_sources.append("historical")
+            else:
+                capacity = spec.get("capacity_mw") or self.project_capacity_mw(project)
+                if not capacity:
+                    raise ValueError(
+                        f"Project {project.id} has no generation history or installed capacity"
+                    )
+                profile = self.default_profile(project.project_type, capacity)
+                profile_sources.append("default")
+
+            rate = spec.get("degradation_rate")
+            if rate is None:
+                rate = DEFAULT_DEGRADATION_RATES.get((project.project_type or "").lower(), 0.0)
+            degradation_rates.append(rate)
+
+            generation[i] = profile[calendar_month] * (1.0 - rate) ** projection_year
+
+        # Credit each group of projects sharing a methodology, project type and
+        # inputs in one batch: numeric inputs are batched per project, others
+        # must be equal, so their values are part of the group key
+        emission_reductions = np.zeros_like(generation)
+        ef_cache = {}
+        groups = defaultdict(list)
+        for i, spec in enumerate(projects):
+            signature = tuple(sorted(
+                (name, None) if _numeric(value) else (name, repr(value))
+                for name, value in (spec.get("additional_inputs") or {}).items()
+            ))
+            groups[(spec["methodology_id"], spec["project"].project_type, signature)].append(i)
+
+        for (methodology_id, project_type, _), rows in groups.items():
+            calculator = CreditCalculator(methodology_id)
+            ef_values = []
+            for i in rows:
+                ef_override = projects[i].get("ef_override")
+                if ef_override is not None:
+                    ef_values.append(ef_override)
+                    continue
+                key = (projects[i]["country_code"], projects[i].get("region_code"))
+                if key not in ef_cache:
+                    ef_data = get_grid_ef(*key)
+                    if not ef_data:
+                        raise ValueError(f"No emission factor data for country: {key[0]}")
+                    ef_cache[key] = ef_data.combined_margin
+                ef_values.append(ef_cache[key])
+
+            capacities = [
+                projects[i].get("capacity_mw") or self.project_capacity_mw(projects[i]["project"]) or 10
+                for i in rows
+            ]
+            additional_inputs = {"capacity_mw": np.array(capacities, dtype=float)[:, None]}
+            shared = [projects[i].get("additional_inputs") or {} for i in rows]
+            for name, value in shared[0].items():
+                if _numeric(value):
+                    additional_inputs[name] = np.array([inputs[name] for inputs in shared], dtype=float)[:, None]
+                else:
+                    additional_inputs[name] = value
+
+            emission_reductions[rows] = calculator.calculate_projection(
+                generation[rows],
+                np.array(ef_values, dtype=float)[:, None],
+                project_type,
+                additional_inputs,
+            )
+
+        annual_generation = np.add.reduceat(generation, vintage_starts, axis=1)
+        annual_er = np.add.reduceat(emission_reductions, vintage_starts, axis=1)
+
+        results = []
+        for i, spec in enumerate(projects):
+            project = spec["project"]
+            result = {
+                "project_id": project.id,
+                "project_name": project.name,
+                "project_type": project.project_type,
+                "methodology_id": spec["methodology_id"],
+                "country_code": spec["country_code"],
+                "profile_source": profile_sources[i],
+                "degradation_rate": degradation_rates[i],
+                "total_generation_mwh": round(float(generation[i].sum()), 4),
+                "total_er_tco2e": round(float(emission_reductions[i].sum()), 4),
+                "annual_breakdown": [
+                    {
+                        "vintage": year,
+                        "generation_mwh": round(float(annual_generation[i, j]), 4),
+                        "emission_reductions_tco2e": round(float(annual_er[i, j]), 4),
+                    }
+                    for j, year in enumerate(vintages)
+                ],
+            }
+            if include_monthly:
+                result["monthly_breakdown"] = [
+                    {
+                        "month": key,
+                        "generation_mwh": round(float(generation[i, j]), 4),
+                        "emission_reductions_tco2e": round(float(emission_reductions[i, j]), 4),
+                    }
+                    for j, key in enumerate(month_keys)
+                ]
+            results.append(result)
+
+        return results
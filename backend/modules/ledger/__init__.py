@@ -0,0 +1,11 @@
+"""
+Ledger Module __init__.py
+"""
+from backend.modules.ledger.models import (
+    LedgerAccount,
+    LedgerEntry,
+    LedgerSnapshot,
+    SerialRange,
+    AccountKind,
+    EntryType
+)
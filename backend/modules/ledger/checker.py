@@ -0,0 +1,169 @@
+"""
+Credit Ledger Consistency Checker
+Verifies the ledger against itself, its snapshots and the CreditHolding counters
+"""
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.orm import Session, aliased
+from typing import Dict, List, Tuple
+
+from backend.core.models import CreditHolding
+from backend.modules.ledger.models import LedgerAccount, LedgerEntry, LedgerSnapshot, AccountKind
+from backend.modules.ledger.service import entry_movements
+
+# Findings listed per check; the counts are always complete
+MAX_REPORTED_ISSUES = 50
+
+
+class LedgerChecker:
+    """
+    Runs every check as a set-based aggregate in the database, so the cost
+    is a few sequential scans of ledger_entries whatever its size: no entry
+    is loaded into Python. Read-only.
+
+    Checks:
+        malformed_entries: non-positive quantity, an entry to its own
+            account, or legs in different projects/vintages
+        negative_balances: an owner bucket below zero, or a system account
+            above zero
+        snapshot_mismatches: a snapshot that differs from the sum of the
+            entries it claims to cover
+        holding_mismatches: ledger buckets that disagree with CreditHolding
+            available / locked / retired (quantity - available - locked)
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def verify(self, check_holdings: bool = True) -> Dict:
+        watermark = self.db.query(func.max(LedgerSnapshot.last_entry_id)).scalar() or 0
+        entry_count = self.db.query(func.count(LedgerEntry.id)).scalar() or 0
+
+        # One pass over the entries: current balances and balances at the watermark
+        movements = entry_movements()
+        rows = self.db.execute(
+            select(
+                movements.c.account_id,
+                func.sum(movements.c.delta),
+                func.sum(case((movements.c.entry_id <= watermark, movements.c.delta), else_=0)),
+            ).group_by(movements.c.account_id)
+        ).all()
+        balances = {r[0]: int(r[1]) for r in rows}
+        at_watermark = {r[0]: int(r[2]) for r in rows}
+
+        accounts = {
+            a.id: (a.owner_id, a.project_id, a.vintage, a.kind)
+            for a in self.db.query(
+                LedgerAccount.id, LedgerAccount.owner_id, LedgerAccount.project_id,
+                LedgerAccount.vintage, LedgerAccount.kind
+            )
+        }
+
+        checks = {
+            "malformed_entries": self._malformed_entries(),
+            "negative_balances": self._negative_balances(accounts, balances),
+            "snapshot_mismatches": self._snapshot_mismatches(at_watermark),
+        }
+        if check_holdings:
+            checks["holding_mismatches"] = self._holding_mismatches(accounts, balances)
+
+        return {
+            "ok": all(c["count"] == 0 for c in checks.values()),
+            "entries": entry_count,
+            "accounts": len(accounts),
+            "snapshot_entry_id": watermark,
+            "checks": checks,
+        }
+
+    # ===== Checks =====
+
+    def _malformed_entries(self) -> Dict:
+        debit = aliased(LedgerAccount)
+        credit = aliased(LedgerAccount)
+        query = self.db.query(LedgerEntry.id).join(
+            debit, debit.id == LedgerEntry.debit_account_id
+        ).join(
+            credit, credit.id == LedgerEntry.credit_account_id
+        ).filter(or_(
+            LedgerEntry.quantity <= 0,
+            LedgerEntry.debit_account_id == LedgerEntry.credit_account_id,
+            debit.project_id != credit.project_id,
+            debit.vintage != credit.vintage,
+        ))
+        return _finding(
+            query.count(),
+            [{"entry_id": r.id} for r in query.order_by(LedgerEntry.id).limit(MAX_REPORTED_ISSUES)]
+        )
+
+    def _negative_balances(self, accounts: Dict[int, Tuple], balances: Dict[int, int]) -> Dict:
+        issues = []
+        for account_id, balance in balances.items():
+            owner_id, project_id, vintage, kind = accounts[account_id]
+            if (balance > 0) if kind == AccountKind.ISSUED else (balance < 0):
+                issues.append({
+                    "account_id": account_id, "owner_id": owner_id, "project_id": project_id,
+                    "vintage": vintage, "kind": kind.value, "balance": balance,
+                })
+        return _finding(len(issues), issues[:MAX_REPORTED_ISSUES])
+
+    def _snapshot_mismatches(self, at_watermark: Dict[int, int]) -> Dict:
+        """Every account's latest snapshot against the entries up to that snapshot run"""
+        latest = select(
+            LedgerSnapshot.account_id,
+            func.max(LedgerSnapshot.last_entry_id).label("last_entry_id")
+        ).group_by(LedgerSnapshot.account_id).subquery()
+        snapshots = dict(self.db.query(LedgerSnapshot.account_id, LedgerSnapshot.balance).join(latest, and_(
+            LedgerSnapshot.account_id == latest.c.account_id,
+            LedgerSnapshot.last_entry_id == latest.c.last_entry_id
+        )).all())
+
+        # An account that moved before the last run must have a snapshot;
+        # one that did not keeps its older snapshot, which must still hold
+        issues = []
+        for account_id in sorted(set(snapshots) | {a for a, b in at_watermark.items() if b}):
+            expected = at_watermark.get(account_id, 0)
+            recorded = snapshots.get(account_id)
+            if recorded is None or int(recorded) != expected:
+                issues.append({"account_id": account_id, "snapshot": recorded, "entries": expected})
+        return _finding(len(issues), issues[:MAX_REPORTED_ISSUES])
+
+    def _holding_mismatches(self, accounts: Dict[int, Tuple], balances: Dict[int, int]) -> Dict:
+        ledger: Dict[Tuple[int, int, int], Dict[str, int]] = {}
+        for account_id, (owner_id, project_id, vintage, kind) in accounts.items():
+            if owner_id is None:
+                continue
+            buckets = ledger.setdefault((owner_id, project_id, vintage), _empty_buckets())
+            buckets[kind.value] += balances.get(account_id, 0)
+
+        holdings: Dict[Tuple[int, int, int], Dict[str, int]] = {}
+        for h in self.db.query(
+            CreditHolding.user_id, CreditHolding.project_id, CreditHolding.vintage,
+            func.sum(CreditHolding.available).label("available"),
+            func.sum(func.coalesce(CreditHolding.locked, 0)).label("locked"),
+            func.sum(CreditHolding.quantity).label("quantity"),
+        ).group_by(CreditHolding.user_id, CreditHolding.project_id, CreditHolding.vintage):
+            available, locked = int(h.available or 0), int(h.locked or 0)
+            holdings[(h.user_id, h.project_id, h.vintage)] = {
+                AccountKind.AVAILABLE.value: available,
+                AccountKind.LOCKED.value: locked,
+                AccountKind.RETIRED.value: max(int(h.quantity or 0) - available - locked, 0),
+            }
+
+        issues = []
+        for key in sorted(set(ledger) | set(holdings)):
+            expected = holdings.get(key, _empty_buckets())
+            recorded = ledger.get(key, _empty_buckets())
+            if expected != recorded:
+                owner_id, project_id, vintage = key
+                issues.append({
+                    "owner_id": owner_id, "project_id": project_id, "vintage": vintage,
+                    "holdings": expected, "ledger": recorded,
+                })
+        return _finding(len(issues), issues[:MAX_REPORTED_ISSUES])
+
+
+def _empty_buckets() -> Dict[str, int]:
+    return {AccountKind.AVAILABLE.value: 0, AccountKind.LOCKED.value: 0, AccountKind.RETIRED.value: 0}
+
+
+def _finding(count: int, items: List[Dict]) -> Dict:
+    return {"count": count, "items": items}
@@ -0,0 +1,121 @@
+"""
+Credit Ledger Models
+Double-entry, append-only record of every credit movement, with balance snapshots
+"""
+from sqlalchemy import (
+    Column, Integer, BigInteger, String, ForeignKey, DateTime,
+    Enum as SQLEnum, Index, func
+)
+from datetime import datetime
+from backend.core.database import Base
+import enum
+
+
+class AccountKind(str, enum.Enum):
+    ISSUED = "issued"  # System account per project/vintage; its balance is minus the credits issued
+    AVAILABLE = "available"
+    LOCKED = "locked"  # Held by listings and sell orders
+    RETIRED = "retired"
+
+
+class EntryType(str, enum.Enum):
+    OPENING = "opening"  # Balance carried over from CreditHolding when the ledger was introduced
+    ISSUE = "issue"
+    LOCK = "lock"
+    UNLOCK = "unlock"
+    TRANSFER = "transfer"
+    RETIRE = "retire"
+
+
+class LedgerAccount(Base):
+    """
+    One bucket of credits of a (project, vintage) for one owner.
+    System accounts (ISSUED) have no owner.
+    """
+    __tablename__ = "ledger_accounts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    vintage = Column(Integer, nullable=False)
+    kind = Column(SQLEnum(AccountKind), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_ledger_accounts_owner", "owner_id", "project_id", "vintage"),
+    )
+
+
+# One account per identity; coalesce so the ownerless system accounts are unique too
+Index(
+    "uq_ledger_accounts_identity",
+    LedgerAccount.project_id, LedgerAccount.vintage, LedgerAccount.kind,
+    func.coalesce(LedgerAccount.owner_id, 0),
+    unique=True
+)
+
+
+class LedgerEntry(Base):
+    """
+    A movement of credits from one account to another. Never updated or
+    deleted. Both legs live on one row, so every entry balances by
+    construction and an account's balance is credits in minus credits out.
+    """
+    __tablename__ = "ledger_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    entry_type = Column(SQLEnum(EntryType), nullable=False)
+    debit_account_id = Column(Integer, ForeignKey("ledger_accounts.id"), nullable=False)  # Credits leave
+    credit_account_id = Column(Integer, ForeignKey("ledger_accounts.id"), nullable=False)  # Credits arrive
+    quantity = Column(Integer, nullable=False)
+    reference = Column(String(100), nullable=True)  # e.g. listing:12, retirement:7
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        Index("ix_ledger_entries_debit", "debit_account_id", "id"),
+        Index("ix_ledger_entries_credit", "credit_account_id", "id"),
+    )
+
+
+class LedgerSnapshot(Base):
+    """
+    Balance of an account after every entry up to last_entry_id. Written
+    periodically for accounts that moved; reads add the entries after it.
+    """
+    __tablename__ = "ledger_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("ledger_accounts.id"), nullable=False)
+    last_entry_id = Column(Integer, nullable=False)
+    balance = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("uq_ledger_snapshots_account_entry", "account_id", "last_entry_id", unique=True),
+        Index("ix_ledger_snapshots_last_entry", "last_entry_id"),
+    )
+
+
+class SerialRange(Base):
+    """
+    A contiguous block of credit serial numbers [serial_start, serial_end]
+    within one (project, vintage) series, held by one owner in one state. Ranges of a series never overlap, so the range holding a
+    serial is the one with the greatest start at or below it.
+    """
+    __tablename__ = "serial_ranges"
+
+    id = Column(Integer, primary_key=True, index=True)
+    registry = Column(String(50), nullable=False)  # The project's registry at the series' first mint
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    vintage = Column(Integer, nullable=False)
+    serial_start = Column(BigInteger, nullable=False)
+    serial_end = Column(BigInteger, nullable=False)  # Inclusive
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    state = Column(SQLEnum(AccountKind), nullable=False)  # Mirrors the owner's ledger bucket
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # The interval index: point lookups and neighbour searches by start
+        Index("uq_serial_ranges_project_vintage_start", "project_id", "vintage", "serial_start", unique=True),
+        Index("ix_serial_ranges_owner", "owner_id", "project_id", "vintage", "state", "serial_start"),
+    )
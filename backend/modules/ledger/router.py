@@ -0,0 +1,106 @@
+"""
+Credit Ledger API Module
+Ledger balances for wallets and consistency checks for super admins
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import List, Optional
+
+from backend.core.database import get_db
+from backend.core.loaders import Loaders, get_loaders
+from backend.core.models import User
+from backend.modules.auth.dependencies import get_current_user
+from backend.modules.ledger.checker import LedgerChecker
+from backend.modules.ledger.serials import SerialAllocator, format_serial
+from backend.modules.ledger.service import LedgerService
+from backend.modules.superadmin.dependencies import get_current_superadmin
+
+router = APIRouter(prefix="/ledger", tags=["ledger"])
+
+# ============ Schemas ============
+
+class LedgerBalance(BaseModel):
+    project_id: int
+    vintage: int
+    available: int
+    locked: int
+    retired: int
+
+class SerialRangeResponse(BaseModel):
+    serial_start: int
+    serial_end: int
+    quantity: int
+    first_serial: str
+    last_serial: str
+    owner_id: int
+    owner_name: Optional[str]
+    state: str
+
+# ============ Endpoints ============
+
+@router.get("/balances", response_model=List[LedgerBalance])
+def get_balances(
+    project_id: Optional[int] = None,
+    vintage: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Current user's credits per project and vintage, read from the ledger"""
+    return LedgerService(db).balances(current_user.id, project_id=project_id, vintage=vintage)
+
+@router.get("/check")
+def check_ledger(
+    check_holdings: bool = True,
+    admin: User = Depends(get_current_superadmin),
+    db: Session = Depends(get_db)
+):
+    """Verify ledger entries, snapshots and (optionally) holdings agree (super admin only)"""
+    return LedgerChecker(db).verify(check_holdings=check_holdings)
+
+@router.get("/serials/lookup", response_model=SerialRangeResponse)
+def lookup_serial(
+    project_id: int,
+    vintage: int,
+    serial: int = Query(..., ge=1),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders)
+):
+    """Who holds a serial number, and in which state"""
+    found = SerialAllocator(db).owner_of(project_id, vintage, serial)
+    if not found:
+        raise HTTPException(status_code=404, detail="Serial number has not been issued")
+    return _serial_range_response(found, loaders)
+
+@router.get("/serials", response_model=List[SerialRangeResponse])
+def get_free_ranges(
+    project_id: int,
+    vintage: int,
+    mine: bool = False,
+    after: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=500),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders)
+):
+    """Available (unlocked, unretired) serial ranges in serial order; page with after=<last serial_start>"""
+    ranges = SerialAllocator(db).ranges(
+        project_id, vintage, owner_id=current_user.id if mine else None, after=after, limit=limit
+    )
+    loaders.users.load_many({r.owner_id for r in ranges})
+    return [_serial_range_response(r, loaders) for r in ranges]
+
+# ============ Helpers ============
+
+def _serial_range_response(r, loaders: Loaders) -> SerialRangeResponse:
+    return SerialRangeResponse(
+        serial_start=r.serial_start,
+        serial_end=r.serial_end,
+        quantity=r.serial_end - r.serial_start + 1,
+        first_serial=format_serial(r.registry, r.project_id, r.vintage, r.serial_start),
+        last_serial=format_serial(r.registry, r.project_id, r.vintage, r.serial_end),
+        owner_id=r.owner_id,
+        owner_name=loaders.user_name(r.owner_id),
+        state=r.state.value,
+    )
@@ -0,0 +1,320 @@
+"""
+Credit Serial Numbers
+Integer serial ranges per (project, vintage) series: minting, moves with
+split/merge, owner lookups and free-range listings
+"""
+import logging
+import re
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+
+from backend.core.models import Project
+from backend.modules.ledger.models import SerialRange, AccountKind
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY = "VCS"
+SERIAL_DIGITS = 9  # Display padding only; numbers beyond it are printed in full
+MOVE_BATCH = 100
+
+Interval = Tuple[int, int]  # (first serial, last serial), inclusive
+
+_SERIAL = re.compile(r"([A-Z0-9]+)-(\d+)-(\d+)-(\d+)")
+
+
+def registry_code(registry: str) -> str:
+    """Registry name as used in serial strings: Gold Standard -> GOLDSTANDARD"""
+    return re.sub(r"[^A-Za-z0-9]+", "", registry).upper() or DEFAULT_REGISTRY
+
+
+def format_serial(registry: str, project_id: int, vintage: int, number: int) -> str:
+    return f"{registry_code(registry)}-{project_id}-{vintage}-{number:0{SERIAL_DIGITS}d}"
+
+
+def parse_serial(serial: str) -> Tuple[str, int, int, int]:
+    """
+    Split a serial string into (registry code, project id, vintage, number)
+
+    Raises:
+        ValueError: If the string is not a serial
+    """
+    match = _SERIAL.fullmatch(serial.strip().upper())
+    if not match:
+        raise ValueError(f"Invalid serial number: {serial}")
+    code, project_id, vintage, number = match.groups()
+    return code, int(project_id), int(vintage), int(number)
+
+
+def parse_serial_range(text: str) -> List[Tuple[str, int, int, Interval]]:
+    """
+    The intervals in a describe() string, as (registry code, project id, vintage, interval)
+
+    Raises:
+        ValueError: If a part is not "<serial> to <serial>" within one series
+    """
+    parsed = []
+    for part in text.split(","):
+        first, _, last = part.partition(" to ")
+        code, project_id, vintage, start = parse_serial(first)
+        series_end = parse_serial(last or first)
+        if series_end[:3] != (code, project_id, vintage) or series_end[3] < start:
+            raise ValueError(f"Invalid serial range: {part.strip()}")
+        parsed.append((code, project_id, vintage, (start, series_end[3])))
+    return parsed
+
+
+def merge_intervals(intervals: List[Interval]) -> List[Interval]:
+    """Sort intervals and join the ones that touch"""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def split_intervals(intervals: List[Interval], quantities: List[int]) -> List[List[Interval]]:
+    """Cut intervals, in order, into consecutive pieces of the given sizes"""
+    pieces: List[List[Interval]] = []
+    queue = list(intervals)
+    for quantity in quantities:
+        piece: List[Interval] = []
+        while quantity > 0 and queue:
+            start, end = queue[0]
+            take = min(quantity, end - start + 1)
+            piece.append((start, start + take - 1))
+            quantity -= take
+            if start + take > end:
+                queue.pop(0)
+            else:
+                queue[0] = (start + take, end)
+        pieces.append(piece)
+    return pieces
+
+
+class SerialAllocator:
+    """
+    Tracks which owner holds which serial numbers, in which state.
+
+    Every ledger movement of a (project, vintage) moves the same quantity
+    of serials: the lowest-numbered ones of the source owner and state.
+    A partially moved range is split, and a range that ends up next to a
+    range with the same owner and state is merged into it, so the table
+    stays as small as ownership allows. Lookups and neighbour searches use
+    the unique (project, vintage, serial_start) B-tree, which keeps them
+    logarithmic however many ranges a series has.
+
+    The registry printed in a series' serials is the project's registry
+    when the series was first minted, stored on every range; changing the
+    project's registry later does not renumber or split existing series.
+    Nothing here commits.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._registries: Dict[Tuple[int, int], str] = {}
+
+    def registry(self, project_id: int, vintage: int) -> str:
+        """Registry of a serial series: frozen at its first mint, else the project's current one"""
+        key = (project_id, vintage)
+        if key not in self._registries:
+            registry = self._series(project_id, vintage).with_entities(SerialRange.registry).limit(1).scalar()
+            if registry is None:
+                registry = self.db.query(Project.registry).filter(Project.id == project_id).scalar()
+            self._registries[key] = registry or DEFAULT_REGISTRY
+        return self._registries[key]
+
+    def lock_project(self, project_id: int):
+        """
+        Lock the project row, serializing minting of all its series; held
+        until the transaction ends. Also taken before a series has any
+        range to lock, so concurrent first mints cannot collide.
+        """
+        self.db.query(Project.id).filter(Project.id == project_id).with_for_update().first()
+
+    def describe(self, project_id: int, vintage: int, intervals: List[Interval]) -> Optional[str]:
+        """Serial strings for intervals, e.g. for a retirement certificate"""
+        if not intervals:
+            return None
+        registry = self.registry(project_id, vintage)
+        return ", ".join(
+            f"{format_serial(registry, project_id, vintage, start)} to {format_serial(registry, project_id, vintage, end)}"
+            for start, end in merge_intervals(intervals)
+        )
+
+    # ===== Allocation =====
+
+    def issue(
+        self,
+        owner_id: int,
+        project_id: int,
+        vintage: int,
+        quantity: int,
+        state: AccountKind = AccountKind.AVAILABLE
+    ) -> List[Interval]:
+        """Mint the next quantity serials of the series for an owner"""
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+        self.lock_project(project_id)
+        registry = self.registry(project_id, vintage)
+
+        last = self._series(project_id, vintage).order_by(
+            SerialRange.serial_start.desc()
+        ).with_for_update().first()
+        start = last.serial_end + 1 if last else 1
+
+        block = SerialRange(
+            registry=registry,
+            project_id=project_id,
+            vintage=vintage,
+            serial_start=start,
+            serial_end=start + quantity - 1,
+            owner_id=owner_id,
+            state=state,
+        )
+        self.db.add(block)
+        self.db.flush()
+        self._merge(block)
+        return [(start, start + quantity - 1)]
+
+    def move(
+        self,
+        project_id: int,
+        vintage: int,
+        from_owner_id: int,
+        from_state: AccountKind,
+        to_owner_id: int,
+        to_state: AccountKind,
+        quantity: int
+    ) -> List[Interval]:
+        """
+        Move the lowest quantity serials of one owner/state to another.
+
+        Returns the intervals moved. Holdings that predate serial tracking
+        may have fewer serials than credits; the shortfall is logged and
+        left to reconciliation rather than blocking the trade.
+        """
+        source = self._series(project_id, vintage).filter(
+            SerialRange.owner_id == from_owner_id,
+            SerialRange.state == from_state
+        ).order_by(SerialRange.serial_start)
+
+        moved: List[SerialRange] = []
+        intervals: List[Interval] = []
+        remaining = quantity
+        while remaining > 0:
+            rows = source.limit(MOVE_BATCH).with_for_update().all()
+            if not rows:
+                break
+            for r in rows:
+                size = r.serial_end - r.serial_start + 1
+                if size > remaining:
+                    # Split: the head moves, the tail stays with the source
+                    self.db.add(SerialRange(
+                        registry=r.registry,
+                        project_id=project_id,
+                        vintage=vintage,
+                        serial_start=r.serial_start + remaining,
+                        serial_end=r.serial_end,
+                        owner_id=r.owner_id,
+                        state=r.state,
+                    ))
+                    r.serial_end = r.serial_start + remaining - 1
+                    size = remaining
+                r.owner_id = to_owner_id
+                r.state = to_state
+                moved.append(r)
+                intervals.append((r.serial_start, r.serial_end))
+                remaining -= size
+                if remaining == 0:
+                    break
+            self.db.flush()
+
+        if remaining > 0:
+            logger.warning(
+                f"Serial ranges short by {remaining} moving {quantity} credits of project "
+                f"{project_id}/{vintage} from user {from_owner_id} ({from_state.value})"
+            )
+
+        for r in moved:
+            self._merge(r)
+        return intervals
+
+    def _merge(self, block: SerialRange):
+        """Join a range with its neighbours when they share owner and state"""
+        series = self._series(block.project_id, block.vintage)
+
+        left = series.filter(
+            SerialRange.serial_start < block.serial_start
+        ).order_by(SerialRange.serial_start.desc()).with_for_update().first()
+        if left and self._joins(left, block):
+            left.serial_end = block.serial_end
+            self.db.delete(block)
+            self.db.flush()
+            block = left
+
+        right = series.filter(
+            SerialRange.serial_start == block.serial_end + 1
+        ).with_for_update().first()
+        if right and self._joins(block, right):
+            block.serial_end = right.serial_end
+            self.db.delete(right)
+            self.db.flush()
+
+    @staticmethod
+    def _joins(left: SerialRange, right: SerialRange) -> bool:
+        return (
+            left.serial_end + 1 == right.serial_start
+            and left.owner_id == right.owner_id
+            and left.state == right.state
+        )
+
+    # ===== Lookups =====
+
+    def owner_of(self, project_id: int, vintage: int, serial: int) -> Optional[SerialRange]:
+        """The range holding a serial number: one descending index probe"""
+        candidate = self._series(project_id, vintage).filter(
+            SerialRange.serial_start <= serial
+        ).order_by(SerialRange.serial_start.desc()).first()
+        if candidate and candidate.serial_end >= serial:
+            return candidate
+        return None
+
+    def ranges(
+        self,
+        project_id: int,
+        vintage: int,
+        owner_id: Optional[int] = None,
+        state: Optional[AccountKind] = AccountKind.AVAILABLE,
+        after: Optional[int] = None,
+        limit: int = 100
+    ) -> List[SerialRange]:
+        """Ranges in serial order, by default the free (available) ones; page with after"""
+        query = self._series(project_id, vintage)
+        if owner_id is not None:
+            query = query.filter(SerialRange.owner_id == owner_id)
+        if state is not None:
+            query = query.filter(SerialRange.state == state)
+        if after is not None:
+            query = query.filter(SerialRange.serial_start > after)
+        return query.order_by(SerialRange.serial_start).limit(limit).all()
+
+    def totals(self, owner_ids: List[int]) -> Dict[Tuple[int, int, int, AccountKind], int]:
+        """Serials held per (owner, project, vintage, state)"""
+        if not owner_ids:
+            return {}
+        rows = self.db.query(
+            SerialRange.owner_id, SerialRange.project_id, SerialRange.vintage, SerialRange.state,
+            func.sum(SerialRange.serial_end - SerialRange.serial_start + 1)
+        ).filter(SerialRange.owner_id.in_(owner_ids)).group_by(
+            SerialRange.owner_id, SerialRange.project_id, SerialRange.vintage, SerialRange.state
+        ).all()
+        return {(o, p, v, s): int(n) for o, p, v, s, n in rows}
+
+    def _series(self, project_id: int, vintage: int):
+        return self.db.query(SerialRange).filter(
+            SerialRange.project_id == project_id,
+            SerialRange.vintage == vintage
+        )
@@ -0,0 +1,525 @@
+"""
+Credit Ledger Service
+Append-only postings, snapshot-plus-delta balances and periodic snapshots
+"""
+from sqlalchemy import and_, func, insert, or_, select, text, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+from backend.core.database import SessionLocal
+from backend.core.models import CreditHolding
+from backend.core.tasks import register_task, scheduler
+from backend.modules.ledger.models import (
+    LedgerAccount, LedgerEntry, LedgerSnapshot, AccountKind, EntryType
+)
+from backend.modules.ledger.serials import Interval, SerialAllocator, split_intervals
+
+SNAPSHOT_TASK = "ledger.snapshot"
+OPEN_BALANCES_TASK = "ledger.open_balances"
+SNAPSHOT_INTERVAL_SECONDS = 3600
+# Without the Postgres fence, entries younger than this may still belong to
+# uncommitted transactions with lower ids, so snapshots stop short of them
+SNAPSHOT_LAG_SECONDS = 60
+# Advisory lock every Postgres transaction that posts entries holds shared,
+# and a snapshot takes exclusively to wait them out
+LEDGER_FENCE_LOCK = 0x4C454447
+
+# (owner_id, project_id, vintage, kind); owner_id is None for system accounts
+AccountKey = Tuple[Optional[int], int, int, AccountKind]
+
+_entries = LedgerEntry.__table__
+_snapshots = LedgerSnapshot.__table__
+
+
+def entry_movements(*conditions):
+    """
+    Entries matching the conditions as two signed legs (account_id,
+    entry_id, delta): +quantity on the credited account and -quantity on
+    the debited one
+    """
+    return union_all(
+        select(
+            _entries.c.credit_account_id.label("account_id"),
+            _entries.c.id.label("entry_id"),
+            _entries.c.quantity.label("delta"),
+        ).where(*conditions),
+        select(
+            _entries.c.debit_account_id.label("account_id"),
+            _entries.c.id.label("entry_id"),
+            (-_entries.c.quantity).label("delta"),
+        ).where(*conditions),
+    ).subquery("movements")
+
+
+class LedgerService:
+    """
+    Records credit movements as append-only entries between accounts.
+
+    Postings only ever INSERT, so concurrent trades never contend on a
+    balance row; the only shared write is creating an account the first
+    time it is used. Balances are the latest snapshot plus the entries
+    after it. Postings do not commit: they belong to the caller's
+    transaction, alongside the CreditHolding counters they mirror.
+
+    Every posting also moves the matching serial ranges between owners and
+    states (see SerialAllocator) and returns the serial intervals it moved.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.serials = SerialAllocator(db)
+        self._accounts: Dict[AccountKey, int] = {}
+
+    # ===== Postings =====
+
+    def issue(
+        self, owner_id: int, project_id: int, vintage: int, quantity: int, reference: Optional[str] = None
+    ) -> List[Interval]:
+        return self.post(
+            EntryType.ISSUE,
+            (None, project_id, vintage, AccountKind.ISSUED),
+            (owner_id, project_id, vintage, AccountKind.AVAILABLE),
+            quantity, reference
+        )
+
+    def lock(
+        self, owner_id: int, project_id: int, vintage: int, quantity: int, reference: Optional[str] = None
+    ) -> List[Interval]:
+        return self.post(
+            EntryType.LOCK,
+            (owner_id, project_id, vintage, AccountKind.AVAILABLE),
+            (owner_id, project_id, vintage, AccountKind.LOCKED),
+            quantity, reference
+        )
+
+    def unlock(
+        self, owner_id: int, project_id: int, vintage: int, quantity: int, reference: Optional[str] = None
+    ) -> List[Interval]:
+        return self.post(
+            EntryType.UNLOCK,
+            (owner_id, project_id, vintage, AccountKind.LOCKED),
+            (owner_id, project_id, vintage, AccountKind.AVAILABLE),
+            quantity, reference
+        )
+
+    def transfer(
+        self,
+        from_owner_id: int,
+        to_owner_id: int,
+        project_id: int,
+        vintage: int,
+        quantity: int,
+        reference: Optional[str] = None,
+        from_locked: bool = True
+    ) -> List[Interval]:
+        """Move credits to another owner; trades settle from the seller's locked credits"""
+        return self.post(
+            EntryType.TRANSFER,
+            (from_owner_id, project_id, vintage, AccountKind.LOCKED if from_locked else AccountKind.AVAILABLE),
+            (to_owner_id, project_id, vintage, AccountKind.AVAILABLE),
+            quantity, reference
+        )
+
+    def retire(
+        self, owner_id: int, project_id: int, vintage: int, quantity: int, reference: Optional[str] = None
+    ) -> List[Interval]:
+        return self.post(
+            EntryType.RETIRE,
+            (owner_id, project_id, vintage, AccountKind.AVAILABLE),
+            (owner_id, project_id, vintage, AccountKind.RETIRED),
+            quantity, reference
+        )
+
+    def post(
+        self,
+        entry_type: EntryType,
+        debit: AccountKey,
+        credit: AccountKey,
+        quantity: int,
+        reference: Optional[str] = None
+    ) -> List[Interval]:
+        """Append one entry moving quantity from the debit to the credit account"""
+        if quantity <= 0:
+            raise ValueError("Ledger quantity must be positive")
+        self._fence()
+        self.db.add(LedgerEntry(
+            entry_type=entry_type,
+            debit_account_id=self.account_id(debit),
+            credit_account_id=self.account_id(credit),
+            quantity=quantity,
+            reference=reference,
+        ))
+        return self._move_serials(entry_type, debit, credit, quantity)
+
+    def post_many(
+        self,
+        entries: Iterable[Tuple[EntryType, AccountKey, AccountKey, int, Optional[str]]]
+    ) -> List[List[Interval]]:
+        """
+        Append many entries with one multi-row INSERT, for bulk jobs.
+
+        Entries between the same two accounts share one serial move, cut
+        into consecutive intervals per entry. Returns the intervals of each
+        entry, in input order ([] for entries skipped as empty).
+        """
+        entries = list(entries)
+        moved: List[List[Interval]] = [[] for _ in entries]
+        posted = [i for i, e in enumerate(entries) if e[3] > 0]
+        if not posted:
+            return moved
+        self.account_ids(key for i in posted for key in (entries[i][1], entries[i][2]))
+        self._fence()
+        now = datetime.utcnow()
+        self.db.execute(insert(_entries), [
+            {
+                "entry_type": entries[i][0],
+                "debit_account_id": self._accounts[entries[i][1]],
+                "credit_account_id": self._accounts[entries[i][2]],
+                "quantity": entries[i][3],
+                "reference": entries[i][4],
+                "created_at": now,
+            }
+            for i in posted
+        ])
+
+        groups: Dict[Tuple, List[int]] = {}
+        for i in posted:
+            groups.setdefault(entries[i][:3], []).append(i)
+        for (entry_type, debit, credit), indexes in groups.items():
+            quantities = [entries[i][3] for i in indexes]
+            intervals = self._move_serials(entry_type, debit, credit, sum(quantities))
+            for i, piece in zip(indexes, split_intervals(intervals, quantities)):
+                moved[i] = piece
+        return moved
+
+    def _fence(self):
+        """
+        On Postgres, hold LEDGER_FENCE_LOCK shared until this transaction
+        ends, so snapshot() can tell when every entry below an id committed
+        """
+        if self.db.get_bind().dialect.name != "postgresql":
+            return
+        transaction = self.db.get_transaction()
+        if transaction is None or self.db.info.get("ledger_fence") is not transaction:
+            self.db.execute(text("SELECT pg_advisory_xact_lock_shared(:key)"), {"key": LEDGER_FENCE_LOCK})
+            self.db.info["ledger_fence"] = self.db.get_transaction()
+
+    def _move_serials(self, entry_type: EntryType, debit: AccountKey, credit: AccountKey, quantity: int) -> List[Interval]:
+        """Serials follow the credits; opening entries carry no serials of their own"""
+        if entry_type == EntryType.OPENING:
+            return []
+        owner_id, project_id, vintage, kind = credit
+        if debit[3] == AccountKind.ISSUED:
+            return self.serials.issue(owner_id, project_id, vintage, quantity, state=kind)
+        return self.serials.move(project_id, vintage, debit[0], debit[3], owner_id, kind, quantity)
+
+    # ===== Accounts =====
+
+    def account_id(self, key: AccountKey) -> int:
+        """Id of an account, creating it on first use"""
+        if key not in self._accounts:
+            self.account_ids([key])
+        return self._accounts[key]
+
+    def account_ids(self, keys: Iterable[AccountKey]) -> Dict[AccountKey, int]:
+        """Resolve many accounts with one lookup, creating the missing ones"""
+        keys = set(keys)
+        missing = keys - self._accounts.keys()
+        if missing:
+            owners = {k[0] for k in missing}
+            owner_match = LedgerAccount.owner_id.in_(owners - {None})
+            if None in owners:
+                owner_match = or_(owner_match, LedgerAccount.owner_id.is_(None))
+            for account in self.db.query(LedgerAccount).filter(
+                owner_match,
+                LedgerAccount.project_id.in_({k[1] for k in missing}),
+                LedgerAccount.vintage.in_({k[2] for k in missing}),
+            ):
+                key = (account.owner_id, account.project_id, account.vintage, account.kind)
+                self._accounts.setdefault(key, account.id)
+
+            for key in sorted(missing - self._accounts.keys(), key=lambda k: (k[0] or 0, k[1], k[2], k[3].value)):
+                self._accounts[key] = self._create_account(key)
+
+        return {key: self._accounts[key] for key in keys}
+
+    def _create_account(self, key: AccountKey) -> int:
+        owner_id, project_id, vintage, kind = key
+        account = LedgerAccount(owner_id=owner_id, project_id=project_id, vintage=vintage, kind=kind)
+        # Flush pending work first so a failed savepoint only discards the account
+        self.db.flush()
+        try:
+            with self.db.begin_nested():
+                self.db.add(account)
+                self.db.flush()
+            return account.id
+        except IntegrityError:
+            # Created concurrently by another transaction
+            return self.db.query(LedgerAccount.id).filter(
+                LedgerAccount.owner_id.is_(None) if owner_id is None else LedgerAccount.owner_id == owner_id,
+                LedgerAccount.project_id == project_id,
+                LedgerAccount.vintage == vintage,
+                LedgerAccount.kind == kind
+            ).scalar()
+
+    # ===== Balances =====
+
+    def balances(
+        self,
+        owner_id: int,
+        project_id: Optional[int] = None,
+        vintage: Optional[int] = None
+    ) -> List[Dict]:
+        """An owner's credits per project and vintage, by bucket"""
+        query = self.db.query(LedgerAccount).filter(LedgerAccount.owner_id == owner_id)
+        if project_id is not None:
+            query = query.filter(LedgerAccount.project_id == project_id)
+        if vintage is not None:
+            query = query.filter(LedgerAccount.vintage == vintage)
+        accounts = query.all()
+
+        current = self.account_balances([a.id for a in accounts])
+
+        result: Dict[Tuple[int, int], Dict] = {}
+        for a in accounts:
+            row = result.setdefault((a.project_id, a.vintage), {
+                "project_id": a.project_id,
+                "vintage": a.vintage,
+                AccountKind.AVAILABLE.value: 0,
+                AccountKind.LOCKED.value: 0,
+                AccountKind.RETIRED.value: 0,
+            })
+            row[a.kind.value] = current.get(a.id, 0)
+
+        return [result[key] for key in sorted(result)]
+
+    def account_balances(self, account_ids: List[int]) -> Dict[int, int]:
+        """Current balances: each account's latest snapshot plus the entries after it"""
+        if not account_ids:
+            return {}
+
+        latest = select(
+            LedgerSnapshot.account_id,
+            func.max(LedgerSnapshot.last_entry_id).label("last_entry_id")
+        ).where(LedgerSnapshot.account_id.in_(account_ids)).group_by(LedgerSnapshot.account_id).subquery()
+
+        marks = select(
+            LedgerAccount.id.label("account_id"),
+            func.coalesce(latest.c.last_entry_id, 0).label("last_entry_id"),
+            func.coalesce(LedgerSnapshot.balance, 0).label("balance"),
+        ).outerjoin(
+            latest, latest.c.account_id == LedgerAccount.id
+        ).outerjoin(LedgerSnapshot, and_(
+            LedgerSnapshot.account_id == latest.c.account_id,
+            LedgerSnapshot.last_entry_id == latest.c.last_entry_id
+        )).where(LedgerAccount.id.in_(account_ids)).cte("marks")
+
+        # Both legs are range scans on (account, id) from the account's own snapshot
+        legs = union_all(
+            select(marks.c.account_id, _entries.c.quantity.label("delta")).join(_entries, and_(
+                _entries.c.credit_account_id == marks.c.account_id,
+                _entries.c.id > marks.c.last_entry_id
+            )),
+            select(marks.c.account_id, (-_entries.c.quantity).label("delta")).join(_entries, and_(
+                _entries.c.debit_account_id == marks.c.account_id,
+                _entries.c.id > marks.c.last_entry_id
+            )),
+        ).subquery("legs")
+
+        deltas = select(legs.c.account_id, func.sum(legs.c.delta).label("delta")).group_by(
+            legs.c.account_id
+        ).subquery("deltas")
+
+        rows = self.db.execute(
+            select(marks.c.account_id, marks.c.balance + func.coalesce(deltas.c.delta, 0))
+            .outerjoin(deltas, deltas.c.account_id == marks.c.account_id)
+        ).all()
+        return {account_id: int(balance) for account_id, balance in rows}
+
+    # ===== Snapshots =====
+
+    def snapshot(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Snapshot every account that moved since the previous snapshot run.
+        Commits.
+
+        A snapshot claims every entry up to its last_entry_id, so it must
+        not stop above an entry that commits later. On Postgres the
+        snapshot waits on the ledger fence until the transactions posting
+        entries have finished, and reads the highest id while holding it:
+        every entry below it has committed, and new ones get higher ids.
+        Elsewhere it stops SNAPSHOT_LAG_SECONDS short of the newest entry
+        and recomputes each moved account from all its entries, so an entry
+        committed late is included in the account's next snapshot.
+        """
+        now = now or datetime.utcnow()
+        fenced = self.db.get_bind().dialect.name == "postgresql"
+        previous = self.db.query(func.max(LedgerSnapshot.last_entry_id)).scalar() or 0
+        if fenced:
+            self.db.commit()
+            self.db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": LEDGER_FENCE_LOCK})
+            high = self.db.query(func.max(LedgerEntry.id)).filter(LedgerEntry.id > previous).scalar()
+            # Releases the fence; the sums below only read entries up to high
+            self.db.commit()
+        else:
+            high = self.db.query(func.max(LedgerEntry.id)).filter(
+                LedgerEntry.id > previous,
+                LedgerEntry.created_at <= now - timedelta(seconds=SNAPSHOT_LAG_SECONDS)
+            ).scalar()
+        if not high:
+            return {"accounts": 0, "last_entry_id": previous}
+
+        movements = entry_movements(_entries.c.id > previous, _entries.c.id <= high)
+        if fenced:
+            deltas = dict(self.db.execute(
+                select(movements.c.account_id, func.sum(movements.c.delta)).group_by(movements.c.account_id)
+            ).all())
+
+            # Previous balances of the accounts that moved
+            latest = select(
+                LedgerSnapshot.account_id,
+                func.max(LedgerSnapshot.last_entry_id).label("last_entry_id")
+            ).where(LedgerSnapshot.account_id.in_(select(movements.c.account_id))).group_by(
+                LedgerSnapshot.account_id
+            ).subquery()
+            balances = dict(self.db.query(LedgerSnapshot.account_id, LedgerSnapshot.balance).join(latest, and_(
+                LedgerSnapshot.account_id == latest.c.account_id,
+                LedgerSnapshot.last_entry_id == latest.c.last_entry_id
+            )).all())
+            balances = {account_id: balances.get(account_id, 0) + int(delta) for account_id, delta in deltas.items()}
+        else:
+            totals = entry_movements(_entries.c.id <= high)
+            balances = {account_id: int(balance) for account_id, balance in self.db.execute(
+                select(totals.c.account_id, func.sum(totals.c.delta)).where(
+                    totals.c.account_id.in_(select(movements.c.account_id))
+                ).group_by(totals.c.account_id)
+            ).all()}
+
+        try:
+            self.db.execute(insert(_snapshots), [
+                {
+                    "account_id": account_id,
+                    "last_entry_id": high,
+                    "balance": balance,
+                    "created_at": now,
+                }
+                for account_id, balance in sorted(balances.items())
+            ])
+            self.db.commit()
+        except IntegrityError:
+            # Another instance took the same snapshot
+            self.db.rollback()
+            return {"accounts": 0, "last_entry_id": previous}
+
+        return {"accounts": len(balances), "last_entry_id": high}
+
+    # ===== Opening balances =====
+
+    def open_balances(self) -> Dict[str, int]:
+        """
+        Carry CreditHolding balances that predate the ledger into it, as
+        OPENING entries against the system account. Only owner/project/
+        vintage groups without an opening entry are touched, so running it
+        again is harmless. Credits without serial ranges get them minted.
+        Commits.
+        """
+        holdings = self.db.query(
+            CreditHolding.user_id,
+            CreditHolding.project_id,
+            CreditHolding.vintage,
+            func.sum(CreditHolding.available).label("available"),
+            func.sum(func.coalesce(CreditHolding.locked, 0)).label("locked"),
+            func.sum(CreditHolding.quantity).label("quantity"),
+        ).group_by(CreditHolding.user_id, CreditHolding.project_id, CreditHolding.vintage).all()
+
+        opened = {
+            (row.owner_id, row.project_id, row.vintage)
+            for row in self.db.query(
+                LedgerAccount.owner_id, LedgerAccount.project_id, LedgerAccount.vintage
+            ).join(LedgerEntry, or_(
+                LedgerEntry.credit_account_id == LedgerAccount.id,
+                LedgerEntry.debit_account_id == LedgerAccount.id
+            )).filter(
+                LedgerEntry.entry_type == EntryType.OPENING,
+                LedgerAccount.owner_id.isnot(None)
+            ).distinct()
+        }
+
+        pending = [h for h in holdings if (h.user_id, h.project_id, h.vintage) not in opened]
+        owned = self._owner_balances({(h.user_id, h.project_id, h.vintage) for h in pending})
+
+        entries = []
+        for h in pending:
+            target = {
+                AccountKind.AVAILABLE: int(h.available or 0),
+                AccountKind.LOCKED: int(h.locked or 0),
+                # Credits retired but still counted in the holding's quantity
+                AccountKind.RETIRED: max(int(h.quantity or 0) - int(h.available or 0) - int(h.locked or 0), 0),
+            }
+            system = (None, h.project_id, h.vintage, AccountKind.ISSUED)
+            for kind, amount in target.items():
+                account = (h.user_id, h.project_id, h.vintage, kind)
+                # Anything the ledger already recorded for the group is kept
+                difference = amount - owned.get(account, 0)
+                if difference > 0:
+                    entries.append((EntryType.OPENING, system, account, difference, "opening"))
+                elif difference < 0:
+                    entries.append((EntryType.OPENING, account, system, -difference, "opening"))
+
+        self.post_many(entries)
+        minted = self._open_serials(holdings)
+        self.db.commit()
+        return {"groups": len(pending), "entries": len(entries), "serials": minted}
+
+    def _open_serials(self, holdings) -> int:
+        """Mint serial ranges for credits held without any, in each holding's buckets"""
+        held = self.serials.totals(list({h.user_id for h in holdings}))
+        minted = 0
+        for h in sorted(holdings, key=lambda h: (h.project_id, h.vintage, h.user_id)):
+            available, locked = int(h.available or 0), int(h.locked or 0)
+            for kind, amount in (
+                (AccountKind.AVAILABLE, available),
+                (AccountKind.LOCKED, locked),
+                (AccountKind.RETIRED, max(int(h.quantity or 0) - available - locked, 0)),
+            ):
+                missing = amount - held.get((h.user_id, h.project_id, h.vintage, kind), 0)
+                if missing > 0:
+                    self.serials.issue(h.user_id, h.project_id, h.vintage, missing, state=kind)
+                    minted += missing
+        return minted
+
+    def _owner_balances(self, groups: set) -> Dict[AccountKey, int]:
+        if not groups:
+            return {}
+        accounts = self.db.query(LedgerAccount).filter(
+            LedgerAccount.owner_id.in_({g[0] for g in groups}),
+            LedgerAccount.project_id.in_({g[1] for g in groups}),
+        ).all()
+        accounts = [a for a in accounts if (a.owner_id, a.project_id, a.vintage) in groups]
+        current = self.account_balances([a.id for a in accounts])
+        return {(a.owner_id, a.project_id, a.vintage, a.kind): current.get(a.id, 0) for a in accounts}
+
+
+@register_task(SNAPSHOT_TASK)
+def snapshot_ledger(payload: Dict) -> Dict[str, int]:
+    """Task handler: snapshot accounts that moved since the last run"""
+    db = SessionLocal()
+    try:
+        return LedgerService(db).snapshot()
+    finally:
+        db.close()
+
+
+@register_task(OPEN_BALANCES_TASK)
+def open_ledger_balances(payload: Dict) -> Dict[str, int]:
+    """Task handler: carry pre-ledger holdings into the ledger (run once after deploying it)"""
+    db = SessionLocal()
+    try:
+        return LedgerService(db).open_balances()
+    finally:
+        db.close()
+
+
+scheduler.every(SNAPSHOT_INTERVAL_SECONDS, SNAPSHOT_TASK)
@@ -0,0 +1,234 @@
+"""
+Marketplace Basket Orders
+Buy a quantity across the cheapest matching listings in one transaction
+"""
+from dataclasses import dataclass, field
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+
+from backend.core.models import Project, CreditHolding, MarketListing, ListingStatus
+from backend.modules.ledger.models import AccountKind
+from backend.modules.marketplace.history import DEFAULT_REGISTRY
+from backend.modules.marketplace.models import TradeSource
+from backend.modules.marketplace.search import ListingSearchService
+from backend.modules.marketplace.service import OrderBookService
+
+# Listings read per round trip while filling a basket
+BASKET_SCAN_BATCH = 200
+# Upper bound on listings a single basket may draw from
+MAX_BASKET_LISTINGS = 1000
+
+
+@dataclass
+class BasketCriteria:
+    """Which listings a basket may buy from"""
+    q: Optional[str] = None
+    project_type: Optional[str] = None
+    registry: Optional[str] = None
+    vintage_min: Optional[int] = None
+    vintage_max: Optional[int] = None
+    max_price_cents: Optional[int] = None
+
+
+@dataclass
+class BasketFill:
+    listing_id: int
+    project_id: int
+    project_name: Optional[str]
+    vintage: int
+    seller_id: int
+    quantity: int
+    price_cents: int
+
+
+@dataclass
+class BasketResult:
+    requested: int
+    fills: List[BasketFill] = field(default_factory=list)
+    listings: List[MarketListing] = field(default_factory=list)  # Listings changed by the fills
+
+    @property
+    def filled(self) -> int:
+        return sum(f.quantity for f in self.fills)
+
+    @property
+    def total_cents(self) -> int:
+        return sum(f.quantity * f.price_cents for f in self.fills)
+
+
+class BasketService:
+    """
+    Fills a basket order from the cheapest active listings that match its
+    criteria, cheapest first and oldest first at equal prices.
+
+    Listings are read in price order through ix_market_listings_status_price
+    and locked as they are read with FOR UPDATE SKIP LOCKED, so a basket
+    never waits on a listing another trade is settling: it moves on to the
+    next cheapest one. The seller holdings behind the chosen listings are
+    then locked in id order, matching every other settlement path, and all
+    fills are settled together in the caller's transaction.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def quote(self, buyer_id: int, quantity: int, criteria: BasketCriteria) -> BasketResult:
+        """The fills a basket would get right now, without locking or buying anything"""
+        return self._allocate(buyer_id, quantity, criteria, lock=False)
+
+    def execute(
+        self,
+        buyer_id: int,
+        quantity: int,
+        criteria: BasketCriteria,
+        allow_partial: bool = False
+    ) -> BasketResult:
+        """
+        Buy up to quantity credits; the caller commits.
+
+        Raises:
+            ValueError: If nothing matches, or less than quantity is available
+                and allow_partial is False
+        """
+        try:
+            result = self._allocate(buyer_id, quantity, criteria, lock=True)
+            if not result.fills:
+                raise ValueError("No listings match the basket")
+            if result.filled < quantity and not allow_partial:
+                raise ValueError(
+                    f"Only {result.filled:,} of {quantity:,} credits are available within the basket limits"
+                )
+            self._settle(buyer_id, result)
+            self.db.flush()
+        except Exception:
+            self.db.rollback()
+            raise
+        return result
+
+    # ===== Allocation =====
+
+    def _allocate(self, buyer_id: int, quantity: int, criteria: BasketCriteria, lock: bool) -> BasketResult:
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+
+        query = self._candidates(buyer_id, criteria)
+        if lock:
+            query = query.populate_existing().with_for_update(of=MarketListing, skip_locked=True)
+
+        result = BasketResult(requested=quantity)
+        needed = quantity
+        cursor: Optional[Tuple[int, int]] = None
+        scanned = 0
+
+        while needed > 0 and scanned < MAX_BASKET_LISTINGS:
+            page = query
+            if cursor:
+                price, last_id = cursor
+                page = page.filter(or_(
+                    MarketListing.price_per_ton_cents > price,
+                    and_(MarketListing.price_per_ton_cents == price, MarketListing.id > last_id)
+                ))
+            rows = page.limit(min(BASKET_SCAN_BATCH, MAX_BASKET_LISTINGS - scanned)).all()
+            if not rows:
+                break
+            scanned += len(rows)
+            cursor = (rows[-1][0].price_per_ton_cents, rows[-1][0].id)
+
+            for listing, project_name in rows:
+                remaining = listing.quantity - listing.quantity_sold
+                take = min(remaining, needed)
+                # A listing's minimum applies to baskets as it does to offers
+                if take <= 0 or take < (listing.min_quantity or 1):
+                    continue
+                result.fills.append(BasketFill(
+                    listing_id=listing.id,
+                    project_id=listing.project_id,
+                    project_name=project_name,
+                    vintage=listing.vintage,
+                    seller_id=listing.seller_id,
+                    quantity=take,
+                    price_cents=listing.price_per_ton_cents,
+                ))
+                result.listings.append(listing)
+                needed -= take
+                if needed == 0:
+                    break
+
+        return result
+
+    def _candidates(self, buyer_id: int, criteria: BasketCriteria):
+        """Matching listings the buyer may purchase, cheapest first"""
+        now = datetime.utcnow()
+        query = self.db.query(MarketListing, Project.name).join(
+            Project, Project.id == MarketListing.project_id
+        )
+        query = ListingSearchService(self.db).apply_filters(
+            query,
+            func.coalesce(Project.registry, DEFAULT_REGISTRY),
+            q=criteria.q,
+            project_type=criteria.project_type,
+            registry=criteria.registry,
+            vintage_min=criteria.vintage_min,
+            vintage_max=criteria.vintage_max,
+        )
+        if criteria.max_price_cents is not None:
+            query = query.filter(MarketListing.price_per_ton_cents <= criteria.max_price_cents)
+
+        return query.filter(
+            MarketListing.seller_id != buyer_id,
+            or_(MarketListing.expires_at.is_(None), MarketListing.expires_at > now)
+        ).order_by(MarketListing.price_per_ton_cents, MarketListing.id)
+
+    # ===== Settlement =====
+
+    def _settle(self, buyer_id: int, result: BasketResult):
+        """Move the credits of every fill to the buyer. Does not commit."""
+        listings = {listing.id: listing for listing in result.listings}
+
+        holding_ids = sorted({listing.holding_id for listing in result.listings})
+        seller_holdings: Dict[int, CreditHolding] = {
+            h.id: h for h in self.db.query(CreditHolding).filter(
+                CreditHolding.id.in_(holding_ids)
+            ).order_by(CreditHolding.id).populate_existing().with_for_update().all()
+        }
+
+        # The buyer's existing holdings for every project/vintage in the basket, in one query
+        project_ids = {f.project_id for f in result.fills}
+        vintages = {f.vintage for f in result.fills}
+        keys = {(f.project_id, f.vintage) for f in result.fills}
+        buyer_holdings: Dict[Tuple[int, int, int], CreditHolding] = {}
+        for h in self.db.query(CreditHolding).filter(
+            CreditHolding.user_id == buyer_id,
+            CreditHolding.project_id.in_(project_ids),
+            CreditHolding.vintage.in_(vintages)
+        ).order_by(CreditHolding.id).with_for_update().all():
+            if (h.project_id, h.vintage) in keys:
+                buyer_holdings.setdefault((buyer_id, h.project_id, h.vintage), h)
+
+        orders = OrderBookService(self.db)
+        # Resolve every ledger account the basket touches in one lookup
+        orders.ledger.account_ids(
+            key
+            for f in result.fills
+            for key in (
+                (f.seller_id, f.project_id, f.vintage, AccountKind.LOCKED),
+                (buyer_id, f.project_id, f.vintage, AccountKind.AVAILABLE),
+            )
+        )
+        for fill in result.fills:
+            listing = listings[fill.listing_id]
+            orders.settle_trade(
+                seller_holdings[listing.holding_id],
+                buyer_id=buyer_id,
+                quantity=fill.quantity,
+                price_per_ton_cents=fill.price_cents,
+                notes=f"Basket purchase from listing #{listing.id}",
+                buyer_holdings=buyer_holdings,
+                source=TradeSource.BASKET,
+                reference=f"listing:{listing.id}",
+            )
+            listing.quantity_sold += fill.quantity
+            if listing.quantity_sold >= listing.quantity:
+                listing.status = ListingStatus.SOLD
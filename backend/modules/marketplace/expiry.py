@@ -0,0 +1,213 @@
+"""
+Marketplace Expiry Sweeper
+Expires stale listings and offers in bulk and hands locked credits back
+"""
+from collections import defaultdict
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+from backend.core.database import SessionLocal
+from backend.core.models import (
+    CreditHolding, MarketListing, ListingStatus,
+    Offer, OfferStatus, Notification, NotificationType
+)
+from backend.core.tasks import register_task, scheduler
+from backend.modules.ledger.models import AccountKind, EntryType
+from backend.modules.ledger.service import LedgerService
+from backend.modules.marketplace.feed import market_feed
+from backend.modules.marketplace.idempotency import KEY_RETENTION_HOURS
+from backend.modules.marketplace.models import IdempotencyKey
+
+EXPIRE_TASK = "marketplace.expire"
+EXPIRY_SWEEP_INTERVAL_SECONDS = 300
+EXPIRY_BATCH_SIZE = 500
+
+OPEN_OFFER_STATUSES = (OfferStatus.PENDING, OfferStatus.COUNTER)
+
+_holdings = CreditHolding.__table__
+_notifications = Notification.__table__
+
+
+class ExpirySweeper:
+    """
+    Moves listings and offers past their expires_at out of the active set.
+
+    Works in batches of bulk UPDATEs, each committed on its own, so a large
+    backlog never holds locks for long. Rows locked by an in-flight
+    settlement are skipped (FOR UPDATE SKIP LOCKED) and picked up by the
+    next sweep.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def sweep(self, now: Optional[datetime] = None, batch_size: int = EXPIRY_BATCH_SIZE) -> Dict[str, int]:
+        now = now or datetime.utcnow()
+        totals = {"listings": 0, "offers": 0, "credits_unlocked": 0, "idempotency_keys": 0}
+
+        while True:
+            listings, offers, unlocked = self._expire_listings(now, batch_size)
+            totals["listings"] += listings
+            totals["offers"] += offers
+            totals["credits_unlocked"] += unlocked
+            if listings < batch_size:
+                break
+
+        while True:
+            offers = self._expire_offers(now, batch_size)
+            totals["offers"] += offers
+            if offers < batch_size:
+                break
+
+        totals["idempotency_keys"] = self._purge_idempotency_keys(now)
+        return totals
+
+    # ===== Batches =====
+
+    def _expire_listings(self, now: datetime, batch_size: int) -> Tuple[int, int, int]:
+        """Expire one batch of listings, their open offers, and unlock the credits"""
+        rows = self.db.query(
+            MarketListing.id,
+            MarketListing.seller_id,
+            MarketListing.holding_id,
+            MarketListing.project_id,
+            MarketListing.vintage,
+            (MarketListing.quantity - MarketListing.quantity_sold).label("remaining"),
+        ).filter(
+            MarketListing.status == ListingStatus.ACTIVE,
+            MarketListing.expires_at <= now
+        ).order_by(MarketListing.expires_at).limit(batch_size).with_for_update(skip_locked=True).all()
+
+        if not rows:
+            return 0, 0, 0
+
+        listing_ids = [r.id for r in rows]
+        self.db.query(MarketListing).filter(
+            MarketListing.id.in_(listing_ids)
+        ).update({MarketListing.status: ListingStatus.EXPIRED}, synchronize_session=False)
+
+        # Credits still locked by the listings go back to their holdings
+        unlock: Dict[int, int] = defaultdict(int)
+        for r in rows:
+            if r.remaining > 0:
+                unlock[r.holding_id] += r.remaining
+        if unlock:
+            # Sorted so concurrent sweeps lock holdings in the same order
+            self.db.execute(
+                update(_holdings)
+                .where(_holdings.c.id == bindparam("holding_id"))
+                .values(
+                    available=_holdings.c.available + bindparam("amount"),
+                    locked=_holdings.c.locked - bindparam("amount"),
+                ),
+                [{"holding_id": h, "amount": unlock[h]} for h in sorted(unlock)]
+            )
+            LedgerService(self.db).post_many(
+                (
+                    EntryType.UNLOCK,
+                    (r.seller_id, r.project_id, r.vintage, AccountKind.LOCKED),
+                    (r.seller_id, r.project_id, r.vintage, AccountKind.AVAILABLE),
+                    r.remaining,
+                    f"listing:{r.id}",
+                )
+                for r in rows
+            )
+
+        # Open offers on an expired listing can no longer be accepted
+        offers = self.db.query(Offer.id, Offer.buyer_id, Offer.quantity).filter(
+            Offer.listing_id.in_(listing_ids),
+            Offer.status.in_(OPEN_OFFER_STATUSES)
+        ).all()
+        if offers:
+            self._mark_offers_expired([o.id for o in offers])
+
+        notifications = [
+            {
+                "user_id": r.seller_id,
+                "type": NotificationType.MARKET,
+                "title": "Listing Expired",
+                "message": (
+                    f"Your listing #{r.id} expired. {r.remaining:,} unsold credits are available again."
+                    if r.remaining > 0 else f"Your listing #{r.id} expired."
+                ),
+                "link": "/dashboard/developer/market/sell-orders",
+            }
+            for r in rows
+        ] + [self._offer_notification(o) for o in offers]
+        self._notify(notifications)
+
+        self.db.commit()
+
+        market_feed.publish("listing.expired", {"listing_ids": listing_ids})
+        self._publish_offers(offers)
+
+        return len(rows), len(offers), sum(unlock.values())
+
+    def _expire_offers(self, now: datetime, batch_size: int) -> int:
+        offers = self.db.query(Offer.id, Offer.buyer_id, Offer.quantity).filter(
+            Offer.status.in_(OPEN_OFFER_STATUSES),
+            Offer.expires_at <= now
+        ).order_by(Offer.expires_at).limit(batch_size).with_for_update(skip_locked=True).all()
+
+        if not offers:
+            return 0
+
+        self._mark_offers_expired([o.id for o in offers])
+        self._notify([self._offer_notification(o) for o in offers])
+        self.db.commit()
+
+        self._publish_offers(offers)
+        return len(offers)
+
+    def _purge_idempotency_keys(self, now: datetime) -> int:
+        deleted = self.db.query(IdempotencyKey).filter(
+            IdempotencyKey.created_at < now - timedelta(hours=KEY_RETENTION_HOURS)
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted
+
+    # ===== Helpers =====
+
+    def _mark_offers_expired(self, offer_ids: List[int]):
+        self.db.query(Offer).filter(
+            Offer.id.in_(offer_ids),
+            Offer.status.in_(OPEN_OFFER_STATUSES)
+        ).update({Offer.status: OfferStatus.EXPIRED}, synchronize_session=False)
+
+    @staticmethod
+    def _offer_notification(offer) -> Dict:
+        return {
+            "user_id": offer.buyer_id,
+            "type": NotificationType.MARKET,
+            "title": "Offer Expired",
+            "message": f"Your offer #{offer.id} for {offer.quantity:,} credits expired.",
+            "link": "/dashboard/buyer/offers",
+        }
+
+    def _notify(self, rows: List[Dict]):
+        if rows:
+            self.db.execute(insert(_notifications), rows)
+
+    @staticmethod
+    def _publish_offers(offers):
+        for o in offers:
+            market_feed.publish(
+                "offer.expired",
+                {"offer_id": o.id, "quantity": o.quantity, "status": OfferStatus.EXPIRED.value},
+                audience=[o.buyer_id]
+            )
+
+
+@register_task(EXPIRE_TASK)
+def expire_marketplace(payload: Dict) -> Dict[str, int]:
+    """Task handler: run one expiry sweep"""
+    db = SessionLocal()
+    try:
+        return ExpirySweeper(db).sweep(batch_size=int(payload.get("batch_size", EXPIRY_BATCH_SIZE)))
+    finally:
+        db.close()
+
+
+scheduler.every(EXPIRY_SWEEP_INTERVAL_SECONDS, EXPIRE_TASK)
@@ -0,0 +1,225 @@
+"""
+Marketplace Live Feed
+Pushes listing, offer, trade and stats events to connected clients
+
+Mutating endpoints publish to the marketplace topic on the EventBusPort
+once their transaction commits.
+Each API instance subscribes once (the bus delivers every message to every
+instance) and fans every message out in-process to its open streams, so one
+bus delivery serves any number of clients.
+"""
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Iterable, List, Optional
+
+from backend.core.database import SessionLocal, after_commit
+from backend.core.ports import EventBusPort
+from backend.modules.marketplace.history import PriceHistoryService
+
+logger = logging.getLogger(__name__)
+
+MARKETPLACE_TOPIC = "marketplace-events"
+
+# Frames buffered per connection before it is considered too slow
+SUBSCRIBER_QUEUE_SIZE = 256
+STATS_TICK_SECONDS = 5.0
+KEEPALIVE_SECONDS = 15.0
+
+# Events that can move the headline stats
+STATS_EVENTS = {"listing.created", "listing.updated", "listing.sold", "listing.expired", "trade"}
+
+
+@dataclass
+class FeedSubscriber:
+    """One open stream"""
+    user_id: int
+    queue: asyncio.Queue
+    dropped: int = 0  # Frames discarded since the client last caught up
+    event_types: Optional[set] = None  # None means everything
+
+
+class MarketFeed:
+    """
+    In-process fan-out from the event bus to streaming connections.
+
+    Fan-out never waits on a client: every connection has a bounded queue
+    and frames that do not fit are dropped and counted. The stream then
+    sends a single `resync` event so the client refetches over REST instead
+    of replaying a backlog.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.subscribers: List[FeedSubscriber] = []
+        self._bus: Optional[EventBusPort] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats_dirty = False
+        self._ticker: Optional[asyncio.Task] = None
+
+    # ===== Lifecycle =====
+
+    async def start(self, event_bus: EventBusPort):
+        """Subscribe to the bus and start the stats ticker (call on startup)"""
+        if self._loop is not None:
+            return
+        self._bus = event_bus
+        self._loop = asyncio.get_running_loop()
+        await event_bus.subscribe(MARKETPLACE_TOPIC, self._on_message)
+        self._ticker = asyncio.create_task(self._tick_stats())
+
+    async def stop(self):
+        if self._ticker:
+            self._ticker.cancel()
+        self._ticker = None
+        self._loop = None
+        self.subscribers.clear()
+
+    # ===== Publishing =====
+
+    def publish(self, event_type: str, data: Dict[str, Any], audience: Optional[Iterable[int]] = None):
+        """
+        Publish an event from request code, after its transaction committed.
+
+        Returns immediately; delivery happens on the event loop. Events with
+        an audience are only streamed to those user ids.
+        """
+        if self._loop is None or self._bus is None:
+            return  # Feed not running (scripts, CLI tools)
+
+        message = {
+            "type": event_type,
+            "data": data,
+            "audience": sorted(set(audience)) if audience is not None else None,
+            "at": datetime.utcnow().isoformat(),
+        }
+        future = asyncio.run_coroutine_threadsafe(
+            self._bus.publish(MARKETPLACE_TOPIC, message), self._loop
+        )
+        future.add_done_callback(self._log_publish_error)
+
+    def publish_on_commit(
+        self,
+        db: Session,
+        event_type: str,
+        data: Dict[str, Any],
+        audience: Optional[Iterable[int]] = None
+    ):
+        """
+        Publish an event once the session's transaction commits, and never
+        if it rolls back. Build data before calling: after the commit the
+        session's rows are expired.
+        """
+        audience = list(audience) if audience is not None else None
+        after_commit(db, lambda: self.publish(event_type, data, audience))
+
+    @staticmethod
+    def _log_publish_error(future):
+        if future.exception():
+            logger.error(f"Marketplace feed publish failed: {future.exception()}")
+
+    def _on_message(self, message: Dict[str, Any]):
+        # Bus handlers may run on the loop (local adapter) or on a client
+        # library thread (Pub/Sub); always hop onto the loop
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._fan_out, message)
+
+    # ===== Fan-out =====
+
+    def _fan_out(self, message: Dict[str, Any]):
+        event_type = message.get("type")
+        if event_type in STATS_EVENTS:
+            self._stats_dirty = True
+        if not self.subscribers:
+            return
+
+        audience = message.get("audience")
+        audience = set(audience) if audience is not None else None
+        frame = encode_frame(event_type, message.get("data"), message.get("at"))  # Encoded once
+
+        for subscriber in self.subscribers:
+            if audience is not None and subscriber.user_id not in audience:
+                continue
+            if subscriber.event_types is not None and event_type not in subscriber.event_types:
+                continue
+            self._offer(subscriber, frame)
+
+    @staticmethod
+    def _offer(subscriber: FeedSubscriber, frame: str):
+        try:
+            subscriber.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            subscriber.dropped += 1
+
+    def connect(self, user_id: int, event_types: Optional[Iterable[str]] = None) -> FeedSubscriber:
+        subscriber = FeedSubscriber(
+            user_id=user_id,
+            queue=asyncio.Queue(maxsize=self.queue_size),
+            event_types=set(event_types) if event_types else None,
+        )
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def disconnect(self, subscriber: FeedSubscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+
+    async def next_frame(self, subscriber: FeedSubscriber) -> str:
+        """
+        Next frame for a stream: a resync notice if frames were dropped,
+        otherwise the next queued event, or a keep-alive comment when idle.
+        """
+        if subscriber.dropped:
+            dropped, subscriber.dropped = subscriber.dropped, 0
+            # Whatever is still queued is stale relative to the refetch
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            return encode_frame("resync", {"dropped": dropped})
+        try:
+            return await asyncio.wait_for(subscriber.queue.get(), KEEPALIVE_SECONDS)
+        except asyncio.TimeoutError:
+            return ": keep-alive\n\n"
+
+    # ===== Stats ticks =====
+
+    async def _tick_stats(self):
+        # Coalesces any number of trades/listing changes into one stats
+        # event per interval, computed once per instance
+        while True:
+            await asyncio.sleep(STATS_TICK_SECONDS)
+            if not (self._stats_dirty and self.subscribers):
+                continue
+            self._stats_dirty = False
+            try:
+                stats = await asyncio.to_thread(_load_stats)
+            except Exception as e:
+                logger.error(f"Marketplace stats tick failed: {e}")
+                continue
+            frame = encode_frame("stats", stats)
+            for subscriber in self.subscribers:
+                if subscriber.event_types is None or "stats" in subscriber.event_types:
+                    self._offer(subscriber, frame)
+
+
+def encode_frame(event_type: str, data: Any, at: Optional[str] = None) -> str:
+    """Server-sent events frame"""
+    payload = json.dumps(
+        {"type": event_type, "data": data, "at": at or datetime.utcnow().isoformat()},
+        default=str
+    )
+    return f"event: {event_type}\ndata: {payload}\n\n"
+
+
+def _load_stats() -> Dict[str, Any]:
+    db = SessionLocal()
+    try:
+        return PriceHistoryService(db).get_market_stats()
+    finally:
+        db.close()
+
+
+# Global feed instance
+market_feed = MarketFeed()
@@ -0,0 +1,313 @@
+"""
+Marketplace Price History
+Trade log and incrementally maintained OHLC candles per (registry, project type, vintage)
+"""
+from sqlalchemy import and_, case, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+from backend.core.models import Project, MarketListing, ListingStatus
+from backend.modules.marketplace.models import PriceCandle, Trade, TradeSource
+
+RESOLUTIONS = {
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+    "1w": timedelta(weeks=1),
+}
+
+DEFAULT_REGISTRY = "VCS"
+DEFAULT_PROJECT_TYPE = "other"
+
+
+def bucket_start(ts: datetime, resolution: str) -> datetime:
+    """Start of the candle containing ts (weeks start on Monday, UTC)"""
+    if resolution == "1h":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    day = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == "1d":
+        return day
+    if resolution == "1w":
+        return day - timedelta(days=day.weekday())
+    raise ValueError(f"Unknown resolution: {resolution}")
+
+
+class PriceHistoryService:
+    """
+    Records completed sales and folds each one into its 1h, 1d and 1w candles
+    in the caller's transaction, so reads never have to scan the trade log.
+
+    An instance caches project attributes and the candles it has locked, so
+    many trades in one unit of work cost one lookup per project and bucket.
+    Use a fresh instance per transaction.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._series: Dict[int, Tuple[str, str]] = {}
+        self._candles: Dict[Tuple, PriceCandle] = {}
+
+    # ===== Writes =====
+
+    def record_trade(
+        self,
+        project_id: int,
+        vintage: int,
+        buyer_id: int,
+        seller_id: int,
+        quantity: int,
+        price_per_ton_cents: int,
+        source: TradeSource,
+        executed_at: Optional[datetime] = None,
+    ) -> Trade:
+        """Log a trade and update its candles. Does not commit."""
+        if project_id not in self._series:
+            registry, project_type = self.db.query(
+                Project.registry, Project.project_type
+            ).filter(Project.id == project_id).one()
+            self._series[project_id] = (registry or DEFAULT_REGISTRY, project_type or DEFAULT_PROJECT_TYPE)
+        registry, project_type = self._series[project_id]
+
+        trade = Trade(
+            project_id=project_id,
+            vintage=vintage,
+            registry=registry,
+            project_type=project_type,
+            buyer_id=buyer_id,
+            seller_id=seller_id,
+            quantity=quantity,
+            price_per_ton_cents=price_per_ton_cents,
+            source=source,
+            executed_at=executed_at or datetime.utcnow(),
+        )
+        self.db.add(trade)
+        self.db.flush()
+
+        for resolution in RESOLUTIONS:
+            self._apply_to_candle(trade, resolution)
+
+        return trade
+
+    def _apply_to_candle(self, trade: Trade, resolution: str):
+        start = bucket_start(trade.executed_at, resolution)
+        key = (trade.registry, trade.project_type, trade.vintage, resolution, start)
+        candle = self._candles.get(key) or self._locked_candle(trade, resolution, start)
+
+        if candle is None:
+            candle = PriceCandle(
+                registry=trade.registry,
+                project_type=trade.project_type,
+                vintage=trade.vintage,
+                resolution=resolution,
+                bucket_start=start,
+                open_cents=trade.price_per_ton_cents,
+                high_cents=trade.price_per_ton_cents,
+                low_cents=trade.price_per_ton_cents,
+                close_cents=trade.price_per_ton_cents,
+                volume=trade.quantity,
+                notional_cents=trade.quantity * trade.price_per_ton_cents,
+                trade_count=1,
+                last_trade_id=trade.id,
+            )
+            try:
+                # Savepoint: a concurrent trade may open the same bucket first
+                with self.db.begin_nested():
+                    self.db.add(candle)
+                    self.db.flush()
+                self._candles[key] = candle
+                return
+            except IntegrityError:
+                candle = self._locked_candle(trade, resolution, start)
+        self._candles[key] = candle
+
+        price = trade.price_per_ton_cents
+        candle.high_cents = max(candle.high_cents, price)
+        candle.low_cents = min(candle.low_cents, price)
+        candle.close_cents = price
+        candle.volume += trade.quantity
+        candle.notional_cents += trade.quantity * price
+        candle.trade_count += 1
+        candle.last_trade_id = trade.id
+
+    def _locked_candle(self, trade: Trade, resolution: str, start: datetime) -> Optional[PriceCandle]:
+        return self.db.query(PriceCandle).filter(
+            PriceCandle.registry == trade.registry,
+            PriceCandle.project_type == trade.project_type,
+            PriceCandle.vintage == trade.vintage,
+            PriceCandle.resolution == resolution,
+            PriceCandle.bucket_start == start
+        ).with_for_update().first()
+
+    # ===== Reads =====
+
+    def get_candles(
+        self,
+        resolution: str,
+        registry: Optional[str] = None,
+        project_type: Optional[str] = None,
+        vintage: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 500,
+    ) -> List[PriceCandle]:
+        """Candles of every matching series, oldest first"""
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+
+        query = self.db.query(PriceCandle).filter(PriceCandle.resolution == resolution)
+        if registry:
+            query = query.filter(PriceCandle.registry == registry)
+        if project_type:
+            query = query.filter(PriceCandle.project_type == project_type)
+        if vintage is not None:
+            query = query.filter(PriceCandle.vintage == vintage)
+        if start:
+            query = query.filter(PriceCandle.bucket_start >= bucket_start(start, resolution))
+        if end:
+            query = query.filter(PriceCandle.bucket_start < end)
+
+        # Newest `limit` candles, returned in chronological order
+        rows = query.order_by(PriceCandle.bucket_start.desc(), PriceCandle.id.desc()).limit(limit).all()
+        return rows[::-1]
+
+    def get_recent_trades(
+        self,
+        project_id: Optional[int] = None,
+        vintage: Optional[int] = None,
+        limit: int = 50,
+    ) -> List[Trade]:
+        query = self.db.query(Trade)
+        if project_id is not None:
+            query = query.filter(Trade.project_id == project_id)
+        if vintage is not None:
+            query = query.filter(Trade.vintage == vintage)
+        return query.order_by(Trade.id.desc()).limit(limit).all()
+
+    def get_summary(self, now: Optional[datetime] = None) -> Dict:
+        """
+        Rolling 24h figures from the hourly candles: volume, VWAP per registry
+        and the change in VWAP against the previous 24h.
+
+        Reads at most 48 hourly candles per series, whatever the trade count.
+        """
+        now = now or datetime.utcnow()
+        current_start = bucket_start(now, "1h") - timedelta(hours=23)
+        previous_start = current_start - timedelta(hours=24)
+
+        is_current = PriceCandle.bucket_start >= current_start
+        rows = self.db.query(
+            PriceCandle.registry,
+            func.sum(case((is_current, PriceCandle.volume), else_=0)),
+            func.sum(case((is_current, PriceCandle.notional_cents), else_=0)),
+            func.sum(case((is_current, 0), else_=PriceCandle.volume)),
+            func.sum(case((is_current, 0), else_=PriceCandle.notional_cents)),
+        ).filter(
+            PriceCandle.resolution == "1h",
+            PriceCandle.bucket_start >= previous_start
+        ).group_by(PriceCandle.registry).all()
+
+        volume_24h = notional_24h = previous_volume = previous_notional = 0
+        vwap_by_registry: Dict[str, float] = {}
+        for registry, volume, notional, prev_volume, prev_notional in rows:
+            volume, notional = int(volume or 0), int(notional or 0)
+            volume_24h += volume
+            notional_24h += notional
+            previous_volume += int(prev_volume or 0)
+            previous_notional += int(prev_notional or 0)
+            if volume:
+                vwap_by_registry[registry] = notional / volume / 100
+
+        vwap_24h = notional_24h / volume_24h / 100 if volume_24h else None
+        previous_vwap = previous_notional / previous_volume / 100 if previous_volume else None
+        price_change = (
+            round((vwap_24h - previous_vwap) / previous_vwap * 100, 2)
+            if vwap_24h is not None and previous_vwap else 0.0
+        )
+
+        return {
+            "volume_24h": volume_24h,
+            "notional_24h_cents": notional_24h,
+            "vwap_24h": vwap_24h,
+            "price_change_24h": price_change,
+            "vwap_by_registry": vwap_by_registry,
+        }
+
+    def mark_prices(
+        self,
+        series: Iterable[Tuple[str, int]],
+        as_of: Optional[datetime] = None
+    ) -> Dict[Tuple[str, int], int]:
+        """
+        Latest traded price in cents per (registry, vintage): the VWAP, across
+        project types, of the series' most recent daily candle. With as_of,
+        only candles of days up to and including the one containing it count.
+        Series that never traded are left out.
+        """
+        series = set(series)
+        if not series:
+            return {}
+        query = self.db.query(
+            PriceCandle.registry, PriceCandle.vintage, func.max(PriceCandle.bucket_start).label("bucket_start")
+        ).filter(
+            PriceCandle.resolution == "1d",
+            PriceCandle.registry.in_({registry for registry, _ in series}),
+            PriceCandle.vintage.in_({vintage for _, vintage in series}),
+            PriceCandle.volume > 0
+        )
+        if as_of:
+            query = query.filter(PriceCandle.bucket_start <= bucket_start(as_of, "1d"))
+        latest = query.group_by(PriceCandle.registry, PriceCandle.vintage).subquery()
+
+        rows = self.db.query(
+            PriceCandle.registry, PriceCandle.vintage,
+            func.sum(PriceCandle.notional_cents), func.sum(PriceCandle.volume)
+        ).join(latest, and_(
+            PriceCandle.registry == latest.c.registry,
+            PriceCandle.vintage == latest.c.vintage,
+            PriceCandle.bucket_start == latest.c.bucket_start
+        )).filter(PriceCandle.resolution == "1d").group_by(PriceCandle.registry, PriceCandle.vintage).all()
+
+        return {
+            (registry, vintage): round(int(notional) / int(volume))
+            for registry, vintage, notional, volume in rows
+            if (registry, vintage) in series and volume
+        }
+
+    def get_market_stats(self) -> Dict:
+        """Headline marketplace figures: open supply plus 24h traded prices"""
+        # Open supply is counted, not kept as counters: the active listings are
+        # one range of ix_market_listings_status_price, and every listing path
+        # (offers, baskets, expiry, seeding) would otherwise have to update them
+        total_listings, total_volume = self.db.query(
+            func.count(MarketListing.id),
+            func.coalesce(func.sum(MarketListing.quantity - MarketListing.quantity_sold), 0)
+        ).filter(MarketListing.status == ListingStatus.ACTIVE).one()
+
+        summary = self.get_summary()
+        avg_prices = dict(summary["vwap_by_registry"])
+
+        # Registries without recent trades fall back to their asking prices
+        missing = [r for r in ("VCS", "Gold Standard") if r not in avg_prices]
+        if missing:
+            project_registry = func.coalesce(Project.registry, DEFAULT_REGISTRY)
+            for registry, avg_cents in (
+                self.db.query(project_registry, func.avg(MarketListing.price_per_ton_cents))
+                .join(Project, Project.id == MarketListing.project_id)
+                .filter(
+                    MarketListing.status == ListingStatus.ACTIVE,
+                    project_registry.in_(missing)
+                )
+                .group_by(project_registry)
+                .all()
+            ):
+                avg_prices[registry] = float(avg_cents) / 100
+
+        return {
+            "total_listings": total_listings,
+            "total_volume": int(total_volume),
+            "avg_vcs_price": round(avg_prices.get("VCS", 8.50), 2),
+            "avg_gs_price": round(avg_prices.get("Gold Standard", 12.00), 2),
+            "price_change_24h": summary["price_change_24h"],
+            "volume_24h": summary["volume_24h"],
+        }
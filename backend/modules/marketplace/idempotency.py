@@ -0,0 +1,92 @@
+"""
+Marketplace Idempotency Keys
+Safe retries for mutating marketplace endpoints via the Idempotency-Key header
+"""
+import hashlib
+import json
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.modules.marketplace.models import IdempotencyKey
+
+# Keys older than this may be purged; retries after it execute again
+KEY_RETENTION_HOURS = 24
+
+
+def run_idempotent(
+    db: Session,
+    user_id: int,
+    key: Optional[str],
+    scope: str,
+    payload: Any,
+    handler: Callable[[], Any],
+) -> Any:
+    """
+    Execute a mutating request at most once per (user, key), and commit it.
+
+    Handlers flush but never commit; their side effects outside the
+    database wait for the commit (see MarketFeed.publish_on_commit). The
+    key row is flushed before the handler runs, and the operation, the key
+    and its stored response are committed together afterwards, so a key
+    never exists without its response. A concurrent duplicate blocks on the
+    key's unique index until the first request finishes. Completed keys
+    replay the stored response; reusing a key for a different request is
+    rejected.
+    """
+    if not key:
+        result = handler()
+        _commit(db)
+        return result
+
+    request_hash = hashlib.sha256(
+        json.dumps({"scope": scope, "payload": jsonable_encoder(payload)}, sort_keys=True).encode()
+    ).hexdigest()
+
+    existing = _find(db, user_id, key)
+    if existing:
+        return _replay(existing, request_hash)
+
+    record = IdempotencyKey(user_id=user_id, key=key, scope=scope, request_hash=request_hash)
+    db.add(record)
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        existing = _find(db, user_id, key)
+        if existing is None:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress")
+        return _replay(existing, request_hash)
+
+    result = handler()
+
+    record.status_code = 200
+    record.response_body = jsonable_encoder(result)
+    _commit(db)
+    return result
+
+
+def _commit(db: Session):
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _find(db: Session, user_id: int, key: str) -> Optional[IdempotencyKey]:
+    return db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key
+    ).first()
+
+
+def _replay(record: IdempotencyKey, request_hash: str) -> Any:
+    if record.request_hash != request_hash:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    if record.response_body is None:
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress")
+    return record.response_body
@@ -0,0 +1,171 @@
+"""
+Marketplace Order Book Models
+Orders, the append-only event log behind the matching engine, and trade/price history
+"""
+from sqlalchemy import (
+    Column, Integer, BigInteger, String, ForeignKey, DateTime, JSON,
+    Enum as SQLEnum, Index, UniqueConstraint
+)
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from backend.core.database import Base
+import enum
+
+
+class OrderSide(str, enum.Enum):
+    BUY = "buy"
+    SELL = "sell"
+
+
+class OrderType(str, enum.Enum):
+    LIMIT = "limit"
+    MARKET = "market"
+
+
+class OrderStatus(str, enum.Enum):
+    OPEN = "open"
+    PARTIALLY_FILLED = "partially_filled"
+    FILLED = "filled"
+    CANCELLED = "cancelled"
+
+
+class OrderEventType(str, enum.Enum):
+    ACCEPTED = "accepted"
+    FILL = "fill"
+    CANCELLED = "cancelled"
+
+
+class MarketOrder(Base):
+    """Limit and market orders on a (project, vintage) book"""
+    __tablename__ = "market_orders"
+
+    id = Column(Integer, primary_key=True, index=True)  # Also the time priority
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    vintage = Column(Integer, nullable=False)
+
+    side = Column(SQLEnum(OrderSide), nullable=False)
+    order_type = Column(SQLEnum(OrderType), nullable=False)
+    price_per_ton_cents = Column(Integer, nullable=True)  # Null for market orders
+    quantity = Column(Integer, nullable=False)
+    quantity_filled = Column(Integer, default=0)
+
+    # Sell orders lock credits in this holding until filled or cancelled
+    holding_id = Column(Integer, ForeignKey("credit_holdings.id"), nullable=True)
+
+    status = Column(SQLEnum(OrderStatus), default=OrderStatus.OPEN)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    user = relationship("User", backref="market_orders")
+    project = relationship("Project", backref="market_orders")
+    holding = relationship("CreditHolding", backref="market_orders")
+
+    __table_args__ = (
+        Index("ix_market_orders_book_status", "project_id", "vintage", "status"),
+    )
+
+
+class OrderEvent(Base):
+    """Append-only log of everything that happened on the order books"""
+    __tablename__ = "order_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, nullable=False)
+    vintage = Column(Integer, nullable=False)
+    event_type = Column(SQLEnum(OrderEventType), nullable=False)
+    order_id = Column(Integer, ForeignKey("market_orders.id"), nullable=False, index=True)
+    counter_order_id = Column(Integer, ForeignKey("market_orders.id"), nullable=True)
+    quantity = Column(Integer, nullable=True)
+    price_per_ton_cents = Column(Integer, nullable=True)
+    details = Column(JSON, default=dict)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_order_events_book", "project_id", "vintage", "id"),
+    )
+
+
+class TradeSource(str, enum.Enum):
+    OFFER = "offer"
+    ORDER = "order"
+    BASKET = "basket"
+
+
+class Trade(Base):
+    """One completed sale, whichever way it was matched"""
+    __tablename__ = "market_trades"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    vintage = Column(Integer, nullable=False)
+    # Copied from the project at execution time so history never needs a join
+    registry = Column(String, nullable=False)
+    project_type = Column(String, nullable=False)
+
+    buyer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    seller_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    price_per_ton_cents = Column(Integer, nullable=False)
+    source = Column(SQLEnum(TradeSource), nullable=False)
+    executed_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        Index("ix_market_trades_series", "registry", "project_type", "vintage", "executed_at"),
+    )
+
+
+class PriceCandle(Base):
+    """
+    OHLC bar for one (registry, project type, vintage) series at one resolution.
+    Updated in place by every trade that falls into its bucket.
+    """
+    __tablename__ = "price_candles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    registry = Column(String, nullable=False)
+    project_type = Column(String, nullable=False)
+    vintage = Column(Integer, nullable=False)
+    resolution = Column(String, nullable=False)  # 1h, 1d, 1w
+    bucket_start = Column(DateTime, nullable=False)
+
+    open_cents = Column(Integer, nullable=False)
+    high_cents = Column(Integer, nullable=False)
+    low_cents = Column(Integer, nullable=False)
+    close_cents = Column(Integer, nullable=False)
+    volume = Column(Integer, default=0)  # Credits traded
+    notional_cents = Column(BigInteger, default=0)  # Sum of quantity * price, for VWAP
+    trade_count = Column(Integer, default=0)
+    last_trade_id = Column(Integer, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "registry", "project_type", "vintage", "resolution", "bucket_start",
+            name="uq_price_candles_bucket"
+        ),
+        Index("ix_price_candles_resolution_bucket", "resolution", "bucket_start"),
+    )
+
+
+class IdempotencyKey(Base):
+    """
+    Client-supplied key for a mutating marketplace request.
+
+    Inserted and answered in the same transaction as the operation it
+    guards, so a key exists only if the operation committed; retries
+    replay the response.
+    """
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    scope = Column(String, nullable=False)  # Endpoint and target, e.g. accept_offer:12
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(JSON, nullable=True)  # Null until the response is stored
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
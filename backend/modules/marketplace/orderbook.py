@@ -0,0 +1,276 @@
+"""
+Marketplace Matching Engine
+In-memory price-time priority order books, one per (project, vintage)
+
+The engine knows nothing about the database. OrderBookService persists
+orders, settles fills, and reloads a book from its open orders whenever
+another process has changed it.
+"""
+import heapq
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from backend.modules.marketplace.models import OrderSide, OrderType
+
+BookKey = Tuple[int, int]  # (project_id, vintage)
+
+
+@dataclass
+class BookOrder:
+    """An order as held by the matching engine"""
+    order_id: int  # Increasing ids give time priority
+    user_id: int
+    side: OrderSide
+    order_type: OrderType
+    price_cents: Optional[int]
+    remaining: int
+    active: bool = True
+
+
+@dataclass
+class Fill:
+    """A match between an incoming (taker) order and a resting (maker) order"""
+    taker_order_id: int
+    maker_order_id: int
+    buyer_id: int
+    seller_id: int
+    buy_order_id: int
+    sell_order_id: int
+    quantity: int
+    price_cents: int  # Always the resting order's price
+
+
+@dataclass
+class MatchResult:
+    fills: List[Fill] = field(default_factory=list)
+    rested: bool = False  # Remainder of a limit order added to the book
+    cancelled_remaining: int = 0  # Unfilled remainder of a market order
+    self_trade_cancelled: List[BookOrder] = field(default_factory=list)
+
+
+class _PriceLevels:
+    """Orders on one side of a book, grouped by price in FIFO queues"""
+
+    def __init__(self, side: OrderSide):
+        self.side = side
+        self.levels: Dict[int, Deque[BookOrder]] = {}
+        self._prices: List[int] = []  # Heap; negated for bids
+
+    def best_price(self) -> Optional[int]:
+        while self._prices:
+            price = -self._prices[0] if self.side == OrderSide.BUY else self._prices[0]
+            queue = self.levels.get(price)
+            while queue and not queue[0].active:
+                queue.popleft()
+            if queue:
+                return price
+            # Empty level: drop it lazily
+            heapq.heappop(self._prices)
+            self.levels.pop(price, None)
+        return None
+
+    def front(self, price: int) -> BookOrder:
+        return self.levels[price][0]
+
+    def add(self, order: BookOrder):
+        queue = self.levels.get(order.price_cents)
+        if queue is None:
+            queue = self.levels[order.price_cents] = deque()
+            heapq.heappush(
+                self._prices,
+                -order.price_cents if self.side == OrderSide.BUY else order.price_cents
+            )
+        queue.append(order)
+
+    def depth(self, levels: int) -> List[Dict[str, int]]:
+        prices = sorted(self.levels.keys(), reverse=self.side == OrderSide.BUY)
+        result = []
+        for price in prices:
+            live = [o for o in self.levels[price] if o.active]
+            if live:
+                result.append({
+                    "price_cents": price,
+                    "quantity": sum(o.remaining for o in live),
+                    "orders": len(live),
+                })
+                if len(result) == levels:
+                    break
+        return result
+
+
+class OrderBook:
+    """Price-time priority book for one (project, vintage)"""
+
+    def __init__(self, key: BookKey):
+        self.key = key
+        self.bids = _PriceLevels(OrderSide.BUY)
+        self.asks = _PriceLevels(OrderSide.SELL)
+        self.orders: Dict[int, BookOrder] = {}
+        self.lock = threading.RLock()
+        # Last order event the book reflects; None until first loaded, and
+        # while changes made to it are not committed
+        self.head: Optional[int] = None
+        self._write: Optional[object] = None
+
+    def reload(self, orders: List[BookOrder], head: int):
+        """Replace the book's contents with open orders in time priority"""
+        self.bids = _PriceLevels(OrderSide.BUY)
+        self.asks = _PriceLevels(OrderSide.SELL)
+        self.orders = {}
+        for order in orders:
+            self._rest(order)
+        self.head = head
+        self._write = None
+
+    def begin_write(self) -> object:
+        """Mark the book as ahead of the database until end_write() with the returned token"""
+        self.head = None
+        self._write = token = object()
+        return token
+
+    def end_write(self, token: object, head: int):
+        """The write committed up to event head; ignored if the book was reloaded or written since"""
+        if self._write is token:
+            self.head = head
+            self._write = None
+
+    def submit(self, order: BookOrder) -> MatchResult:
+        """
+        Match an incoming order against the opposite side.
+
+        Fills execute at the resting order's price. A limit order's remainder
+        rests on the book; a market order's remainder is cancelled. A resting
+        order from the same user is cancelled instead of being traded against.
+        """
+        result = MatchResult()
+        opposite = self.asks if order.side == OrderSide.BUY else self.bids
+
+        while order.remaining > 0:
+            best = opposite.best_price()
+            if best is None or not self._crosses(order, best):
+                break
+
+            maker = opposite.front(best)
+            if maker.user_id == order.user_id:
+                self._remove(maker)
+                result.self_trade_cancelled.append(maker)
+                continue
+
+            quantity = min(order.remaining, maker.remaining)
+            order.remaining -= quantity
+            maker.remaining -= quantity
+            if maker.remaining == 0:
+                self._remove(maker)
+
+            buy, sell = (order, maker) if order.side == OrderSide.BUY else (maker, order)
+            result.fills.append(Fill(
+                taker_order_id=order.order_id,
+                maker_order_id=maker.order_id,
+                buyer_id=buy.user_id,
+                seller_id=sell.user_id,
+                buy_order_id=buy.order_id,
+                sell_order_id=sell.order_id,
+                quantity=quantity,
+                price_cents=best,
+            ))
+
+        if order.remaining > 0:
+            if order.order_type == OrderType.LIMIT:
+                self._rest(order)
+                result.rested = True
+            else:
+                result.cancelled_remaining = order.remaining
+                order.active = False
+
+        return result
+
+    def rest(self, order: BookOrder):
+        """Add an order to the book without matching"""
+        self._rest(order)
+
+    def market_cost(self, order: BookOrder) -> int:
+        """What a market order would trade for against the book, in cents, without changing it"""
+        opposite = self.asks if order.side == OrderSide.BUY else self.bids
+        remaining, cost = order.remaining, 0
+        for price in sorted(opposite.levels.keys(), reverse=opposite.side == OrderSide.BUY):
+            for maker in opposite.levels[price]:
+                if remaining == 0:
+                    return cost
+                # Own orders are cancelled, not traded against
+                if maker.active and maker.user_id != order.user_id:
+                    quantity = min(remaining, maker.remaining)
+                    cost += quantity * price
+                    remaining -= quantity
+        return cost
+
+    def cancel(self, order_id: int) -> Optional[BookOrder]:
+        order = self.orders.get(order_id)
+        if order is None:
+            return None
+        self._remove(order)
+        return order
+
+    def snapshot(self, levels: int = 10) -> Dict[str, object]:
+        return {
+            "project_id": self.key[0],
+            "vintage": self.key[1],
+            "bids": self.bids.depth(levels),
+            "asks": self.asks.depth(levels),
+            "best_bid_cents": self.bids.best_price(),
+            "best_ask_cents": self.asks.best_price(),
+        }
+
+    @staticmethod
+    def _crosses(order: BookOrder, best: int) -> bool:
+        if order.order_type == OrderType.MARKET:
+            return True
+        if order.side == OrderSide.BUY:
+            return order.price_cents >= best
+        return order.price_cents <= best
+
+    def _rest(self, order: BookOrder):
+        self.orders[order.order_id] = order
+        (self.bids if order.side == OrderSide.BUY else self.asks).add(order)
+
+    def _remove(self, order: BookOrder):
+        # Queues drop inactive orders lazily when they reach the front
+        order.active = False
+        self.orders.pop(order.order_id, None)
+
+
+class MatchingEngine:
+    """
+    Process-wide registry of order books.
+
+    Books are created empty and filled by their owner with reload(); a
+    book can be dropped to discard it (e.g. after a failed settlement).
+    """
+
+    def __init__(self):
+        self._books: Dict[BookKey, OrderBook] = {}
+        self._lock = threading.Lock()
+
+    def get_book(self, key: BookKey) -> OrderBook:
+        book = self._books.get(key)
+        if book is not None:
+            return book
+
+        with self._lock:
+            book = self._books.get(key)
+            if book is None:
+                book = self._books[key] = OrderBook(key)
+        return book
+
+    def drop_book(self, key: BookKey):
+        with self._lock:
+            self._books.pop(key, None)
+
+    def reset(self):
+        with self._lock:
+            self._books.clear()
+
+
+# Global engine instance
+engine = MatchingEngine()
@@ -1,21 +1,34 @@
 """
 Marketplace API Module
-Database-backed listings and offers
+Database-backed listings, offers and the order book
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
+import base64
+import json
 
 from backend.core.database import get_db
+from backend.core.loaders import Loaders, get_loaders, profile_display_name
 from backend.core.models import (
     User, Project, CreditHolding,
     MarketListing as ListingModel, ListingStatus,
     Offer as OfferModel, OfferStatus,
     Transaction, TransactionType, TransactionStatus
 )
-from backend.modules.auth.dependencies import get_current_user
+from backend.modules.auth.dependencies import get_current_user, get_current_user_id
+from backend.modules.ledger.service import LedgerService
+from backend.modules.marketplace.basket import BasketCriteria, BasketResult, BasketService
+from backend.modules.marketplace.feed import market_feed
+from backend.modules.marketplace.history import PriceHistoryService
+from backend.modules.marketplace.idempotency import run_idempotent
+from backend.modules.marketplace.models import MarketOrder, OrderSide, OrderType
+from backend.modules.marketplace.search import ListingSearchService, listing_query
+from backend.modules.marketplace.service import OrderBookService
 
 router = APIRouter(prefix="/marketplace", tags=["marketplace"])
 
@@ -62,117 +75,316 @@ class CreateListingRequest(BaseModel):
     price_per_ton: float
     min_quantity: int = 1
 
+class PlaceOrderRequest(BaseModel):
+    project_id: int
+    vintage: int
+    side: OrderSide
+    order_type: OrderType = OrderType.LIMIT
+    quantity: int
+    price_per_ton: Optional[float] = None  # Required for limit orders
+    holding_id: Optional[int] = None  # Sell orders: holding to lock credits in
+
+class FillResponse(BaseModel):
+    counter_order_id: int
+    quantity: int
+    price_per_ton: float
+
+class OrderResponse(BaseModel):
+    id: int
+    project_id: int
+    vintage: int
+    side: str
+    order_type: str
+    price_per_ton: Optional[float] = None
+    quantity: int
+    quantity_filled: int
+    status: str
+    created_at: str
+    fills: List[FillResponse] = []
+
+class BasketRequest(BaseModel):
+    quantity: int
+    q: Optional[str] = None
+    project_type: Optional[str] = None
+    registry: Optional[str] = None
+    vintage_min: Optional[int] = None
+    vintage_max: Optional[int] = None
+    max_price: Optional[float] = None  # Per ton
+    allow_partial: bool = False  # Buy what is available instead of failing
+
+class BasketFillResponse(BaseModel):
+    listing_id: int
+    project_id: int
+    project_name: str
+    vintage: int
+    seller_id: int
+    quantity: int
+    price_per_ton: float
+
+class BasketResponse(BaseModel):
+    requested: int
+    filled: int
+    status: str  # filled, partial or quote
+    total_cost: float
+    average_price: Optional[float] = None
+    fills: List[BasketFillResponse]
+
+class FacetCount(BaseModel):
+    value: Optional[str] = None
+    count: int
+
+class ListingSearchResponse(BaseModel):
+    results: List[ListingResponse]
+    total: Optional[int] = None
+    facets: Optional[Dict[str, List[FacetCount]]] = None
+    next_cursor: Optional[str] = None
+
+class CandleResponse(BaseModel):
+    registry: str
+    project_type: str
+    vintage: int
+    resolution: str
+    bucket_start: str
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int
+    vwap: float
+    trade_count: int
+
+class TradeResponse(BaseModel):
+    id: int
+    project_id: int
+    vintage: int
+    registry: str
+    project_type: str
+    quantity: int
+    price_per_ton: float
+    source: str
+    executed_at: str
+
+# ============ Listing Queries ============
+
+# Sort options: name -> (column, descending)
+LISTING_SORTS = {
+    "newest": (ListingModel.created_at, True),
+    "oldest": (ListingModel.created_at, False),
+    "price_asc": (ListingModel.price_per_ton_cents, False),
+    "price_desc": (ListingModel.price_per_ton_cents, True),
+    "quantity_desc": (ListingModel.quantity - ListingModel.quantity_sold, True),
+    "vintage_desc": (ListingModel.vintage, True),
+    "vintage_asc": (ListingModel.vintage, False),
+}
+
+def _listing_response(row) -> ListingResponse:
+    listing = row[0]
+    seller_name = profile_display_name(row.seller_profile, row.seller_email) or "Unknown Seller"
+    
+    return ListingResponse(
+        id=listing.id,
+        project_name=row.project_name or f"Project {listing.project_id}",
+        project_type=row.project_type or "unknown",
+        registry=row.registry,
+        vintage=listing.vintage,
+        quantity_available=listing.quantity - listing.quantity_sold,
+        price_per_ton=listing.price_per_ton_cents / 100.0,
+        min_quantity=listing.min_quantity,
+        seller_name=seller_name,
+        seller_id=listing.seller_id,
+        location=row.location
+    )
+
+def _encode_cursor(value, listing_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, listing_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, column):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, listing_id = json.loads(base64.urlsafe_b64decode(padded))
+        if column is ListingModel.created_at:
+            value = datetime.fromisoformat(value)
+        return value, int(listing_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _keyset_page(query, sort: str, cursor: Optional[str], limit: int):
+    """One page of a listing query in (sort column, id) order, plus the next cursor"""
+    if sort not in LISTING_SORTS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort. Options: {', '.join(LISTING_SORTS)}")
+    sort_column, descending = LISTING_SORTS[sort]
+    
+    if cursor:
+        value, last_id = _decode_cursor(cursor, sort_column)
+        if descending:
+            query = query.filter(or_(
+                sort_column < value,
+                and_(sort_column == value, ListingModel.id < last_id)
+            ))
+        else:
+            query = query.filter(or_(
+                sort_column > value,
+                and_(sort_column == value, ListingModel.id > last_id)
+            ))
+    
+    if descending:
+        query = query.order_by(sort_column.desc(), ListingModel.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), ListingModel.id.asc())
+    
+    rows = query.limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        last_value = (
+            last.quantity - last.quantity_sold if sort == "quantity_desc"
+            else getattr(last, sort_column.key)
+        )
+        next_cursor = _encode_cursor(last_value, last.id)
+    
+    return rows, next_cursor
+
+def _listing_event(listing: ListingModel) -> dict:
+    """Payload of listing.* feed events"""
+    return {
+        "listing_id": listing.id,
+        "project_id": listing.project_id,
+        "vintage": listing.vintage,
+        "quantity_available": listing.quantity - listing.quantity_sold,
+        "price_per_ton": listing.price_per_ton_cents / 100.0,
+        "status": listing.status.value,
+    }
+
+def _offer_event(offer: OfferModel) -> dict:
+    """Payload of offer.* feed events"""
+    return {
+        "offer_id": offer.id,
+        "listing_id": offer.listing_id,
+        "quantity": offer.quantity,
+        "price_per_ton": offer.price_per_ton_cents / 100.0,
+        "status": offer.status.value,
+    }
+
 # ============ Endpoints ============
 
 @router.get("/listings", response_model=List[ListingResponse])
 def get_listings(
+    response: Response,
+    q: Optional[str] = None,
     project_type: Optional[str] = None,
     registry: Optional[str] = None,
+    vintage_min: Optional[int] = None,
+    vintage_max: Optional[int] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
+    sort: str = "newest",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get marketplace listings from database"""
+    """
+    Get active marketplace listings.
+    
+    Filtering, sorting and keyset pagination all happen in the database.
+    When more results exist, the X-Next-Cursor response header holds the
+    cursor for the next page.
+    """
+    query, registry_col = listing_query(db)
+    query = ListingSearchService(db).apply_filters(
+        query, registry_col, q, project_type, registry,
+        vintage_min, vintage_max, min_price, max_price
+    )
     
-    query = db.query(ListingModel).filter(ListingModel.status == ListingStatus.ACTIVE)
+    rows, next_cursor = _keyset_page(query, sort, cursor, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
-    listings = query.order_by(ListingModel.created_at.desc()).all()
+    return [_listing_response(row) for row in rows]
+
+@router.get("/search", response_model=ListingSearchResponse)
+def search_listings(
+    q: Optional[str] = None,
+    project_type: Optional[str] = None,
+    registry: Optional[str] = None,
+    vintage_min: Optional[int] = None,
+    vintage_max: Optional[int] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    sort: str = "price_asc",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    include_facets: bool = True,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Search active listings by text (project name, location, type, registry;
+    prefix matching) and filters, with facet counts for the whole result set.
+    
+    Clients paging through results can pass include_facets=false after the
+    first page to skip the facet query.
+    """
+    search = ListingSearchService(db)
+    query, registry_col = listing_query(db)
+    query = search.apply_filters(
+        query, registry_col, q, project_type, registry,
+        vintage_min, vintage_max, min_price, max_price
+    )
     
-    result = []
-    for listing in listings:
-        project = db.query(Project).filter(Project.id == listing.project_id).first()
-        seller = db.query(User).filter(User.id == listing.seller_id).first()
-        
-        project_name = project.name if project else f"Project {listing.project_id}"
-        project_type_val = project.project_type if project else "unknown"
-        
-        registry_val = "VCS"
-        location = "India"
-        if project and project.wizard_data:
-            registry_val = project.wizard_data.get("credit_estimation", {}).get("registry", "VCS")
-            location = project.wizard_data.get("basic_info", {}).get("location", "India")
-        
-        seller_name = "Unknown Seller"
-        if seller and seller.profile_data:
-            seller_name = seller.profile_data.get("company") or seller.profile_data.get("name") or seller.email
-        
-        price_per_ton = listing.price_per_ton_cents / 100.0
-        
-        # Apply filters
-        if project_type and project_type != "all" and project_type_val.lower() != project_type.lower():
-            continue
-        if registry and registry != "all" and registry_val.lower() != registry.lower():
-            continue
-        if min_price is not None and price_per_ton < min_price:
-            continue
-        if max_price is not None and price_per_ton > max_price:
-            continue
-        
-        result.append(ListingResponse(
-            id=listing.id,
-            project_name=project_name,
-            project_type=project_type_val,
-            registry=registry_val,
-            vintage=listing.vintage,
-            quantity_available=listing.quantity - listing.quantity_sold,
-            price_per_ton=price_per_ton,
-            min_quantity=listing.min_quantity,
-            seller_name=seller_name,
-            seller_id=listing.seller_id,
-            location=location
-        ))
+    rows, next_cursor = _keyset_page(query, sort, cursor, limit)
     
-    return result
+    summary = search.facets(query, registry_col) if include_facets else None
+    
+    return ListingSearchResponse(
+        results=[_listing_response(row) for row in rows],
+        total=summary["total"] if summary else None,
+        facets=summary["facets"] if summary else None,
+        next_cursor=next_cursor
+    )
 
 @router.get("/listings/{listing_id}", response_model=ListingResponse)
 def get_listing(listing_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get a specific listing"""
     
-    listing = db.query(ListingModel).filter(ListingModel.id == listing_id).first()
+    query, _ = listing_query(db)
+    row = query.filter(ListingModel.id == listing_id).first()
     
-    if not listing:
+    if not row:
         raise HTTPException(status_code=404, detail="Listing not found")
     
-    project = db.query(Project).filter(Project.id == listing.project_id).first()
-    seller = db.query(User).filter(User.id == listing.seller_id).first()
-    
-    project_name = project.name if project else f"Project {listing.project_id}"
-    project_type = project.project_type if project else "unknown"
-    registry = "VCS"
-    location = "India"
-    if project and project.wizard_data:
-        registry = project.wizard_data.get("credit_estimation", {}).get("registry", "VCS")
-        location = project.wizard_data.get("basic_info", {}).get("location", "India")
-    
-    seller_name = seller.profile_data.get("company", seller.email) if seller and seller.profile_data else "Unknown"
-    
-    return ListingResponse(
-        id=listing.id,
-        project_name=project_name,
-        project_type=project_type,
-        registry=registry,
-        vintage=listing.vintage,
-        quantity_available=listing.quantity - listing.quantity_sold,
-        price_per_ton=listing.price_per_ton_cents / 100.0,
-        min_quantity=listing.min_quantity,
-        seller_name=seller_name,
-        seller_id=listing.seller_id,
-        location=location
-    )
+    return _listing_response(row)
 
 @router.post("/listings")
-def create_listing(request: CreateListingRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def create_listing(
+    request: CreateListingRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """Create a new listing"""
-    
+    return run_idempotent(
+        db, current_user.id, idempotency_key, "create_listing", request,
+        lambda: _create_listing(request, current_user, db)
+    )
+
+def _create_listing(request: CreateListingRequest, current_user: User, db: Session):
     holding = db.query(CreditHolding).filter(
         CreditHolding.id == request.holding_id,
         CreditHolding.user_id == current_user.id
-    ).first()
+    ).with_for_update().first()
     
     if not holding:
         raise HTTPException(status_code=404, detail="Holding not found")
     
+    if request.quantity <= 0:
+        raise HTTPException(status_code=400, detail="Quantity must be positive")
+    
     if holding.available < request.quantity:
         raise HTTPException(status_code=400, detail="Insufficient available credits")
     
@@ -188,21 +400,29 @@ def create_listing(request: CreateListingRequest, current_user: User = Depends(g
         expires_at=datetime.utcnow() + timedelta(days=30)
     )
     db.add(listing)
+    db.flush()
     
     # Lock credits
     holding.available -= request.quantity
     holding.locked += request.quantity
+    LedgerService(db).lock(
+        current_user.id, holding.project_id, holding.vintage, request.quantity,
+        reference=f"listing:{listing.id}"
+    )
     
-    db.commit()
+    db.flush()
     db.refresh(listing)
     
+    market_feed.publish_on_commit(db, "listing.created", _listing_event(listing))
+    
     return {"success": True, "listing_id": listing.id}
 
 @router.get("/offers", response_model=List[OfferResponse])
 def get_offers(
     status: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """Get user's offers from database"""
     
@@ -218,18 +438,19 @@ def get_offers(
     
     offers = query.order_by(OfferModel.created_at.desc()).all()
     
+    listings = loaders.listings.load_many(o.listing_id for o in offers).values()
+    loaders.projects.prime(l.project_id for l in listings if l)
+    loaders.users.prime(l.seller_id for l in listings if l)
+    
     result = []
     for offer in offers:
-        listing = db.query(ListingModel).filter(ListingModel.id == offer.listing_id).first()
-        project = db.query(Project).filter(Project.id == listing.project_id).first() if listing else None
-        seller = db.query(User).filter(User.id == listing.seller_id).first() if listing else None
+        listing = loaders.listings.get(offer.listing_id)
+        project = loaders.projects.get(listing.project_id) if listing else None
         
         project_name = project.name if project else "Unknown Project"
-        seller_name = seller.profile_data.get("company", seller.email) if seller and seller.profile_data else "Unknown"
+        seller_name = loaders.user_name(listing.seller_id, "Unknown") if listing else "Unknown"
         
-        registry = "VCS"
-        if project and project.wizard_data:
-            registry = project.wizard_data.get("credit_estimation", {}).get("registry", "VCS")
+        registry = (project.registry if project else None) or "VCS"
         
         expires_in = None
         if offer.expires_at:
@@ -258,9 +479,19 @@ def get_offers(
     return result
 
 @router.post("/offers")
-def create_offer(offer: CreateOfferRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def create_offer(
+    offer: CreateOfferRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """Create a new offer on a listing"""
-    
+    return run_idempotent(
+        db, current_user.id, idempotency_key, "create_offer", offer,
+        lambda: _create_offer(offer, current_user, db)
+    )
+
+def _create_offer(offer: CreateOfferRequest, current_user: User, db: Session):
     listing = db.query(ListingModel).filter(
         ListingModel.id == offer.listing_id,
         ListingModel.status == ListingStatus.ACTIVE
@@ -285,40 +516,105 @@ def create_offer(offer: CreateOfferRequest, current_user: User = Depends(get_cur
         expires_at=datetime.utcnow() + timedelta(days=7)
     )
     db.add(new_offer)
-    db.commit()
+    db.flush()
     db.refresh(new_offer)
     
+    market_feed.publish_on_commit(
+        db, "offer.created", _offer_event(new_offer), audience=[new_offer.buyer_id, listing.seller_id]
+    )
+    
     return {"success": True, "offer_id": new_offer.id}
 
 @router.put("/offers/{offer_id}/accept")
-def accept_offer(offer_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def accept_offer(
+    offer_id: int,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """Accept an offer (seller action)"""
-    
-    offer = db.query(OfferModel).filter(OfferModel.id == offer_id).first()
+    return run_idempotent(
+        db, current_user.id, idempotency_key, f"accept_offer:{offer_id}", None,
+        lambda: _accept_offer(offer_id, current_user, db)
+    )
+
+def _accept_offer(offer_id: int, current_user: User, db: Session):
+    # Row locks in a fixed order (offer, listing, holdings) so concurrent
+    # accepts on the same listing queue up instead of overselling, while
+    # trades on other listings proceed in parallel
+    offer = db.query(OfferModel).filter(OfferModel.id == offer_id).with_for_update().first()
     if not offer:
         raise HTTPException(status_code=404, detail="Offer not found")
     
-    listing = db.query(ListingModel).filter(ListingModel.id == offer.listing_id).first()
+    listing = db.query(ListingModel).filter(
+        ListingModel.id == offer.listing_id
+    ).populate_existing().with_for_update().first()
     if not listing or listing.seller_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    if offer.status not in (OfferStatus.PENDING, OfferStatus.COUNTER):
+        raise HTTPException(status_code=400, detail=f"Offer is already {offer.status.value}")
+    
+    if listing.status != ListingStatus.ACTIVE or offer.quantity > (listing.quantity - listing.quantity_sold):
+        raise HTTPException(status_code=400, detail="Listing no longer has enough credits")
+    
     offer.status = OfferStatus.ACCEPTED
     offer.responded_at = datetime.utcnow()
     
+    seller_holding = db.query(CreditHolding).filter(
+        CreditHolding.id == listing.holding_id
+    ).populate_existing().with_for_update().one()
+    
+    # Move the credits locked by the listing to the buyer
+    try:
+        OrderBookService(db).settle_trade(
+            seller_holding,
+            buyer_id=offer.buyer_id,
+            quantity=offer.quantity,
+            price_per_ton_cents=offer.price_per_ton_cents,
+            notes=f"Offer #{offer.id} on listing #{listing.id}",
+            reference=f"offer:{offer.id}"
+        )
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    
     # Update listing
     listing.quantity_sold += offer.quantity
     if listing.quantity_sold >= listing.quantity:
         listing.status = ListingStatus.SOLD
     
-    db.commit()
+    market_feed.publish_on_commit(
+        db, "offer.accepted", _offer_event(offer), audience=[offer.buyer_id, listing.seller_id]
+    )
+    market_feed.publish_on_commit(
+        db, "listing.sold" if listing.status == ListingStatus.SOLD else "listing.updated",
+        _listing_event(listing)
+    )
+    market_feed.publish_on_commit(db, "trade", {
+        "project_id": listing.project_id,
+        "vintage": listing.vintage,
+        "quantity": offer.quantity,
+        "price_per_ton": offer.price_per_ton_cents / 100.0,
+    })
     
     return {"success": True}
 
 @router.put("/offers/{offer_id}/reject")
-def reject_offer(offer_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def reject_offer(
+    offer_id: int,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     """Reject an offer"""
-    
-    offer = db.query(OfferModel).filter(OfferModel.id == offer_id).first()
+    return run_idempotent(
+        db, current_user.id, idempotency_key, f"reject_offer:{offer_id}", None,
+        lambda: _reject_offer(offer_id, current_user, db)
+    )
+
+def _reject_offer(offer_id: int, current_user: User, db: Session):
+    offer = db.query(OfferModel).filter(OfferModel.id == offer_id).with_for_update().first()
     if not offer:
         raise HTTPException(status_code=404, detail="Offer not found")
     
@@ -326,9 +622,15 @@ def reject_offer(offer_id: int, current_user: User = Depends(get_current_user),
     if not listing or listing.seller_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    if offer.status not in (OfferStatus.PENDING, OfferStatus.COUNTER):
+        raise HTTPException(status_code=400, detail=f"Offer is already {offer.status.value}")
+    
     offer.status = OfferStatus.REJECTED
     offer.responded_at = datetime.utcnow()
-    db.commit()
+    
+    market_feed.publish_on_commit(
+        db, "offer.rejected", _offer_event(offer), audience=[offer.buyer_id, listing.seller_id]
+    )
     
     return {"success": True}
 
@@ -336,24 +638,346 @@ def reject_offer(offer_id: int, current_user: User = Depends(get_current_user),
 def get_marketplace_stats(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get marketplace statistics from database"""
     
-    active_listings = db.query(ListingModel).filter(ListingModel.status == ListingStatus.ACTIVE).all()
+    return PriceHistoryService(db).get_market_stats()
+
+# ============ Baskets ============
+
+def _basket_criteria(request: BasketRequest) -> BasketCriteria:
+    return BasketCriteria(
+        q=request.q,
+        project_type=request.project_type,
+        registry=request.registry,
+        vintage_min=request.vintage_min,
+        vintage_max=request.vintage_max,
+        max_price_cents=int(round(request.max_price * 100)) if request.max_price is not None else None
+    )
+
+def _basket_response(result: BasketResult, status: str) -> BasketResponse:
+    filled = result.filled
+    return BasketResponse(
+        requested=result.requested,
+        filled=filled,
+        status=status,
+        total_cost=result.total_cents / 100.0,
+        average_price=round(result.total_cents / filled / 100.0, 4) if filled else None,
+        fills=[
+            BasketFillResponse(
+                listing_id=f.listing_id,
+                project_id=f.project_id,
+                project_name=f.project_name or f"Project {f.project_id}",
+                vintage=f.vintage,
+                seller_id=f.seller_id,
+                quantity=f.quantity,
+                price_per_ton=f.price_cents / 100.0
+            )
+            for f in result.fills
+        ]
+    )
+
+@router.post("/baskets/quote", response_model=BasketResponse)
+def quote_basket(
+    request: BasketRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Preview the fills a basket would get at current prices, without buying"""
+    try:
+        result = BasketService(db).quote(current_user.id, request.quantity, _basket_criteria(request))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _basket_response(result, "quote")
+
+@router.post("/baskets", response_model=BasketResponse)
+def buy_basket(
+    request: BasketRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Buy a quantity across the cheapest matching listings in one transaction"""
+    return run_idempotent(
+        db, current_user.id, idempotency_key, "buy_basket", request,
+        lambda: _buy_basket(request, current_user, db)
+    )
+
+def _buy_basket(request: BasketRequest, current_user: User, db: Session):
+    try:
+        result = BasketService(db).execute(
+            current_user.id,
+            request.quantity,
+            _basket_criteria(request),
+            allow_partial=request.allow_partial
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    for listing in result.listings:
+        market_feed.publish_on_commit(
+            db, "listing.sold" if listing.status == ListingStatus.SOLD else "listing.updated",
+            _listing_event(listing)
+        )
+    for f in result.fills:
+        market_feed.publish_on_commit(db, "trade", {
+            "project_id": f.project_id,
+            "vintage": f.vintage,
+            "quantity": f.quantity,
+            "price_per_ton": f.price_cents / 100.0,
+        })
+    
+    status = "filled" if result.filled >= result.requested else "partial"
+    return _basket_response(result, status)
+
+# ============ Live Feed ============
+
+@router.get("/stream")
+async def stream_marketplace(
+    request: Request,
+    events: Optional[str] = None,
+    user_id: int = Depends(get_current_user_id)
+):
+    """
+    Server-sent events: listing.created/updated/sold, offer.* (own offers
+    only), trade and stats. `events` is an optional comma-separated filter.
+    A `resync` event means the connection fell behind and should refetch.
+    """
+    event_types = [e.strip() for e in events.split(",") if e.strip()] if events else None
+    subscriber = market_feed.connect(user_id, event_types)
+    
+    async def frames():
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                yield await market_feed.next_frame(subscriber)
+        finally:
+            market_feed.disconnect(subscriber)
+    
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/candles", response_model=List[CandleResponse])
+def get_candles(
+    resolution: str = "1d",
+    registry: Optional[str] = None,
+    project_type: Optional[str] = None,
+    vintage: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(200, ge=1, le=1000),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """OHLC price candles (1h, 1d or 1w) per registry, project type and vintage"""
+    
+    try:
+        candles = PriceHistoryService(db).get_candles(
+            resolution, registry, project_type, vintage, start, end, limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return [
+        CandleResponse(
+            registry=c.registry,
+            project_type=c.project_type,
+            vintage=c.vintage,
+            resolution=c.resolution,
+            bucket_start=c.bucket_start.isoformat(),
+            open=c.open_cents / 100.0,
+            high=c.high_cents / 100.0,
+            low=c.low_cents / 100.0,
+            close=c.close_cents / 100.0,
+            volume=c.volume,
+            vwap=round(c.notional_cents / c.volume / 100.0, 4) if c.volume else c.close_cents / 100.0,
+            trade_count=c.trade_count
+        )
+        for c in candles
+    ]
+
+@router.get("/trades", response_model=List[TradeResponse])
+def get_trades(
+    project_id: Optional[int] = None,
+    vintage: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Most recent completed trades, newest first"""
+    
+    trades = PriceHistoryService(db).get_recent_trades(project_id, vintage, limit)
+    
+    return [
+        TradeResponse(
+            id=t.id,
+            project_id=t.project_id,
+            vintage=t.vintage,
+            registry=t.registry,
+            project_type=t.project_type,
+            quantity=t.quantity,
+            price_per_ton=t.price_per_ton_cents / 100.0,
+            source=t.source.value,
+            executed_at=t.executed_at.isoformat()
+        )
+        for t in trades
+    ]
+
+# ============ Order Book ============
+
+def _order_response(order: MarketOrder, fills: Optional[List[FillResponse]] = None) -> OrderResponse:
+    return OrderResponse(
+        id=order.id,
+        project_id=order.project_id,
+        vintage=order.vintage,
+        side=order.side.value,
+        order_type=order.order_type.value,
+        price_per_ton=order.price_per_ton_cents / 100.0 if order.price_per_ton_cents else None,
+        quantity=order.quantity,
+        quantity_filled=order.quantity_filled,
+        status=order.status.value,
+        created_at=order.created_at.isoformat() if order.created_at else "",
+        fills=fills or []
+    )
+
+@router.post("/orders", response_model=OrderResponse)
+def place_order(
+    request: PlaceOrderRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Place a limit or market order; matching fills are settled immediately"""
+    return run_idempotent(
+        db, current_user.id, idempotency_key, "place_order", request,
+        lambda: _place_order(request, current_user, db)
+    )
+
+def _place_order(request: PlaceOrderRequest, current_user: User, db: Session):
+    price_cents = int(round(request.price_per_ton * 100)) if request.price_per_ton is not None else None
+    
+    try:
+        order, result = OrderBookService(db).place_order(
+            user_id=current_user.id,
+            project_id=request.project_id,
+            vintage=request.vintage,
+            side=request.side,
+            order_type=request.order_type,
+            quantity=request.quantity,
+            price_per_ton_cents=price_cents,
+            holding_id=request.holding_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    fills = [
+        FillResponse(
+            counter_order_id=f.maker_order_id,
+            quantity=f.quantity,
+            price_per_ton=f.price_cents / 100.0
+        )
+        for f in result.fills
+    ]
+    
+    for f in result.fills:
+        market_feed.publish_on_commit(db, "trade", {
+            "project_id": order.project_id,
+            "vintage": order.vintage,
+            "quantity": f.quantity,
+            "price_per_ton": f.price_cents / 100.0,
+        })
+    
+    return _order_response(order, fills)
+
+@router.get("/orders", response_model=List[OrderResponse])
+def get_orders(
+    status: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the current user's orders (status: open, filled, cancelled, ...)"""
+    
+    try:
+        orders = OrderBookService(db).get_user_orders(current_user.id, status)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+    
+    return [_order_response(o) for o in orders]
+
+@router.delete("/orders/{order_id}", response_model=OrderResponse)
+def cancel_order(
+    order_id: int,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Cancel the unfilled part of an order and unlock its credits"""
+    return run_idempotent(
+        db, current_user.id, idempotency_key, f"cancel_order:{order_id}", None,
+        lambda: _cancel_order(order_id, current_user, db)
+    )
+
+def _cancel_order(order_id: int, current_user: User, db: Session):
+    try:
+        order = OrderBookService(db).cancel_order(current_user.id, order_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
     
-    total_volume = sum(l.quantity - l.quantity_sold for l in active_listings)
+    return _order_response(order)
+
+@router.get("/orderbook/{project_id}/{vintage}")
+def get_order_book(
+    project_id: int,
+    vintage: int,
+    depth: int = 10,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Aggregated bid/ask depth of a (project, vintage) book"""
     
-    # Calculate average prices
-    vcs_listings = [l for l in active_listings if l.project and l.project.wizard_data and 
-                   l.project.wizard_data.get("credit_estimation", {}).get("registry") == "VCS"]
-    gs_listings = [l for l in active_listings if l.project and l.project.wizard_data and 
-                  l.project.wizard_data.get("credit_estimation", {}).get("registry") == "Gold Standard"]
+    snapshot = OrderBookService(db).get_book_snapshot(project_id, vintage, max(1, min(depth, 100)))
     
-    avg_vcs = sum(l.price_per_ton_cents for l in vcs_listings) / len(vcs_listings) / 100 if vcs_listings else 8.50
-    avg_gs = sum(l.price_per_ton_cents for l in gs_listings) / len(gs_listings) / 100 if gs_listings else 12.00
+    def levels(side):
+        return [
+            {"price_per_ton": level["price_cents"] / 100.0, "quantity": level["quantity"], "orders": level["orders"]}
+            for level in snapshot[side]
+        ]
     
     return {
-        "total_listings": len(active_listings),
-        "total_volume": total_volume,
-        "avg_vcs_price": avg_vcs,
-        "avg_gs_price": avg_gs,
-        "price_change_24h": 5.2,
-        "volume_24h": total_volume
+        "project_id": project_id,
+        "vintage": vintage,
+        "bids": levels("bids"),
+        "asks": levels("asks"),
+        "best_bid": snapshot["best_bid_cents"] / 100.0 if snapshot["best_bid_cents"] else None,
+        "best_ask": snapshot["best_ask_cents"] / 100.0 if snapshot["best_ask_cents"] else None,
     }
+
+@router.get("/orderbook/{project_id}/{vintage}/events")
+def get_order_book_events(
+    project_id: int,
+    vintage: int,
+    after_id: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Replay a book's event log from after a given event id"""
+    
+    events = OrderBookService(db).get_events(project_id, vintage, after_id, max(1, min(limit, 1000)))
+    
+    return [
+        {
+            "id": e.id,
+            "event_type": e.event_type.value,
+            "order_id": e.order_id,
+            "counter_order_id": e.counter_order_id,
+            "quantity": e.quantity,
+            "price_per_ton": e.price_per_ton_cents / 100.0 if e.price_per_ton_cents else None,
+            "details": e.details,
+            "created_at": e.created_at.isoformat() if e.created_at else None,
+        }
+        for e in events
+    ]
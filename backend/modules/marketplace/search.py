@@ -0,0 +1,164 @@
+"""
+Marketplace Listing Search
+Full-text/prefix matching and facet counts over active listings
+"""
+import re
+from sqlalchemy import String, and_, case, cast, func, literal, select, union_all
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+
+from backend.core.models import (
+    User, Project, MarketListing, ListingStatus,
+    DEFAULT_PROJECT_REGISTRY, DEFAULT_PROJECT_LOCATION,
+    project_search_document, project_search_vector
+)
+
+# Price facet buckets in cents: (label, lower bound inclusive, upper bound exclusive)
+PRICE_BUCKETS = [
+    ("0-5", 0, 500),
+    ("5-10", 500, 1000),
+    ("10-15", 1000, 1500),
+    ("15-20", 1500, 2000),
+    ("20+", 2000, None),
+]
+
+MAX_QUERY_TERMS = 8
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def listing_query(db: Session):
+    """Listings joined with everything ListingResponse needs, in one query"""
+    registry = func.coalesce(Project.registry, DEFAULT_PROJECT_REGISTRY)
+    location = func.coalesce(Project.location, DEFAULT_PROJECT_LOCATION)
+
+    query = db.query(
+        MarketListing,
+        Project.name.label("project_name"),
+        Project.project_type.label("project_type"),
+        registry.label("registry"),
+        location.label("location"),
+        User.email.label("seller_email"),
+        User.profile_data.label("seller_profile"),
+    ).outerjoin(
+        Project, Project.id == MarketListing.project_id
+    ).outerjoin(
+        User, User.id == MarketListing.seller_id
+    )
+    return query, registry
+
+
+def price_bucket():
+    return case(
+        *[
+            (MarketListing.price_per_ton_cents < upper, label)
+            for label, _, upper in PRICE_BUCKETS if upper is not None
+        ],
+        else_=PRICE_BUCKETS[-1][0]
+    )
+
+
+class ListingSearchService:
+    """
+    Filters active listings by free text and facets.
+
+    Text matches run against the listing's project (name, location, type,
+    registry). On Postgres this is a prefix tsquery served by the
+    ix_projects_search GIN index; other databases fall back to LIKE.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.full_text = db.get_bind().dialect.name == "postgresql"
+
+    def apply_filters(
+        self,
+        query,
+        registry_col,
+        q: Optional[str] = None,
+        project_type: Optional[str] = None,
+        registry: Optional[str] = None,
+        vintage_min: Optional[int] = None,
+        vintage_max: Optional[int] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ):
+        """Restrict a query joined to Project to matching active listings"""
+        query = query.filter(MarketListing.status == ListingStatus.ACTIVE)
+
+        text_match = self.text_condition(q)
+        if text_match is not None:
+            query = query.filter(text_match)
+        if project_type and project_type != "all":
+            query = query.filter(func.lower(Project.project_type) == project_type.lower())
+        if registry and registry != "all":
+            query = query.filter(func.lower(registry_col) == registry.lower())
+        if vintage_min is not None:
+            query = query.filter(MarketListing.vintage >= vintage_min)
+        if vintage_max is not None:
+            query = query.filter(MarketListing.vintage <= vintage_max)
+        if min_price is not None:
+            query = query.filter(MarketListing.price_per_ton_cents >= min_price * 100)
+        if max_price is not None:
+            query = query.filter(MarketListing.price_per_ton_cents <= max_price * 100)
+        return query
+
+    def text_condition(self, q: Optional[str]):
+        """Every term must match: as a word prefix on Postgres, as a substring elsewhere"""
+        terms = [t.lower() for t in _TERM.findall(q or "")][:MAX_QUERY_TERMS]
+        if not terms:
+            return None
+
+        if self.full_text:
+            tsquery = " & ".join(f"{t}:*" for t in terms)
+            return project_search_vector(Project).op("@@")(
+                func.to_tsquery("simple", tsquery)
+            )
+
+        document = func.lower(project_search_document(Project))
+        return and_(*[document.like(f"%{t}%") for t in terms])
+
+    def facets(self, filtered_query, registry_col) -> Dict:
+        """
+        Counts per project type, registry, vintage and price bucket for a
+        filtered listing query, in a single round trip. The matches are a
+        CTE so Postgres evaluates the filter once for all four groupings.
+        """
+        matches = filtered_query.with_entities(
+            Project.project_type.label("project_type"),
+            registry_col.label("registry"),
+            MarketListing.vintage.label("vintage"),
+            price_bucket().label("price_bucket"),
+        ).order_by(None).cte("matches")
+
+        def facet(name: str, column):
+            return select(
+                literal(name).label("facet"),
+                cast(column, String).label("value"),
+                func.count().label("count"),
+            ).group_by(column)
+
+        rows = self.db.execute(union_all(
+            facet("project_type", matches.c.project_type),
+            facet("registry", matches.c.registry),
+            facet("vintage", matches.c.vintage),
+            facet("price_bucket", matches.c.price_bucket),
+        )).all()
+
+        result: Dict[str, List[Dict]] = {
+            "project_type": [], "registry": [], "vintage": [], "price_bucket": []
+        }
+        for name, value, count in rows:
+            result[name].append({"value": value, "count": count})
+
+        for name, values in result.items():
+            if name == "price_bucket":
+                order = {label: i for i, (label, _, _) in enumerate(PRICE_BUCKETS)}
+                values.sort(key=lambda v: order.get(v["value"], len(order)))
+            elif name == "vintage":
+                values.sort(key=lambda v: v["value"] or "", reverse=True)
+            else:
+                values.sort(key=lambda v: (-v["count"], v["value"] or ""))
+
+        total = sum(v["count"] for v in result["registry"])
+        return {"total": total, "facets": result}
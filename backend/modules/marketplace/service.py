@@ -0,0 +1,483 @@
+"""
+Marketplace Order Book Service
+Order placement, settlement and the durable event log around the matching engine
+"""
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+
+from backend.core.database import after_commit
+from backend.core.models import (
+    User, Project, CreditHolding,
+    Transaction, TransactionType, TransactionStatus
+)
+from backend.modules.ledger.service import LedgerService
+from backend.modules.marketplace.history import PriceHistoryService
+from backend.modules.marketplace.models import (
+    MarketOrder, OrderEvent,
+    OrderSide, OrderType, OrderStatus, OrderEventType, TradeSource
+)
+from backend.modules.marketplace.orderbook import (
+    BookKey, BookOrder, MatchResult, OrderBook, engine
+)
+
+OPEN_STATUSES = (OrderStatus.OPEN, OrderStatus.PARTIALLY_FILLED)
+# Most a buyer can commit across open buy orders and a market buy's fills
+MAX_OPEN_BUY_CENTS = 100_000_000  # $1,000,000
+
+
+class OrderBookService:
+    """
+    Places and cancels orders on the in-memory books and settles every fill
+    in the same database transaction as the order update. Nothing here
+    commits; the caller does.
+
+    Matching is serialized per book across threads by the book's lock and
+    across processes by a SELECT ... FOR UPDATE of the project row, taken
+    in the same transaction. Under that lock the book is compared with the
+    book's order event log: if another process has logged events since the
+    book was loaded it is reloaded from the open MarketOrder rows first, so
+    no process matches against a stale book. A book being changed is marked
+    current again only once the transaction commits; if it fails or never
+    commits, the next user reloads it, so memory never runs ahead of the
+    database. Holdings are
+    locked before they are changed, since listings and offers update the
+    same rows outside the book lock.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        # One history and ledger service per unit of work so their lookups are shared by every fill
+        self.history = PriceHistoryService(db)
+        self.ledger = LedgerService(db)
+        self._last_event: Optional[OrderEvent] = None
+
+    # ===== Orders =====
+
+    def place_order(
+        self,
+        user_id: int,
+        project_id: int,
+        vintage: int,
+        side: OrderSide,
+        order_type: OrderType,
+        quantity: int,
+        price_per_ton_cents: Optional[int] = None,
+        holding_id: Optional[int] = None,
+    ) -> Tuple[MarketOrder, MatchResult]:
+        """
+        Submit an order and settle any resulting fills.
+
+        Raises:
+            ValueError: If the order is invalid, the seller lacks credits or
+                the buyer would exceed MAX_OPEN_BUY_CENTS
+        """
+        if quantity <= 0:
+            raise ValueError("Quantity must be positive")
+        if order_type == OrderType.LIMIT and (price_per_ton_cents is None or price_per_ton_cents <= 0):
+            raise ValueError("Limit orders need a positive price")
+        if order_type == OrderType.MARKET:
+            price_per_ton_cents = None
+
+        if not self.db.query(Project.id).filter(Project.id == project_id).first():
+            raise ValueError("Project not found")
+
+        key = (project_id, vintage)
+        book = engine.get_book(key)
+
+        with book.lock:
+            try:
+                self._sync(book, lock=True)
+                write = book.begin_write()
+                holding = None
+                if side == OrderSide.SELL:
+                    holding = self._seller_holding(user_id, project_id, vintage, quantity, holding_id)
+                    holding.available -= quantity
+                    holding.locked += quantity
+                else:
+                    self._check_buying_limit(book, BookOrder(
+                        order_id=0,
+                        user_id=user_id,
+                        side=side,
+                        order_type=order_type,
+                        price_cents=price_per_ton_cents,
+                        remaining=quantity,
+                    ))
+
+                order = MarketOrder(
+                    user_id=user_id,
+                    project_id=project_id,
+                    vintage=vintage,
+                    side=side,
+                    order_type=order_type,
+                    price_per_ton_cents=price_per_ton_cents,
+                    quantity=quantity,
+                    quantity_filled=0,
+                    holding_id=holding.id if holding else None,
+                    status=OrderStatus.OPEN,
+                )
+                self.db.add(order)
+                self.db.flush()
+                if holding:
+                    self.ledger.lock(user_id, project_id, vintage, quantity, reference=f"order:{order.id}")
+                self._log(order, OrderEventType.ACCEPTED, quantity=quantity,
+                          price_per_ton_cents=price_per_ton_cents)
+
+                result = book.submit(BookOrder(
+                    order_id=order.id,
+                    user_id=user_id,
+                    side=side,
+                    order_type=order_type,
+                    price_cents=price_per_ton_cents,
+                    remaining=quantity,
+                ))
+                self._apply(order, result)
+
+                self._finish(book, write)
+            except Exception:
+                self.db.rollback()
+                engine.drop_book(key)
+                raise
+
+        self.db.refresh(order)
+        return order, result
+
+    def cancel_order(self, user_id: int, order_id: int) -> Optional[MarketOrder]:
+        """Cancel the unfilled remainder of an open order"""
+        order = self.db.query(MarketOrder).filter(
+            MarketOrder.id == order_id,
+            MarketOrder.user_id == user_id
+        ).first()
+        if not order:
+            return None
+        if order.status not in OPEN_STATUSES:
+            raise ValueError(f"Order is already {order.status.value}")
+
+        key = (order.project_id, order.vintage)
+        book = engine.get_book(key)
+
+        with book.lock:
+            try:
+                self._sync(book, lock=True)
+                # Filled or cancelled by another process meanwhile
+                self.db.refresh(order)
+                if order.status not in OPEN_STATUSES:
+                    raise ValueError(f"Order is already {order.status.value}")
+                write = book.begin_write()
+                book.cancel(order.id)
+                self._cancel_remaining(order, reason="user")
+                self._finish(book, write)
+            except Exception:
+                self.db.rollback()
+                engine.drop_book(key)
+                raise
+
+        self.db.refresh(order)
+        return order
+
+    def get_user_orders(self, user_id: int, status: Optional[str] = None) -> List[MarketOrder]:
+        query = self.db.query(MarketOrder).filter(MarketOrder.user_id == user_id)
+        if status == "open":
+            query = query.filter(MarketOrder.status.in_(OPEN_STATUSES))
+        elif status and status != "all":
+            query = query.filter(MarketOrder.status == OrderStatus(status))
+        return query.order_by(MarketOrder.id.desc()).all()
+
+    def get_book_snapshot(self, project_id: int, vintage: int, levels: int = 10) -> Dict:
+        book = engine.get_book((project_id, vintage))
+        with book.lock:
+            self._sync(book, lock=False)
+            return book.snapshot(levels)
+
+    def get_events(
+        self,
+        project_id: int,
+        vintage: int,
+        after_id: int = 0,
+        limit: int = 100
+    ) -> List[OrderEvent]:
+        """Read a book's event log in order, starting after a known event"""
+        return self.db.query(OrderEvent).filter(
+            OrderEvent.project_id == project_id,
+            OrderEvent.vintage == vintage,
+            OrderEvent.id > after_id
+        ).order_by(OrderEvent.id).limit(limit).all()
+
+    # ===== Settlement =====
+
+    def settle_trade(
+        self,
+        seller_holding: CreditHolding,
+        buyer_id: int,
+        quantity: int,
+        price_per_ton_cents: int,
+        notes: str,
+        buyer_holdings: Optional[Dict[Tuple[int, int, int], CreditHolding]] = None,
+        source: TradeSource = TradeSource.OFFER,
+        reference: Optional[str] = None,
+    ) -> CreditHolding:
+        """
+        Move locked credits from a seller's holding to the buyer, record the
+        purchase and sale transactions and add the trade to the price history.
+        Does not commit.
+
+        Args:
+            seller_holding: Holding the credits are locked in
+            buyer_id: Receiving user
+            quantity: Credits traded
+            price_per_ton_cents: Execution price
+            notes: Transaction notes
+            buyer_holdings: Cache of buyer holdings by (buyer, project, vintage)
+                created earlier in the same unit of work (the session does not
+                autoflush)
+            source: How the trade was matched
+            reference: What the ledger entry points at, e.g. offer:12
+
+        Returns:
+            The buyer's holding
+        """
+        if seller_holding.locked < quantity:
+            raise ValueError("Seller has insufficient locked credits")
+
+        seller_holding.locked -= quantity
+        seller_holding.quantity -= quantity
+
+        buyer_holdings = buyer_holdings if buyer_holdings is not None else {}
+        holding_key = (buyer_id, seller_holding.project_id, seller_holding.vintage)
+        buyer_holding = buyer_holdings.get(holding_key)
+        if buyer_holding is None:
+            buyer_holding = self.db.query(CreditHolding).filter(
+                CreditHolding.user_id == buyer_id,
+                CreditHolding.project_id == seller_holding.project_id,
+                CreditHolding.vintage == seller_holding.vintage
+            ).with_for_update().first()
+        if buyer_holding is None:
+            buyer_holding = CreditHolding(
+                user_id=buyer_id,
+                project_id=seller_holding.project_id,
+                vintage=seller_holding.vintage,
+                quantity=0,
+                available=0,
+                locked=0,
+            )
+            self.db.add(buyer_holding)
+        buyer_holdings[holding_key] = buyer_holding
+
+        buyer_holding.quantity += quantity
+        buyer_holding.available += quantity
+        buyer_holding.unit_price = price_per_ton_cents
+
+        now = datetime.utcnow()
+        amount_cents = quantity * price_per_ton_cents
+        self.db.add(Transaction(
+            user_id=buyer_id,
+            type=TransactionType.PURCHASE,
+            status=TransactionStatus.COMPLETED,
+            quantity=quantity,
+            project_id=seller_holding.project_id,
+            counterparty_id=seller_holding.user_id,
+            amount_cents=amount_cents,
+            notes=notes,
+            completed_at=now
+        ))
+        self.db.add(Transaction(
+            user_id=seller_holding.user_id,
+            type=TransactionType.SALE,
+            status=TransactionStatus.COMPLETED,
+            quantity=quantity,
+            project_id=seller_holding.project_id,
+            counterparty_id=buyer_id,
+            amount_cents=amount_cents,
+            notes=notes,
+            completed_at=now
+        ))
+
+        self.ledger.transfer(
+            seller_holding.user_id, buyer_id,
+            seller_holding.project_id, seller_holding.vintage,
+            quantity, reference=reference
+        )
+
+        self.history.record_trade(
+            project_id=seller_holding.project_id,
+            vintage=seller_holding.vintage,
+            buyer_id=buyer_id,
+            seller_id=seller_holding.user_id,
+            quantity=quantity,
+            price_per_ton_cents=price_per_ton_cents,
+            source=source,
+            executed_at=now,
+        )
+
+        return buyer_holding
+
+    def _apply(self, taker: MarketOrder, result: MatchResult):
+        """Persist a match result: fills, cancellations and order states"""
+        orders = {taker.id: taker}
+        buyer_holdings: Dict[Tuple[int, int, int], CreditHolding] = {}
+
+        def order_row(order_id: int) -> MarketOrder:
+            if order_id not in orders:
+                orders[order_id] = self.db.get(MarketOrder, order_id)
+            return orders[order_id]
+
+        for cancelled in result.self_trade_cancelled:
+            self._cancel_remaining(order_row(cancelled.order_id), reason="self_trade")
+
+        for fill in result.fills:
+            buy_order = order_row(fill.buy_order_id)
+            sell_order = order_row(fill.sell_order_id)
+            seller_holding = self.db.get(CreditHolding, sell_order.holding_id, with_for_update=True, populate_existing=True)
+
+            self.settle_trade(
+                seller_holding,
+                buyer_id=fill.buyer_id,
+                quantity=fill.quantity,
+                price_per_ton_cents=fill.price_cents,
+                notes=f"Order #{fill.buy_order_id} matched with order #{fill.sell_order_id}",
+                buyer_holdings=buyer_holdings,
+                source=TradeSource.ORDER,
+                reference=f"order:{fill.buy_order_id}/{fill.sell_order_id}",
+            )
+
+            for order in (buy_order, sell_order):
+                order.quantity_filled += fill.quantity
+                order.status = (
+                    OrderStatus.FILLED if order.quantity_filled >= order.quantity
+                    else OrderStatus.PARTIALLY_FILLED
+                )
+
+            self._log(
+                orders[fill.taker_order_id], OrderEventType.FILL,
+                counter_order_id=fill.maker_order_id,
+                quantity=fill.quantity,
+                price_per_ton_cents=fill.price_cents,
+                details={"buyer_id": fill.buyer_id, "seller_id": fill.seller_id},
+            )
+
+        if result.cancelled_remaining:
+            self._cancel_remaining(taker, reason="market_order_unfilled")
+
+    def _cancel_remaining(self, order: MarketOrder, reason: str):
+        remaining = order.quantity - order.quantity_filled
+        if order.side == OrderSide.SELL and remaining > 0 and order.holding_id:
+            holding = self.db.get(CreditHolding, order.holding_id, with_for_update=True, populate_existing=True)
+            holding.locked -= remaining
+            holding.available += remaining
+            self.ledger.unlock(
+                order.user_id, order.project_id, order.vintage, remaining,
+                reference=f"order:{order.id}"
+            )
+
+        # quantity_filled keeps whatever was traded before the cancellation
+        order.status = OrderStatus.CANCELLED
+        self._log(order, OrderEventType.CANCELLED, quantity=remaining, details={"reason": reason})
+
+    # ===== Helpers =====
+
+    def _sync(self, book: OrderBook, lock: bool):
+        """
+        Bring a book up to date with the database, optionally taking the
+        cross-process matching lock (the project row) for this transaction
+        """
+        project_id, vintage = book.key
+        if lock:
+            self.db.query(Project.id).filter(Project.id == project_id).with_for_update().first()
+        head = self.db.query(func.max(OrderEvent.id)).filter(
+            OrderEvent.project_id == project_id,
+            OrderEvent.vintage == vintage
+        ).scalar() or 0
+        if book.head != head:
+            book.reload(self._load_open_orders(book.key), head)
+
+    def _finish(self, book: OrderBook, write: object):
+        """Flush the unit of work; the book is recorded as current with it once the caller commits"""
+        self.db.flush()
+        if self._last_event is not None:
+            head = self._last_event.id
+            after_commit(self.db, lambda: book.end_write(write, head))
+
+    def _check_buying_limit(self, book: OrderBook, order: BookOrder):
+        """
+        Raises:
+            ValueError: If the order's worst-case cost plus the buyer's open
+                buy orders exceeds MAX_OPEN_BUY_CENTS
+        """
+        # Serializes a buyer's concurrent orders on different books
+        self.db.query(User.id).filter(User.id == order.user_id).with_for_update().first()
+        committed = self.db.query(
+            func.sum((MarketOrder.quantity - MarketOrder.quantity_filled) * MarketOrder.price_per_ton_cents)
+        ).filter(
+            MarketOrder.user_id == order.user_id,
+            MarketOrder.side == OrderSide.BUY,
+            MarketOrder.order_type == OrderType.LIMIT,
+            MarketOrder.status.in_(OPEN_STATUSES)
+        ).scalar() or 0
+        # A limit buy never pays more than its price; a market buy takes what the book offers
+        cost = (
+            order.remaining * order.price_cents if order.order_type == OrderType.LIMIT
+            else book.market_cost(order)
+        )
+        if committed + cost > MAX_OPEN_BUY_CENTS:
+            raise ValueError(
+                f"Order would exceed the buying limit of ${MAX_OPEN_BUY_CENTS / 100:,.2f} "
+                f"(${committed / 100:,.2f} already committed to open buy orders)"
+            )
+
+    def _seller_holding(
+        self,
+        user_id: int,
+        project_id: int,
+        vintage: int,
+        quantity: int,
+        holding_id: Optional[int]
+    ) -> CreditHolding:
+        query = self.db.query(CreditHolding).filter(
+            CreditHolding.user_id == user_id,
+            CreditHolding.project_id == project_id,
+            CreditHolding.vintage == vintage
+        )
+        if holding_id is not None:
+            query = query.filter(CreditHolding.id == holding_id)
+        else:
+            query = query.order_by(CreditHolding.available.desc())
+
+        holding = query.with_for_update().first()
+        if not holding:
+            raise ValueError("Holding not found")
+        if holding.available < quantity:
+            raise ValueError("Insufficient available credits")
+        return holding
+
+    def _load_open_orders(self, key: BookKey) -> List[BookOrder]:
+        """Open limit orders of a book in time priority, for rebuilding it"""
+        project_id, vintage = key
+        rows = self.db.query(MarketOrder).filter(
+            MarketOrder.project_id == project_id,
+            MarketOrder.vintage == vintage,
+            MarketOrder.order_type == OrderType.LIMIT,
+            MarketOrder.status.in_(OPEN_STATUSES)
+        ).order_by(MarketOrder.id).all()
+
+        return [
+            BookOrder(
+                order_id=row.id,
+                user_id=row.user_id,
+                side=row.side,
+                order_type=row.order_type,
+                price_cents=row.price_per_ton_cents,
+                remaining=row.quantity - row.quantity_filled,
+            )
+            for row in rows
+        ]
+
+    def _log(self, order: MarketOrder, event_type: OrderEventType, **fields):
+        self._last_event = OrderEvent(
+            project_id=order.project_id,
+            vintage=order.vintage,
+            event_type=event_type,
+            order_id=order.id,
+            **fields
+        )
+        self.db.add(self._last_event)
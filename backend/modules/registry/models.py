@@ -1,8 +1,8 @@
 """
 Registry System Models
-Models for registry reviews, issuance, and credit batches
+Models for registry reviews, issuance, credit batches and their reconciliation
 """
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Enum as SQLEnum, JSON, Float
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, DateTime, Text, Enum as SQLEnum, JSON, Float
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from backend.core.database import Base
@@ -33,6 +33,13 @@ class CreditStatus(str, enum.Enum):
     RETIRED = "RETIRED"
 
 
+class ReconciliationStatus(str, enum.Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
 class CreditType(str, enum.Enum):
     VER = "VER"      # Verified Emission Reductions
     VCU = "VCU"      # Verified Carbon Units
@@ -174,3 +181,23 @@ class CreditBatch(Base):
     # Relationships
     issuance = relationship("IssuanceRecord", backref="batches")
     owner = relationship("User", backref="credit_batches")
+
+
+class ReconciliationRun(Base):
+    """A pass of the credit batch / holding / transaction reconciliation and what it found"""
+    __tablename__ = "reconciliation_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(SQLEnum(ReconciliationStatus), default=ReconciliationStatus.QUEUED)
+    repair = Column(Boolean, default=False)  # Whether repairable drift is fixed, or only reported
+    requested_by = Column(Integer, ForeignKey("users.id"), nullable=True)  # None for the nightly run
+
+    positions_checked = Column(Integer, default=0)  # (owner, project, vintage) keys compared
+    drift_count = Column(Integer, default=0)
+    repaired_count = Column(Integer, default=0)
+    findings = Column(JSON)  # {check: {"count": n, "items": [...]}}
+    error = Column(Text)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
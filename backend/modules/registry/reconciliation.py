@@ -0,0 +1,296 @@
+"""
+Credit Reconciliation
+Merge-joins registry credit batches, wallet holdings and transactions per
+owner, project and vintage, and reports or repairs the drift between them
+"""
+import itertools
+import logging
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+from backend.core.database import SessionLocal
+from backend.core.models import CreditHolding, Transaction, TransactionType, TransactionStatus
+from backend.core.tasks import register_task, scheduler
+from backend.modules.ledger.service import LedgerService
+from backend.modules.registry.models import (
+    CreditBatch, CreditStatus, IssuanceRecord, ReconciliationRun, ReconciliationStatus
+)
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_TASK = "registry.reconcile"
+RECONCILE_INTERVAL_SECONDS = 24 * 3600
+# The scheduler fires at every process start; a nightly run is skipped if
+# another run started more recently than this
+RECONCILE_MIN_GAP_SECONDS = RECONCILE_INTERVAL_SECONDS - 3600
+# Grouped rows fetched per round trip of each stream
+STREAM_BATCH = 5000
+# Findings listed per check; the counts are always complete
+MAX_REPORTED_ISSUES = 50
+# Positions repaired per run; the next run continues
+MAX_REPAIRS = 1000
+
+# Batch statuses whose credits are still with the batch owner
+HELD_STATUSES = (CreditStatus.OWNED, CreditStatus.LISTED, CreditStatus.LOCKED)
+
+# Sign of each completed transaction type in the owner's credit quantity;
+# retirements leave CreditHolding.quantity unchanged
+QUANTITY_SIGNS = {
+    TransactionType.ISSUANCE: 1,
+    TransactionType.PURCHASE: 1,
+    TransactionType.TRANSFER_IN: 1,
+    TransactionType.SALE: -1,
+    TransactionType.TRANSFER_OUT: -1,
+}
+
+CHECKS = ("missing_holdings", "missing_batches", "quantity_mismatches", "transaction_mismatches")
+
+
+def merge_join(left: Iterator, right: Iterator, left_key, right_key) -> Iterator[Tuple]:
+    """
+    Full outer join of two iterators sorted by unique keys, as
+    (key, left row or None, right row or None). Holds one row of each.
+    """
+    sentinel = object()
+    a, b = next(left, sentinel), next(right, sentinel)
+    while a is not sentinel or b is not sentinel:
+        ka = left_key(a) if a is not sentinel else None
+        kb = right_key(b) if b is not sentinel else None
+        if b is sentinel or (a is not sentinel and ka < kb):
+            yield ka, a, None
+            a = next(left, sentinel)
+        elif a is sentinel or kb < ka:
+            yield kb, None, b
+            b = next(right, sentinel)
+        else:
+            yield ka, a, b
+            a, b = next(left, sentinel), next(right, sentinel)
+
+
+class ReconciliationEngine:
+    """
+    Compares the registry's view of who owns which credits (CreditBatch
+    owner and status) with the wallet's (CreditHolding counters) and with
+    the completed transactions that moved them.
+
+    Each side is one GROUP BY query streamed in key order, STREAM_BATCH
+    rows at a time, and the streams are merge-joined: memory stays
+    constant however many owners there are, and the database does all
+    per-row work. Checks:
+
+        missing_holdings: batches held by an owner with no holding row
+            for the project and vintage; credits issued but never
+            credited (issuances processed before holdings were). The
+            only repairable drift: repair credits the holding, the
+            ledger and an ISSUANCE transaction.
+        missing_batches: a holding with credits but no batches (seeded
+            or bought credits)
+        quantity_mismatches: held or retired quantities that differ
+            between batches and the holding. Batches are not moved by
+            marketplace trades, so sellers and buyers show up here;
+            reported for review, never repaired automatically.
+        transaction_mismatches: an owner's holdings of a project that
+            differ from the net of their completed transactions
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def run(self, repair: bool = False) -> Dict:
+        """Reconcile everything; with repair, fix up to MAX_REPAIRS missing holdings and commit"""
+        findings = {check: {"count": 0, "items": []} for check in CHECKS}
+        repairs: List[Tuple[int, int, int, int, int]] = []
+        positions = 0
+
+        def report(check: str, item: Dict):
+            findings[check]["count"] += 1
+            if len(findings[check]["items"]) < MAX_REPORTED_ISSUES:
+                findings[check]["items"].append(item)
+
+        def owner_projects() -> Iterator[Tuple[Tuple[int, int], int]]:
+            """Per-position checks; yields each (owner, project) with its total holding quantity"""
+            nonlocal positions
+            joined = merge_join(self._batches(), self._holdings(), lambda r: tuple(r[:3]), lambda r: tuple(r[:3]))
+            for owner_project, group in itertools.groupby(joined, key=lambda j: j[0][:2]):
+                quantity = 0
+                for key, batch, holding in group:
+                    positions += 1
+                    owner_id, project_id, vintage = key
+                    position = {"owner_id": owner_id, "project_id": project_id, "vintage": vintage}
+                    batch_held, batch_retired = (int(batch[3] or 0), int(batch[4] or 0)) if batch else (0, 0)
+                    if holding:
+                        held = int(holding[4] or 0) + int(holding[5] or 0)
+                        retired = max(int(holding[3] or 0) - held, 0)
+                        quantity += int(holding[3] or 0)
+
+                    if batch and not holding:
+                        if batch_held or batch_retired:
+                            report("missing_holdings", {**position, "batch_held": batch_held, "batch_retired": batch_retired})
+                            if repair and len(repairs) < MAX_REPAIRS:
+                                repairs.append((owner_id, project_id, vintage, batch_held, batch_retired))
+                    elif holding and not batch:
+                        if held or retired:
+                            report("missing_batches", {**position, "held": held, "retired": retired})
+                    elif (batch_held, batch_retired) != (held, retired):
+                        report("quantity_mismatches", {
+                            **position, "batch_held": batch_held, "batch_retired": batch_retired,
+                            "held": held, "retired": retired,
+                        })
+                yield owner_project, quantity
+
+        for key, held, transactions in merge_join(owner_projects(), self._transactions(), lambda r: r[0], lambda r: tuple(r[:2])):
+            quantity = held[1] if held else 0
+            net = int(transactions[2] or 0) if transactions else 0
+            if quantity != net:
+                report("transaction_mismatches", {
+                    "owner_id": key[0], "project_id": key[1], "holdings": quantity, "transactions": net,
+                })
+
+        repaired = self._repair(repairs) if repairs else 0
+        return {
+            "positions_checked": positions,
+            "drift_count": sum(f["count"] for f in findings.values()),
+            "repaired_count": repaired,
+            "findings": findings,
+        }
+
+    # ===== Streams =====
+
+    def _batches(self):
+        """(owner, project, vintage, held, retired) from credit batches"""
+        vintage = func.coalesce(CreditBatch.vintage_year, IssuanceRecord.vintage_year)
+        return iter(self.db.query(
+            CreditBatch.owner_id,
+            IssuanceRecord.project_id,
+            vintage,
+            func.sum(case((CreditBatch.status.in_(HELD_STATUSES), CreditBatch.quantity), else_=0)),
+            func.sum(case((CreditBatch.status == CreditStatus.RETIRED, CreditBatch.quantity), else_=0)),
+        ).join(
+            IssuanceRecord, IssuanceRecord.id == CreditBatch.issuance_id
+        ).filter(
+            vintage.isnot(None)
+        ).group_by(
+            CreditBatch.owner_id, IssuanceRecord.project_id, vintage
+        ).order_by(
+            CreditBatch.owner_id, IssuanceRecord.project_id, vintage
+        ).yield_per(STREAM_BATCH))
+
+    def _holdings(self):
+        """(owner, project, vintage, quantity, available, locked) from holdings"""
+        return iter(self.db.query(
+            CreditHolding.user_id,
+            CreditHolding.project_id,
+            CreditHolding.vintage,
+            func.sum(CreditHolding.quantity),
+            func.sum(CreditHolding.available),
+            func.sum(func.coalesce(CreditHolding.locked, 0)),
+        ).group_by(
+            CreditHolding.user_id, CreditHolding.project_id, CreditHolding.vintage
+        ).order_by(
+            CreditHolding.user_id, CreditHolding.project_id, CreditHolding.vintage
+        ).yield_per(STREAM_BATCH))
+
+    def _transactions(self):
+        """(owner, project, net quantity) from completed transactions"""
+        signed = case(
+            *[(Transaction.type == t, Transaction.quantity * sign) for t, sign in QUANTITY_SIGNS.items()],
+            else_=0
+        )
+        return iter(self.db.query(
+            Transaction.user_id,
+            Transaction.project_id,
+            func.sum(signed),
+        ).filter(
+            Transaction.status == TransactionStatus.COMPLETED,
+            Transaction.project_id.isnot(None)
+        ).group_by(
+            Transaction.user_id, Transaction.project_id
+        ).order_by(
+            Transaction.user_id, Transaction.project_id
+        ).yield_per(STREAM_BATCH))
+
+    # ===== Repair =====
+
+    def _repair(self, repairs: List[Tuple[int, int, int, int, int]]) -> int:
+        """Credit never-credited batches to their owners: holding, ledger and transaction. Commits."""
+        ledger = LedgerService(self.db)
+        now = datetime.utcnow()
+        try:
+            for owner_id, project_id, vintage, held, retired in repairs:
+                quantity = held + retired
+                self.db.add(CreditHolding(
+                    user_id=owner_id, project_id=project_id, vintage=vintage,
+                    quantity=quantity, available=held, locked=0, acquired_date=now
+                ))
+                ledger.issue(owner_id, project_id, vintage, quantity, reference="reconciliation")
+                if retired:
+                    ledger.retire(owner_id, project_id, vintage, retired, reference="reconciliation")
+                self.db.add(Transaction(
+                    user_id=owner_id,
+                    type=TransactionType.ISSUANCE,
+                    status=TransactionStatus.COMPLETED,
+                    quantity=quantity,
+                    project_id=project_id,
+                    notes="Credited by reconciliation",
+                    created_at=now,
+                    completed_at=now,
+                ))
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return len(repairs)
+
+
+def reconcile(db: Session, run: ReconciliationRun) -> ReconciliationRun:
+    """Execute a recorded run and store its outcome. Commits."""
+    run.status = ReconciliationStatus.RUNNING
+    run.started_at = datetime.utcnow()
+    db.commit()
+    try:
+        result = ReconciliationEngine(db).run(repair=bool(run.repair))
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Reconciliation run {run.id} failed: {e}")
+        run.status = ReconciliationStatus.FAILED
+        run.error = str(e)
+    else:
+        run.status = ReconciliationStatus.COMPLETED
+        for field, value in result.items():
+            setattr(run, field, value)
+    run.finished_at = datetime.utcnow()
+    db.commit()
+    return run
+
+
+@register_task(RECONCILE_TASK)
+def reconcile_credits(payload: Dict) -> Dict[str, Optional[int]]:
+    """Task handler: run a queued reconciliation, or a nightly report-only one unless a run started recently"""
+    db = SessionLocal()
+    try:
+        run = None
+        if payload.get("run_id"):
+            run = db.query(ReconciliationRun).filter(ReconciliationRun.id == payload["run_id"]).first()
+        if run is None:
+            recent = db.query(ReconciliationRun).filter(
+                ReconciliationRun.started_at >= datetime.utcnow() - timedelta(seconds=RECONCILE_MIN_GAP_SECONDS),
+                ReconciliationRun.status != ReconciliationStatus.FAILED
+            ).order_by(ReconciliationRun.started_at.desc()).first()
+            if recent is not None and not payload.get("repair"):
+                logger.info(f"Skipping reconciliation: run {recent.id} started at {recent.started_at}")
+                return {"run_id": None, "drift": None, "repaired": None}
+            run = ReconciliationRun(repair=bool(payload.get("repair")), status=ReconciliationStatus.QUEUED)
+            db.add(run)
+            db.commit()
+        elif run.status != ReconciliationStatus.QUEUED:
+            # Redelivered task; the run already happened or is in progress
+            return {"run_id": run.id, "drift": run.drift_count, "repaired": run.repaired_count}
+        run = reconcile(db, run)
+        return {"run_id": run.id, "drift": run.drift_count, "repaired": run.repaired_count}
+    finally:
+        db.close()
+
+
+scheduler.every(RECONCILE_INTERVAL_SECONDS, RECONCILE_TASK)
@@ -2,19 +2,25 @@
 Registry System Router
 API endpoints for registry operations
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
+from backend.core.container import get_task_queue
 from backend.core.database import get_db
 from backend.core.models import User
+from backend.core.ports import TaskQueuePort
 from backend.modules.auth.router import get_current_user
+from backend.modules.registry.issuance import IssuanceAllocation, ISSUANCE_BATCH_SIZE, MAX_BATCH_SIZE
+from backend.modules.registry.models import ReconciliationRun, ReconciliationStatus
+from backend.modules.registry.reconciliation import RECONCILE_TASK
 from backend.modules.registry.service import RegistryService
+from backend.modules.superadmin.dependencies import get_current_superadmin
 from backend.modules.registry.schemas import (
     RegistryReviewCreate, RegistryReviewUpdate, RegistryReviewResponse,
     RegistryQueryCreate, RegistryQueryResponse, QueryResponseSubmit,
-    IssuanceRequest, IssuanceResponse, IssuanceUpdate,
-    CreditBatchResponse,
+    IssuanceRequest, IssuanceResponse, IssuanceUpdate, IssuanceProcessRequest,
+    CreditBatchResponse, ReconciliationRunSummary, ReconciliationRunResponse,
     RegistryDashboardStats, RegistryProjectSummary,
     RegistryProfileResponse, RegistryProfileUpdate, RegistryPasswordChange
 )
@@ -220,16 +226,27 @@ def process_issuance(
     issuance_id: int,
     registry_reference_id: str,
     certificate_url: str = None,
+    batch_size: int = Query(ISSUANCE_BATCH_SIZE, ge=1, le=MAX_BATCH_SIZE),
+    request: Optional[IssuanceProcessRequest] = None,
     current_user: User = Depends(require_registry_user),
     service: RegistryService = Depends(get_registry_service)
 ):
-    """Process and complete an issuance (create credits)"""
-    issuance = service.process_issuance(
-        issuance_id, 
-        current_user.id,
-        registry_reference_id,
-        certificate_url
-    )
+    """Process and complete an issuance (create credits in batches of batch_size)"""
+    allocations = [
+        IssuanceAllocation(owner_id=a.owner_id, quantity=a.quantity, vintage=a.vintage)
+        for a in (request.allocations if request else [])
+    ]
+    try:
+        issuance = service.process_issuance(
+            issuance_id, 
+            current_user.id,
+            registry_reference_id,
+            certificate_url,
+            allocations=allocations,
+            batch_size=batch_size
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not issuance:
         raise HTTPException(status_code=404, detail="Issuance not found")
     return issuance
@@ -272,6 +289,51 @@ def get_credit_batch(
     return batch
 
 
+# ===== Reconciliation Endpoints (super admin) =====
+
+@router.post("/reconciliation/runs", response_model=ReconciliationRunSummary, status_code=202)
+async def start_reconciliation(
+    repair: bool = False,
+    admin: User = Depends(get_current_superadmin),
+    db: Session = Depends(get_db),
+    task_queue: TaskQueuePort = Depends(get_task_queue)
+):
+    """
+    Queue a reconciliation of credit batches, holdings and transactions.
+    With repair, credits batches that were never credited to their
+    owners' holdings; all other drift is only reported.
+    """
+    run = ReconciliationRun(repair=repair, requested_by=admin.id, status=ReconciliationStatus.QUEUED)
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    await task_queue.enqueue(RECONCILE_TASK, {"run_id": run.id})
+    return run
+
+
+@router.get("/reconciliation/runs", response_model=List[ReconciliationRunSummary])
+def get_reconciliation_runs(
+    limit: int = Query(20, ge=1, le=100),
+    admin: User = Depends(get_current_superadmin),
+    db: Session = Depends(get_db)
+):
+    """Latest reconciliation runs, nightly and requested"""
+    return db.query(ReconciliationRun).order_by(ReconciliationRun.id.desc()).limit(limit).all()
+
+
+@router.get("/reconciliation/runs/{run_id}", response_model=ReconciliationRunResponse)
+def get_reconciliation_run(
+    run_id: int,
+    admin: User = Depends(get_current_superadmin),
+    db: Session = Depends(get_db)
+):
+    """A reconciliation run with its findings"""
+    run = db.query(ReconciliationRun).filter(ReconciliationRun.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Reconciliation run not found")
+    return run
+
+
 # ===== Profile Endpoints =====
 
 @router.get("/profile", response_model=RegistryProfileResponse)
@@ -124,6 +124,17 @@ class IssuanceRequest(BaseModel):
     registry_name: str
 
 
+class IssuanceAllocationRequest(BaseModel):
+    owner_id: int
+    quantity: int
+    vintage: Optional[int] = None
+
+
+class IssuanceProcessRequest(BaseModel):
+    # Split the credits among owners and vintages; empty issues all to the developer
+    allocations: List[IssuanceAllocationRequest] = []
+
+
 class IssuanceUpdate(BaseModel):
     status: Optional[IssuanceStatusEnum] = None
     registry_reference_id: Optional[str] = None
@@ -184,6 +195,29 @@ class CreditBatchResponse(BaseModel):
         from_attributes = True
 
 
+# ===== Reconciliation Schemas =====
+
+class ReconciliationRunSummary(BaseModel):
+    id: int
+    status: str
+    repair: bool
+    requested_by: Optional[int]
+    positions_checked: Optional[int]
+    drift_count: Optional[int]
+    repaired_count: Optional[int]
+    created_at: Optional[datetime]
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+class ReconciliationRunResponse(ReconciliationRunSummary):
+    findings: Optional[Dict[str, Any]]
+    error: Optional[str]
+
+
 # ===== Dashboard Schemas =====
 
 class RegistryDashboardStats(BaseModel):
@@ -6,7 +6,6 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
 from datetime import datetime
-import uuid
 
 from backend.modules.registry.models import (
     RegistryReview, RegistryQuery, IssuanceRecord, CreditBatch,
@@ -19,6 +18,7 @@ from backend.modules.registry.schemas import (
     CreditBatchCreate,
     RegistryDashboardStats, RegistryProjectSummary
 )
+from backend.modules.registry.issuance import IssuanceAllocation, IssuanceEngine, ISSUANCE_BATCH_SIZE
 from backend.core.models import Project, User
 
 
@@ -168,41 +168,46 @@ class RegistryService:
         """Get a specific issuance record"""
         return self.db.query(IssuanceRecord).filter(IssuanceRecord.id == issuance_id).first()
 
-    def process_issuance(self, issuance_id: int, issued_by: int, 
-                         registry_reference_id: str, certificate_url: str = None) -> Optional[IssuanceRecord]:
-        """Process and complete an issuance"""
-        issuance = self.get_issuance(issuance_id)
+    def process_issuance(self, issuance_id: int, issued_by: int,
+                         registry_reference_id: str, certificate_url: str = None,
+                         allocations: Optional[List[IssuanceAllocation]] = None,
+                         batch_size: int = ISSUANCE_BATCH_SIZE) -> Optional[IssuanceRecord]:
+        """
+        Process and complete an issuance: mint its credits in serial-numbered
+        batches and credit them to the owners' holdings, all in one commit.
+        Without allocations everything goes to the project developer.
+
+        Raises:
+            ValueError: If the issuance was already processed or the
+                allocations are invalid
+        """
+        issuance = self.db.query(IssuanceRecord).filter(
+            IssuanceRecord.id == issuance_id
+        ).with_for_update().first()
         if not issuance:
             return None
-
-        issuance.status = IssuanceStatus.ISSUED
-        issuance.issued_by = issued_by
-        issuance.registry_reference_id = registry_reference_id
-        issuance.certificate_url = certificate_url
-        issuance.issued_at = datetime.utcnow()
-
-        # Get the project developer to set as owner
-        project = self.db.query(Project).filter(Project.id == issuance.project_id).first()
-        
-        # Create a single credit batch for the issuance
-        batch_id = f"BATCH-{uuid.uuid4().hex[:8].upper()}"
-        serial_prefix = f"{issuance.registry_name}-{issuance.vintage_year}-"
-        
-        batch = CreditBatch(
-            issuance_id=issuance.id,
-            batch_id=batch_id,
-            serial_start=f"{serial_prefix}000001",
-            serial_end=f"{serial_prefix}{str(issuance.total_credits).zfill(6)}",
-            quantity=issuance.total_credits,
-            credit_type=issuance.credit_type,
-            vintage_year=issuance.vintage_year,
-            registry_name=issuance.registry_name,
-            status=CreditStatus.OWNED,
-            owner_id=project.developer_id if project else issued_by
-        )
-        self.db.add(batch)
-        
-        self.db.commit()
+        if issuance.status in (IssuanceStatus.ISSUED, IssuanceStatus.FAILED):
+            raise ValueError(f"Issuance is already {issuance.status.value.lower()}")
+
+        try:
+            if not allocations:
+                # Credits go to the project developer
+                developer_id = self.db.query(Project.developer_id).filter(
+                    Project.id == issuance.project_id
+                ).scalar()
+                allocations = [IssuanceAllocation(owner_id=developer_id or issued_by, quantity=issuance.total_credits)]
+
+            issuance.status = IssuanceStatus.ISSUED
+            issuance.issued_by = issued_by
+            issuance.registry_reference_id = registry_reference_id
+            issuance.certificate_url = certificate_url
+            issuance.issued_at = datetime.utcnow()
+
+            IssuanceEngine(self.db).issue(issuance, allocations, batch_size)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
         self.db.refresh(issuance)
         return issuance
 
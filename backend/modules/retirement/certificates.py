@@ -0,0 +1,213 @@
+"""
+Retirement Certificate Rendering
+PDF and PNG certificates rendered once in the background and kept in file storage
+"""
+import asyncio
+import hashlib
+import io
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+from reportlab.lib.colors import HexColor
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.pdfgen import canvas
+
+from backend.core.models import Project, Retirement, RetirementStatus
+from backend.core.ports import FileStoragePort
+from backend.modules.retirement.models import CertificateFile, CertificateRenderRequest
+
+FORMATS = {"pdf": "application/pdf", "png": "image/png"}
+STORAGE_PREFIX = "certificates"
+PNG_SIZE = (1600, 1131)  # A4 landscape at ~136 dpi
+ACCENT = "#1B5E20"
+
+
+def certificate_data(retirement: Retirement, project: Optional[Project]) -> Dict:
+    """The fields printed on a certificate, also served as JSON"""
+    return {
+        "certificate_id": retirement.certificate_id,
+        "beneficiary": retirement.beneficiary,
+        "quantity": retirement.quantity,
+        "project_name": (project.name if project else None) or "Unknown",
+        "project_code": (project.code if project else None) or f"P-{retirement.project_id}",
+        "vintage": retirement.vintage,
+        "retirement_date": retirement.retirement_date.strftime("%Y-%m-%d") if retirement.retirement_date else "",
+        "registry": (project.registry if project else None) or "VCS",
+        "serial_range": retirement.serial_range,
+        "purpose": retirement.purpose,
+    }
+
+
+def _lines(data: Dict) -> List[Tuple[str, str]]:
+    """(label, value) rows under the headline, in print order"""
+    rows = [
+        ("Certificate", data["certificate_id"] or ""),
+        ("Project", f"{data['project_name']} ({data['project_code']})"),
+        ("Registry / Vintage", f"{data['registry']} / {data['vintage']}"),
+        ("Retired on", data["retirement_date"]),
+    ]
+    if data["serial_range"]:
+        rows.append(("Serial numbers", data["serial_range"]))
+    if data["purpose"]:
+        rows.append(("Purpose", data["purpose"]))
+    return rows
+
+
+def _wrap(text: str, fits: Callable[[str], bool]) -> List[str]:
+    """Break text on spaces into lines that fit; a single word too long is kept whole"""
+    lines: List[str] = []
+    for word in text.split(" "):
+        if lines and fits(f"{lines[-1]} {word}"):
+            lines[-1] = f"{lines[-1]} {word}"
+        else:
+            lines.append(word)
+    return lines
+
+
+def render_pdf(data: Dict) -> bytes:
+    """A4 landscape PDF. Rendered invariant (no timestamps), so equal data gives equal bytes."""
+    buffer = io.BytesIO()
+    width, height = landscape(A4)
+    pdf = canvas.Canvas(buffer, pagesize=(width, height), invariant=1)
+    pdf.setTitle(f"Retirement Certificate {data['certificate_id']}")
+
+    pdf.setStrokeColor(HexColor(ACCENT))
+    pdf.setLineWidth(4)
+    pdf.rect(24, 24, width - 48, height - 48)
+
+    pdf.setFillColor(HexColor(ACCENT))
+    pdf.setFont("Helvetica-Bold", 28)
+    pdf.drawCentredString(width / 2, height - 110, "Certificate of Carbon Credit Retirement")
+
+    pdf.setFillColor(HexColor("#000000"))
+    pdf.setFont("Helvetica", 14)
+    pdf.drawCentredString(width / 2, height - 160, "This certifies the permanent retirement of")
+    pdf.setFont("Helvetica-Bold", 36)
+    pdf.drawCentredString(width / 2, height - 210, f"{data['quantity']:,} tCO2e")
+    pdf.setFont("Helvetica", 14)
+    pdf.drawCentredString(width / 2, height - 245, "on behalf of")
+    pdf.setFont("Helvetica-Bold", 22)
+    pdf.drawCentredString(width / 2, height - 280, data["beneficiary"])
+
+    y = height - 340
+    column = width / 2 - 60
+    value_width = width - 48 - column - 40
+    for label, value in _lines(data):
+        pdf.setFont("Helvetica-Bold", 12)
+        pdf.drawRightString(column - 10, y, label)
+        pdf.setFont("Helvetica", 12)
+        for line in _wrap(value, lambda s: pdf.stringWidth(s, "Helvetica", 12) <= value_width):
+            pdf.drawString(column + 10, y, line)
+            y -= 18
+        y -= 6
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def _font(size: int):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has a single bitmap font
+        return ImageFont.load_default()
+
+
+def render_png(data: Dict) -> bytes:
+    """The same certificate as a PNG image, for previews and sharing"""
+    width, height = PNG_SIZE
+    image = Image.new("RGB", PNG_SIZE, "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((40, 40, width - 40, height - 40), outline=ACCENT, width=8)
+
+    def centred(y: int, text: str, size: int, fill: str = "black"):
+        font = _font(size)
+        draw.text((width / 2, y), text, font=font, fill=fill, anchor="mm")
+
+    centred(170, "Certificate of Carbon Credit Retirement", 52, ACCENT)
+    centred(270, "This certifies the permanent retirement of", 28)
+    centred(350, f"{data['quantity']:,} tCO2e", 64)
+    centred(430, "on behalf of", 28)
+    centred(500, data["beneficiary"], 44)
+
+    y = 600
+    font = _font(24)
+    column = width / 2 - 120
+    value_width = width - 40 - column - 80
+    for label, value in _lines(data):
+        draw.text((column - 20, y), label, font=font, fill="black", anchor="rm")
+        for line in _wrap(value, lambda s: draw.textlength(s, font=font) <= value_width):
+            draw.text((column + 20, y), line, font=font, fill="black", anchor="lm")
+            y += 34
+        y += 10
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+RENDERERS = {"pdf": render_pdf, "png": render_png}
+
+
+class CertificateRenderer:
+    """
+    Renders certificates of completed retirements that have none yet and
+    uploads them to file storage under certificates/<sha256>.<format>.
+
+    Runs in task workers; rendering happens once per retirement and format,
+    and downloads afterwards only read the stored file. Commits.
+    """
+
+    def __init__(self, db: Session, storage: FileStoragePort):
+        self.db = db
+        self.storage = storage
+
+    def render(self, retirement_ids: List[int]) -> Dict[str, int]:
+        rows = self.db.query(Retirement, Project).outerjoin(
+            Project, Project.id == Retirement.project_id
+        ).filter(
+            Retirement.id.in_(retirement_ids),
+            Retirement.status == RetirementStatus.COMPLETED,
+            Retirement.certificate_id.isnot(None)
+        ).order_by(Retirement.id).all()
+
+        done = {
+            (f.retirement_id, f.format)
+            for f in self.db.query(CertificateFile.retirement_id, CertificateFile.format).filter(
+                CertificateFile.retirement_id.in_([r.id for r, _ in rows])
+            )
+        }
+
+        # Read everything up front: each commit below expires the loaded rows
+        pending = [(retirement.id, certificate_data(retirement, project)) for retirement, project in rows]
+
+        rendered = 0
+        for retirement_id, data in pending:
+            for fmt, renderer in RENDERERS.items():
+                if (retirement_id, fmt) in done:
+                    continue
+                content = renderer(data)
+                content_hash = hashlib.sha256(content).hexdigest()
+                uri = asyncio.run(self.storage.upload(
+                    f"{STORAGE_PREFIX}/{content_hash}.{fmt}", content, FORMATS[fmt]
+                ))
+                self.db.add(CertificateFile(
+                    retirement_id=retirement_id,
+                    format=fmt,
+                    content_hash=content_hash,
+                    storage_uri=uri,
+                    size_bytes=len(content),
+                ))
+                rendered += 1
+            self.db.query(CertificateRenderRequest).filter(
+                CertificateRenderRequest.retirement_id == retirement_id
+            ).delete(synchronize_session=False)
+            try:
+                # Commit per retirement so a failure keeps the files already stored
+                self.db.commit()
+            except IntegrityError:
+                # Rendered concurrently by another worker; its files are identical
+                self.db.rollback()
+        return {"rendered": rendered}
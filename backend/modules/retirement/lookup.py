@@ -0,0 +1,215 @@
+"""
+Public Retirement Lookup
+Read-only registry of completed retirements, searchable by certificate id,
+beneficiary and serial number
+"""
+import logging
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+
+from backend.core.database import SessionLocal
+from backend.core.models import Project, Retirement, RetirementStatus
+from backend.core.tasks import register_task, scheduler
+from backend.modules.ledger.serials import parse_serial, parse_serial_range
+from backend.modules.retirement.models import PublicRetirement, PublicRetirementSerial
+
+logger = logging.getLogger(__name__)
+
+PUBLISH_TASK = "retirement.publish"
+PUBLISH_INTERVAL_SECONDS = 300
+# Retirements published per query
+PUBLISH_BATCH = 500
+MIN_BENEFICIARY_TERM = 3
+
+
+def public_row(record: PublicRetirement) -> Dict:
+    """A published retirement as served to third parties"""
+    return {
+        "certificate_id": record.certificate_id,
+        "beneficiary": record.beneficiary,
+        "quantity": record.quantity,
+        "project_name": record.project_name,
+        "project_code": record.project_code,
+        "registry": record.registry,
+        "vintage": record.vintage,
+        "retirement_date": record.retirement_date.strftime("%Y-%m-%d") if record.retirement_date else None,
+        "serial_range": record.serial_range,
+        "purpose": record.purpose,
+    }
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class RetirementLookupService:
+    """
+    Publishes completed retirements into public_retirements and answers
+    public lookups from it.
+
+    A retirement is copied once, when its certificate is issued (or by the
+    PUBLISH_TASK sweep for ones completed elsewhere), together with its
+    serial intervals parsed from serial_range. Every lookup is a single
+    indexed read of those two tables: the unique certificate id, the
+    beneficiary trigram index, or the (series, serial_start) interval
+    index.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ===== Publishing =====
+
+    def publish(self, retirement_ids: Optional[List[int]] = None, limit: int = PUBLISH_BATCH) -> int:
+        """
+        Publish completed retirements that are not public yet (the given
+        ones, or the oldest unpublished). Does not commit.
+        """
+        # Sessions don't autoflush; include retirements completed in this one
+        self.db.flush()
+        query = self.db.query(Retirement, Project).outerjoin(
+            Project, Project.id == Retirement.project_id
+        ).outerjoin(
+            PublicRetirement, PublicRetirement.retirement_id == Retirement.id
+        ).filter(
+            Retirement.status == RetirementStatus.COMPLETED,
+            Retirement.certificate_id.isnot(None),
+            PublicRetirement.retirement_id.is_(None)
+        )
+        if retirement_ids is not None:
+            if not retirement_ids:
+                return 0
+            query = query.filter(Retirement.id.in_(retirement_ids))
+        rows = query.order_by(Retirement.id).limit(limit).all()
+        if not rows:
+            return 0
+
+        records, serials = [], []
+        for retirement, project in rows:
+            records.append({
+                "retirement_id": retirement.id,
+                "certificate_id": retirement.certificate_id,
+                "beneficiary": retirement.beneficiary,
+                "beneficiary_key": retirement.beneficiary.lower(),
+                "quantity": retirement.quantity,
+                "project_id": retirement.project_id,
+                "project_name": (project.name if project else None) or f"Project {retirement.project_id}",
+                "project_code": (project.code if project else None) or f"P-{retirement.project_id}",
+                "registry": (project.registry if project else None) or "VCS",
+                "vintage": retirement.vintage,
+                "retirement_date": retirement.retirement_date,
+                "serial_range": retirement.serial_range,
+                "purpose": retirement.purpose,
+            })
+            serials.extend(self._intervals(retirement))
+
+        self.db.execute(insert(PublicRetirement), records)
+        if serials:
+            self.db.execute(insert(PublicRetirementSerial), serials)
+        return len(records)
+
+    @staticmethod
+    def _intervals(retirement: Retirement) -> List[Dict]:
+        if not retirement.serial_range:
+            return []
+        try:
+            parsed = parse_serial_range(retirement.serial_range)
+        except ValueError:
+            # Published without serial lookup rather than not at all
+            logger.warning(f"Retirement {retirement.id} has an unreadable serial range: {retirement.serial_range}")
+            return []
+        return [
+            {
+                "retirement_id": retirement.id,
+                "registry_code": code,
+                "project_id": project_id,
+                "vintage": vintage,
+                "serial_start": start,
+                "serial_end": end,
+            }
+            for code, project_id, vintage, (start, end) in parsed
+        ]
+
+    # ===== Lookups =====
+
+    def by_certificate(self, certificate_id: str) -> Optional[Dict]:
+        record = self.db.query(PublicRetirement).filter(
+            PublicRetirement.certificate_id == certificate_id.strip().upper()
+        ).first()
+        return public_row(record) if record else None
+
+    def by_serial(self, serial: str) -> Optional[Dict]:
+        """
+        The retirement that retired a serial number
+
+        Raises:
+            ValueError: If the serial is malformed
+        """
+        code, project_id, vintage, number = parse_serial(serial)
+        row = self.db.query(PublicRetirementSerial, PublicRetirement).join(
+            PublicRetirement, PublicRetirement.retirement_id == PublicRetirementSerial.retirement_id
+        ).filter(
+            PublicRetirementSerial.registry_code == code,
+            PublicRetirementSerial.project_id == project_id,
+            PublicRetirementSerial.vintage == vintage,
+            PublicRetirementSerial.serial_start <= number
+        ).order_by(PublicRetirementSerial.serial_start.desc()).first()
+        if not row or row.PublicRetirementSerial.serial_end < number:
+            return None
+        return public_row(row.PublicRetirement)
+
+    def by_beneficiary(
+        self,
+        term: str,
+        cursor: Optional[int] = None,
+        limit: int = 20
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Retirements whose beneficiary contains the term, newest first, and
+        the cursor of the next page (None on the last page)
+
+        Raises:
+            ValueError: If the term is too short to search by
+        """
+        term = term.strip().lower()
+        if len(term) < MIN_BENEFICIARY_TERM:
+            raise ValueError(f"Search at least {MIN_BENEFICIARY_TERM} characters of the beneficiary")
+
+        query = self.db.query(PublicRetirement).filter(
+            PublicRetirement.beneficiary_key.like(f"%{_escape_like(term)}%", escape="\\")
+        )
+        if cursor is not None:
+            query = query.filter(PublicRetirement.retirement_id < cursor)
+        records = query.order_by(PublicRetirement.retirement_id.desc()).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            next_cursor = records[-1].retirement_id
+        return [public_row(r) for r in records], next_cursor
+
+
+def publish_all(db: Session) -> int:
+    """Publish every unpublished completed retirement, committing per batch"""
+    service = RetirementLookupService(db)
+    published = 0
+    while True:
+        count = service.publish()
+        db.commit()
+        published += count
+        if count < PUBLISH_BATCH:
+            return published
+
+
+@register_task(PUBLISH_TASK)
+def publish_retirements(payload: Dict) -> Dict[str, int]:
+    """Task handler: publish completed retirements missed at issuance (e.g. seeded or legacy ones)"""
+    db = SessionLocal()
+    try:
+        return {"published": publish_all(db)}
+    finally:
+        db.close()
+
+
+scheduler.every(PUBLISH_INTERVAL_SECONDS, PUBLISH_TASK)
@@ -0,0 +1,109 @@
+"""
+Retirement Certificate Models
+Rendered certificate files, stored once under their content hash, and the
+public registry of completed retirements
+"""
+from sqlalchemy import (
+    BigInteger, Column, DDL, Integer, String, ForeignKey, DateTime, Index, UniqueConstraint, event
+)
+from datetime import datetime
+from backend.core.database import Base
+
+
+class CertificateFile(Base):
+    """
+    A rendered retirement certificate (PDF or PNG) in file storage.
+
+    Files are stored under the SHA-256 of their content, so the hash doubles
+    as a strong ETag and a stored file never changes.
+    """
+    __tablename__ = "retirement_certificate_files"
+
+    id = Column(Integer, primary_key=True, index=True)
+    retirement_id = Column(Integer, ForeignKey("retirements.id"), nullable=False)
+    format = Column(String(10), nullable=False)  # pdf, png
+    content_hash = Column(String(64), nullable=False, index=True)
+    storage_uri = Column(String, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("retirement_id", "format", name="uq_certificate_files_retirement_format"),
+    )
+
+
+class CertificateRenderRequest(Base):
+    """
+    A queued on-demand render of a retirement's certificate files, so
+    clients polling for a file queue one job rather than one per poll
+    """
+    __tablename__ = "retirement_certificate_render_requests"
+
+    retirement_id = Column(Integer, ForeignKey("retirements.id"), primary_key=True)
+    requested_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class PublicRetirement(Base):
+    """
+    A completed retirement as third parties may see it: the certificate
+    fields only, copied from the retirement and its project when published.
+
+    Public lookups read this table and public_retirement_serials alone, so
+    anonymous traffic never reaches retirements, projects or the ledger.
+    """
+    __tablename__ = "public_retirements"
+
+    retirement_id = Column(Integer, ForeignKey("retirements.id"), primary_key=True)
+    certificate_id = Column(String(50), nullable=False, unique=True, index=True)
+    beneficiary = Column(String, nullable=False)
+    beneficiary_key = Column(String, nullable=False)  # Lowercased beneficiary, for substring search
+    quantity = Column(Integer, nullable=False)
+    project_id = Column(Integer, nullable=False)
+    project_name = Column(String, nullable=False)
+    project_code = Column(String, nullable=False)
+    registry = Column(String(50), nullable=False)
+    vintage = Column(Integer, nullable=False)
+    retirement_date = Column(DateTime)
+    serial_range = Column(String)
+    purpose = Column(String)
+    published_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Beneficiary search is LIKE '%term%'; on Postgres a trigram index serves it
+        Index(
+            "ix_public_retirements_beneficiary_trgm",
+            "beneficiary_key",
+            postgresql_using="gin",
+            postgresql_ops={"beneficiary_key": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+# gin_trgm_ops comes from the pg_trgm extension
+event.listen(
+    PublicRetirement.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+class PublicRetirementSerial(Base):
+    """
+    One serial interval of a published retirement. Retired serials never
+    move again, so intervals of a series never overlap and the one holding
+    a serial is the one with the greatest start at or below it.
+    """
+    __tablename__ = "public_retirement_serials"
+
+    id = Column(Integer, primary_key=True, index=True)
+    retirement_id = Column(Integer, ForeignKey("public_retirements.retirement_id"), nullable=False, index=True)
+    registry_code = Column(String(50), nullable=False)  # As printed in serials, e.g. GOLDSTANDARD
+    project_id = Column(Integer, nullable=False)
+    vintage = Column(Integer, nullable=False)
+    serial_start = Column(BigInteger, nullable=False)
+    serial_end = Column(BigInteger, nullable=False)  # Inclusive
+
+    __table_args__ = (
+        # The interval index, as on serial_ranges
+        Index("ix_public_retirement_serials_series_start", "registry_code", "project_id", "vintage", "serial_start"),
+    )
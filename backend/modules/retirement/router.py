@@ -2,21 +2,50 @@
 Retirement API Module
 Database-backed retirement endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, RedirectResponse
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import datetime
-import random
+from datetime import datetime, timedelta
+import asyncio
+import hashlib
+import json
+import logging
 
+from backend.core.container import get_file_storage, get_task_queue
 from backend.core.database import get_db
+from backend.core.loaders import Loaders, get_loaders
+from backend.core.ports import FileStoragePort, TaskQueuePort
 from backend.core.models import (
     User, Project, Retirement as RetirementModel, RetirementStatus,
     CreditHolding, Transaction, TransactionType, TransactionStatus
 )
 from backend.modules.auth.dependencies import get_current_user
+from backend.modules.ledger.service import LedgerService
+from backend.modules.marketplace.idempotency import run_idempotent
+from backend.modules.retirement.certificates import FORMATS as CERTIFICATE_FORMATS, certificate_data
+from backend.modules.retirement.lookup import RetirementLookupService
+from backend.modules.retirement.models import CertificateFile, CertificateRenderRequest
+from backend.modules.retirement.service import (
+    CERTIFICATE_TASK, BulkRetirementItem, RetirementService, certificate_jobs
+)
+
+logger = logging.getLogger(__name__)
+
+SIGNED_URL_MINUTES = 60
+# A render not finished after this is assumed lost and queued again
+RENDER_RETRY_SECONDS = 300
 
 router = APIRouter(prefix="/retirements", tags=["retirements"])
+# Anonymous, read-only lookups for third parties verifying a retirement
+public_router = APIRouter(prefix="/public/retirements", tags=["public retirements"])
+
+# Published records never change; misses may be published a moment later
+PUBLIC_RECORD_CACHE = "public, max-age=3600"
+PUBLIC_SEARCH_CACHE = "public, max-age=60"
 
 # ============ Schemas ============
 
@@ -42,11 +71,62 @@ class RetirementRequest(BaseModel):
     beneficiary_address: str
     purpose: str
 
+class BulkRetirementRequest(BaseModel):
+    items: List[RetirementRequest]
+    all_or_nothing: bool = False
+
+class BulkRetirementItemResult(BaseModel):
+    index: int
+    holding_id: int
+    quantity: int
+    status: str  # retired, rejected or skipped
+    retirement_id: Optional[int] = None
+    serial_range: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkRetirementResponse(BaseModel):
+    retired: int
+    rejected: int
+    total_quantity: int
+    items: List[BulkRetirementItemResult]
+
+class PublicRetirementResponse(BaseModel):
+    certificate_id: str
+    beneficiary: str
+    quantity: int
+    project_name: str
+    project_code: str
+    registry: str
+    vintage: int
+    retirement_date: Optional[str]
+    serial_range: Optional[str]
+    purpose: Optional[str]
+
+class VintageRetirementSummary(BaseModel):
+    vintage: int
+    retirements: int
+    total_retired: int
+    pending_quantity: int
+    certificates_issued: int
+    pending_retirements: int
+
+class ProjectRetirementSummary(BaseModel):
+    project_id: int
+    project_name: str
+    project_code: str
+    retirements: int
+    total_retired: int
+    pending_quantity: int
+    certificates_issued: int
+    pending_retirements: int
+
 class RetirementSummary(BaseModel):
     total_retired: int
     total_co2_offset: int
     certificates_issued: int
     pending_retirements: int
+    by_vintage: List[VintageRetirementSummary] = []
+    by_project: List[ProjectRetirementSummary] = []
 
 # ============ Endpoints ============
 
@@ -54,7 +134,8 @@ class RetirementSummary(BaseModel):
 def get_retirements(
     status: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """Get all retirements for current user from database"""
     
@@ -65,15 +146,15 @@ def get_retirements(
     
     retirements = query.order_by(RetirementModel.created_at.desc()).all()
     
+    loaders.projects.prime(r.project_id for r in retirements)
+    
     result = []
     for r in retirements:
-        project = db.query(Project).filter(Project.id == r.project_id).first()
+        project = loaders.projects.get(r.project_id)
         project_name = project.name if project else f"Project {r.project_id}"
         project_code = project.code if project else f"P-{r.project_id}"
         
-        registry = "VCS"
-        if project and project.wizard_data:
-            registry = project.wizard_data.get("credit_estimation", {}).get("registry", "VCS")
+        registry = (project.registry if project else None) or "VCS"
         
         result.append(RetirementResponse(
             id=r.id,
@@ -95,19 +176,8 @@ def get_retirements(
 
 @router.get("/summary", response_model=RetirementSummary)
 def get_retirement_summary(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Get retirement summary statistics from database"""
-    
-    retirements = db.query(RetirementModel).filter(RetirementModel.user_id == current_user.id).all()
-    
-    completed = [r for r in retirements if r.status == RetirementStatus.COMPLETED]
-    pending = [r for r in retirements if r.status == RetirementStatus.PENDING]
-    
-    return RetirementSummary(
-        total_retired=sum(r.quantity for r in completed),
-        total_co2_offset=sum(r.quantity for r in completed),
-        certificates_issued=len([r for r in completed if r.certificate_id]),
-        pending_retirements=len(pending)
-    )
+    """Get retirement totals, broken down by vintage and by project, aggregated in the database"""
+    return RetirementSummary(**RetirementService(db).summary(current_user.id))
 
 @router.get("/{retirement_id}", response_model=RetirementResponse)
 def get_retirement(retirement_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -124,9 +194,7 @@ def get_retirement(retirement_id: int, current_user: User = Depends(get_current_
     project_name = project.name if project else f"Project {retirement.project_id}"
     project_code = project.code if project else f"P-{retirement.project_id}"
     
-    registry = "VCS"
-    if project and project.wizard_data:
-        registry = project.wizard_data.get("credit_estimation", {}).get("registry", "VCS")
+    registry = (project.registry if project else None) or "VCS"
     
     return RetirementResponse(
         id=retirement.id,
@@ -145,9 +213,21 @@ def get_retirement(retirement_id: int, current_user: User = Depends(get_current_
     )
 
 @router.post("/")
-def create_retirement(request: RetirementRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Create a new retirement request"""
-    
+async def create_retirement(
+    request: RetirementRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    task_queue: TaskQueuePort = Depends(get_task_queue)
+):
+    """Create a new retirement request; its certificate is issued in the background"""
+    result = await asyncio.to_thread(_create_retirement, request, current_user, db)
+    try:
+        await task_queue.enqueue(CERTIFICATE_TASK, {"retirement_ids": [result["retirement_id"]]})
+    except Exception as e:
+        logger.error(f"Failed to queue certificate for retirement {result['retirement_id']}: {e}")
+    return result
+
+def _create_retirement(request: RetirementRequest, current_user: User, db: Session) -> dict:
     # Get the holding
     holding = db.query(CreditHolding).filter(
         CreditHolding.id == request.holding_id,
@@ -157,9 +237,24 @@ def create_retirement(request: RetirementRequest, current_user: User = Depends(g
     if not holding:
         raise HTTPException(status_code=404, detail="Holding not found")
     
+    if request.quantity <= 0:
+        raise HTTPException(status_code=400, detail="Quantity must be positive")
+    
     if holding.available < request.quantity:
         raise HTTPException(status_code=400, detail="Insufficient available credits")
     
+    # Create transaction record, completed together with the retirement
+    transaction = Transaction(
+        user_id=current_user.id,
+        type=TransactionType.RETIREMENT,
+        status=TransactionStatus.PENDING,
+        quantity=request.quantity,
+        project_id=holding.project_id,
+        notes=request.purpose
+    )
+    db.add(transaction)
+    db.flush()
+    
     # Create retirement record
     retirement = RetirementModel(
         user_id=current_user.id,
@@ -170,55 +265,214 @@ def create_retirement(request: RetirementRequest, current_user: User = Depends(g
         beneficiary=request.beneficiary,
         beneficiary_address=request.beneficiary_address,
         purpose=request.purpose,
-        serial_range=f"{holding.serial_start[:15]}-{random.randint(10000,99999)} to {holding.serial_end[:15]}-{random.randint(10000,99999)}",
+        transaction_id=transaction.id,
         status=RetirementStatus.PENDING
     )
     db.add(retirement)
+    db.flush()
     
     # Reduce available credits
     holding.available -= request.quantity
-    
-    # Create transaction record
-    transaction = Transaction(
-        user_id=current_user.id,
-        type=TransactionType.RETIREMENT,
-        status=TransactionStatus.PENDING,
-        quantity=request.quantity,
-        project_id=holding.project_id,
-        notes=request.purpose
+    ledger = LedgerService(db)
+    retired = ledger.retire(
+        current_user.id, holding.project_id, holding.vintage, request.quantity,
+        reference=f"retirement:{retirement.id}"
     )
-    db.add(transaction)
+    # The exact serials retired, e.g. "VCS-12-2023-000000101 to VCS-12-2023-000000150"
+    retirement.serial_range = ledger.serials.describe(holding.project_id, holding.vintage, retired)
     
     db.commit()
     db.refresh(retirement)
     
     return {"success": True, "retirement_id": retirement.id, "status": "PENDING"}
 
+@router.post("/bulk", response_model=BulkRetirementResponse)
+async def create_bulk_retirement(
+    request: BulkRetirementRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    task_queue: TaskQueuePort = Depends(get_task_queue)
+):
+    """
+    Retire credits from many holdings in one transaction, with a result per
+    item. Certificates are issued in the background; each retirement shows
+    as PENDING until its certificate is ready.
+    """
+    result = await asyncio.to_thread(
+        run_idempotent, db, current_user.id, idempotency_key, "bulk_retirement", request,
+        lambda: _bulk_retire(request, current_user, db)
+    )
+    
+    # Jobs skip retirements already issued, so replays can queue them again
+    retirement_ids = [item["retirement_id"] for item in result["items"] if item["retirement_id"]]
+    for payload in certificate_jobs(retirement_ids):
+        try:
+            await task_queue.enqueue(CERTIFICATE_TASK, payload)
+        except Exception as e:
+            logger.error(f"Failed to queue certificates for retirements {payload['retirement_ids']}: {e}")
+    
+    return result
+
+def _bulk_retire(request: BulkRetirementRequest, current_user: User, db: Session) -> dict:
+    items = [
+        BulkRetirementItem(
+            holding_id=item.holding_id,
+            quantity=item.quantity,
+            beneficiary=item.beneficiary,
+            beneficiary_address=item.beneficiary_address,
+            purpose=item.purpose
+        )
+        for item in request.items
+    ]
+    try:
+        results = RetirementService(db).retire_bulk(current_user.id, items, request.all_or_nothing)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    retired = [r for r in results if r.status == "retired"]
+    return BulkRetirementResponse(
+        retired=len(retired),
+        rejected=len([r for r in results if r.status == "rejected"]),
+        total_quantity=sum(r.quantity for r in retired),
+        items=[BulkRetirementItemResult(**vars(r)) for r in results]
+    ).model_dump()
+
 @router.get("/{retirement_id}/certificate")
-def get_certificate(retirement_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Get certificate data for download"""
+async def get_certificate(
+    retirement_id: int,
+    request: Request,
+    format: str = "json",
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    storage: FileStoragePort = Depends(get_file_storage),
+    task_queue: TaskQueuePort = Depends(get_task_queue)
+):
+    """
+    Get a completed retirement's certificate: its data as JSON, or the
+    rendered file with format=pdf or format=png.
     
-    retirement = db.query(RetirementModel)\
-        .filter(RetirementModel.id == retirement_id, 
-                RetirementModel.user_id == current_user.id,
-                RetirementModel.status == RetirementStatus.COMPLETED)\
-        .first()
+    Rendered files never change, so they are served with an immutable
+    cache lifetime and their content hash as ETag, or as a redirect to a
+    signed URL where storage supports it. A file not rendered yet is
+    answered with 202; its render is queued once, and again only if it
+    hasn't finished after RENDER_RETRY_SECONDS.
+    """
+    if format != "json" and format not in CERTIFICATE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format. Options: json, {', '.join(CERTIFICATE_FORMATS)}")
     
-    if not retirement:
+    row = db.query(RetirementModel, Project, CertificateFile).outerjoin(
+        Project, Project.id == RetirementModel.project_id
+    ).outerjoin(CertificateFile, and_(
+        CertificateFile.retirement_id == RetirementModel.id,
+        CertificateFile.format == format
+    )).filter(
+        RetirementModel.id == retirement_id,
+        RetirementModel.user_id == current_user.id,
+        RetirementModel.status == RetirementStatus.COMPLETED
+    ).first()
+    
+    if not row:
         raise HTTPException(status_code=404, detail="Certificate not found or retirement not completed")
+    retirement, project, file = row
     
-    project = db.query(Project).filter(Project.id == retirement.project_id).first()
+    if format == "json":
+        return _cached_json(request, certificate_data(retirement, project), "private, no-cache")
+    
+    if file is None:
+        if _request_render(db, retirement.id):
+            await task_queue.enqueue(CERTIFICATE_TASK, {"retirement_ids": [retirement.id]})
+        return JSONResponse({"status": "rendering"}, status_code=202, headers={"Retry-After": "5"})
+    
+    etag = f'"{file.content_hash}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    get_signed_url = getattr(storage, "get_signed_url", None)
+    if get_signed_url:
+        url = await get_signed_url(file.storage_uri, expiration_minutes=SIGNED_URL_MINUTES)
+        # Cache the redirect for less time than the URL stays valid
+        return RedirectResponse(url, status_code=307, headers={
+            "Cache-Control": f"private, max-age={(SIGNED_URL_MINUTES - 5) * 60}"
+        })
     
-    registry = "VCS"
-    if project and project.wizard_data:
-        registry = project.wizard_data.get("credit_estimation", {}).get("registry", "VCS")
-    
-    return {
-        "certificate_id": retirement.certificate_id,
-        "beneficiary": retirement.beneficiary,
-        "quantity": retirement.quantity,
-        "project_name": project.name if project else "Unknown",
-        "vintage": retirement.vintage,
-        "retirement_date": retirement.retirement_date.strftime("%Y-%m-%d") if retirement.retirement_date else "",
-        "registry": registry
-    }
+    content = await storage.download(file.storage_uri)
+    return Response(content, media_type=CERTIFICATE_FORMATS[format], headers={
+        "ETag": etag,
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "Content-Disposition": f'attachment; filename="{retirement.certificate_id}.{format}"'
+    })
+
+# ============ Public Lookup ============
+
+@public_router.get("/", response_model=List[PublicRetirementResponse])
+def search_public_retirements(
+    request: Request,
+    serial: Optional[str] = None,
+    beneficiary: Optional[str] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Find completed retirements by serial number (the one retirement that
+    retired it) or by part of the beneficiary name, newest first. No
+    authentication; responses are cacheable by shared caches.
+    
+    Beneficiary pages continue from the X-Next-Cursor response header.
+    """
+    service = RetirementLookupService(db)
+    next_cursor = None
+    try:
+        if serial:
+            record = service.by_serial(serial)
+            data = [record] if record else []
+        elif beneficiary:
+            data, next_cursor = service.by_beneficiary(beneficiary, cursor, limit)
+        else:
+            raise HTTPException(status_code=400, detail="Search by serial or beneficiary")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    response = _cached_json(request, data, PUBLIC_SEARCH_CACHE)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return response
+
+@public_router.get("/{certificate_id}", response_model=PublicRetirementResponse)
+def get_public_retirement(certificate_id: str, request: Request, db: Session = Depends(get_db)):
+    """Verify a retirement by its certificate id. No authentication."""
+    record = RetirementLookupService(db).by_certificate(certificate_id)
+    if not record:
+        raise HTTPException(
+            status_code=404, detail="Retirement not found", headers={"Cache-Control": PUBLIC_SEARCH_CACHE}
+        )
+    return _cached_json(request, record, PUBLIC_RECORD_CACHE)
+
+# ============ Helpers ============
+
+def _cached_json(request: Request, data, cache_control: str) -> Response:
+    """JSON with a content ETag, or 304 when the client already has it"""
+    etag = '"' + hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:32] + '"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(data, headers=headers)
+
+
+def _request_render(db: Session, retirement_id: int) -> bool:
+    """Record a render request; False if one is already pending"""
+    now = datetime.utcnow()
+    renewed = db.query(CertificateRenderRequest).filter(
+        CertificateRenderRequest.retirement_id == retirement_id,
+        CertificateRenderRequest.requested_at < now - timedelta(seconds=RENDER_RETRY_SECONDS)
+    ).update({"requested_at": now}, synchronize_session=False)
+    if not renewed:
+        db.add(CertificateRenderRequest(retirement_id=retirement_id, requested_at=now))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Requested recently, by this client or another
+        db.rollback()
+        return False
+    return True
@@ -0,0 +1,294 @@
+"""
+Retirement Service
+Bulk retirements and certificate issuance jobs
+"""
+from dataclasses import dataclass
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from datetime import datetime
+
+from backend.core.container import container
+from backend.core.database import SessionLocal
+from backend.core.models import (
+    CreditHolding, Project, Retirement, RetirementStatus, Transaction, TransactionType, TransactionStatus
+)
+from backend.core.tasks import register_task
+from backend.modules.ledger.models import AccountKind, EntryType
+from backend.modules.ledger.service import LedgerService
+from backend.modules.retirement.certificates import CertificateRenderer
+from backend.modules.retirement.lookup import RetirementLookupService
+
+CERTIFICATE_TASK = "retirement.certificates"
+# Retirements per certificate job
+CERTIFICATE_BATCH = 100
+# Items accepted by one bulk request
+MAX_BULK_ITEMS = 1000
+
+
+@dataclass
+class BulkRetirementItem:
+    holding_id: int
+    quantity: int
+    beneficiary: str
+    beneficiary_address: Optional[str] = None
+    purpose: Optional[str] = None
+
+
+@dataclass
+class BulkItemResult:
+    index: int
+    holding_id: int
+    quantity: int
+    status: str  # retired, rejected or skipped (another item was rejected in an all-or-nothing request)
+    retirement_id: Optional[int] = None
+    serial_range: Optional[str] = None
+    error: Optional[str] = None
+
+
+class RetirementService:
+    """
+    Retires credits from many holdings in one transaction.
+
+    The holdings are validated and locked by a single query in id order,
+    like every other path that decrements holdings. Retirements and their
+    transactions are inserted with one multi-row INSERT each, and all
+    ledger entries are posted together, so serials for each project and
+    vintage are allocated in one pass and split among the items in request
+    order. Certificates are issued afterwards by CERTIFICATE_TASK jobs.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.ledger = LedgerService(db)
+
+    def retire_bulk(
+        self,
+        user_id: int,
+        items: List[BulkRetirementItem],
+        all_or_nothing: bool = False
+    ) -> List[BulkItemResult]:
+        """
+        Retire every valid item; the caller commits. Invalid items are
+        rejected with a reason; with all_or_nothing, any rejection retires
+        nothing.
+
+        Raises:
+            ValueError: If the request is empty or too large
+        """
+        if not items:
+            raise ValueError("No retirements requested")
+        if len(items) > MAX_BULK_ITEMS:
+            raise ValueError(f"At most {MAX_BULK_ITEMS} retirements per request")
+
+        try:
+            holdings: Dict[int, CreditHolding] = {
+                h.id: h for h in self.db.query(CreditHolding).filter(
+                    CreditHolding.id.in_({item.holding_id for item in items}),
+                    CreditHolding.user_id == user_id
+                ).order_by(CreditHolding.id).populate_existing().with_for_update().all()
+            }
+
+            results = []
+            remaining = {holding_id: h.available for holding_id, h in holdings.items()}
+            for index, item in enumerate(items):
+                result = BulkItemResult(index=index, holding_id=item.holding_id, quantity=item.quantity, status="retired")
+                holding = holdings.get(item.holding_id)
+                if item.quantity <= 0:
+                    result.error = "Quantity must be positive"
+                elif not item.beneficiary:
+                    result.error = "Beneficiary is required"
+                elif holding is None:
+                    result.error = "Holding not found"
+                elif remaining[item.holding_id] < item.quantity:
+                    result.error = "Insufficient available credits"
+                else:
+                    remaining[item.holding_id] -= item.quantity
+                if result.error:
+                    result.status = "rejected"
+                results.append(result)
+
+            accepted = [r for r in results if r.status == "retired"]
+            if all_or_nothing and len(accepted) < len(results):
+                for r in accepted:
+                    r.status = "skipped"
+                accepted = []
+            if accepted:
+                self._retire(user_id, items, holdings, accepted)
+                for holding_id, available in remaining.items():
+                    holdings[holding_id].available = available
+            self.db.flush()
+        except Exception:
+            self.db.rollback()
+            raise
+        return results
+
+    def _retire(
+        self,
+        user_id: int,
+        items: List[BulkRetirementItem],
+        holdings: Dict[int, CreditHolding],
+        accepted: List[BulkItemResult]
+    ):
+        now = datetime.utcnow()
+        transaction_ids = self.db.execute(
+            insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True),
+            [
+                {
+                    "user_id": user_id,
+                    "type": TransactionType.RETIREMENT,
+                    "status": TransactionStatus.PENDING,
+                    "quantity": items[r.index].quantity,
+                    "project_id": holdings[r.holding_id].project_id,
+                    "notes": items[r.index].purpose,
+                    "created_at": now,
+                }
+                for r in accepted
+            ]
+        ).scalars().all()
+
+        rows = []
+        for r, transaction_id in zip(accepted, transaction_ids):
+            item, holding = items[r.index], holdings[r.holding_id]
+            rows.append({
+                "user_id": user_id,
+                "holding_id": holding.id,
+                "project_id": holding.project_id,
+                "quantity": item.quantity,
+                "vintage": holding.vintage,
+                "beneficiary": item.beneficiary,
+                "beneficiary_address": item.beneficiary_address,
+                "purpose": item.purpose,
+                "transaction_id": transaction_id,
+                "status": RetirementStatus.PENDING,
+                "created_at": now,
+            })
+        ids = self.db.execute(
+            insert(Retirement).returning(Retirement.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        for r, retirement_id in zip(accepted, ids):
+            r.retirement_id = retirement_id
+
+        moved = self.ledger.post_many(
+            (
+                EntryType.RETIRE,
+                (user_id, row["project_id"], row["vintage"], AccountKind.AVAILABLE),
+                (user_id, row["project_id"], row["vintage"], AccountKind.RETIRED),
+                row["quantity"],
+                f"retirement:{r.retirement_id}",
+            )
+            for r, row in zip(accepted, rows)
+        )
+        for r, row, intervals in zip(accepted, rows, moved):
+            r.serial_range = self.ledger.serials.describe(row["project_id"], row["vintage"], intervals)
+        described = [{"id": r.retirement_id, "serial_range": r.serial_range} for r in accepted if r.serial_range]
+        if described:
+            self.db.execute(update(Retirement), described)
+
+    # ===== Summary =====
+
+    def summary(self, user_id: int) -> Dict:
+        """
+        A user's retirement totals with per-vintage and per-project
+        breakdowns. One GROUP BY over (project, vintage, status), served by
+        ix_retirements_user_status, so the work in Python is per group
+        rather than per retirement. Retired credits are tCO2e offset.
+        """
+        groups = self.db.query(
+            Retirement.project_id,
+            Project.name,
+            Project.code,
+            Retirement.vintage,
+            Retirement.status,
+            func.count(Retirement.id),
+            func.coalesce(func.sum(Retirement.quantity), 0),
+            func.count(Retirement.certificate_id),
+        ).outerjoin(Project, Project.id == Retirement.project_id).filter(
+            Retirement.user_id == user_id
+        ).group_by(
+            Retirement.project_id, Project.name, Project.code, Retirement.vintage, Retirement.status
+        ).all()
+
+        totals = {"total_retired": 0, "certificates_issued": 0, "pending_retirements": 0}
+        by_vintage: Dict[int, Dict] = {}
+        by_project: Dict[int, Dict] = {}
+        for project_id, name, code, vintage, status, count, quantity, certificates in groups:
+            vintage_row = by_vintage.setdefault(vintage, _breakdown(vintage=vintage))
+            project_row = by_project.setdefault(project_id, _breakdown(
+                project_id=project_id,
+                project_name=name or f"Project {project_id}",
+                project_code=code or f"P-{project_id}",
+            ))
+            for row in (totals, vintage_row, project_row):
+                if status == RetirementStatus.COMPLETED:
+                    row["total_retired"] += int(quantity)
+                    row["certificates_issued"] += certificates
+                elif status == RetirementStatus.PENDING:
+                    row["pending_retirements"] += count
+            for row in (vintage_row, project_row):
+                if status == RetirementStatus.PENDING:
+                    row["pending_quantity"] += int(quantity)
+                row["retirements"] += count
+
+        totals["total_co2_offset"] = totals["total_retired"]
+        totals["by_vintage"] = [by_vintage[v] for v in sorted(by_vintage)]
+        totals["by_project"] = sorted(by_project.values(), key=lambda r: (-r["total_retired"], r["project_id"]))
+        return totals
+
+    # ===== Certificates =====
+
+    def issue_certificates(self, retirement_ids: List[int], now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Number, complete and publish pending retirements, completing their
+        RETIREMENT transactions in the same commit. Commits; already issued
+        ones are left alone.
+        """
+        now = now or datetime.utcnow()
+        retirements = self.db.query(Retirement).filter(
+            Retirement.id.in_(retirement_ids),
+            Retirement.status == RetirementStatus.PENDING
+        ).order_by(Retirement.id).with_for_update(skip_locked=True).all()
+
+        for r in retirements:
+            r.certificate_id = certificate_number(r.id, now)
+            r.status = RetirementStatus.COMPLETED
+            r.retirement_date = now
+        transaction_ids = [r.transaction_id for r in retirements if r.transaction_id]
+        if transaction_ids:
+            self.db.query(Transaction).filter(
+                Transaction.id.in_(transaction_ids),
+                Transaction.status == TransactionStatus.PENDING
+            ).update({"status": TransactionStatus.COMPLETED, "completed_at": now}, synchronize_session=False)
+        published = RetirementLookupService(self.db).publish([r.id for r in retirements])
+        self.db.commit()
+        return {"issued": len(retirements), "published": published}
+
+
+def _breakdown(**key) -> Dict:
+    return {**key, "retirements": 0, "total_retired": 0, "pending_quantity": 0,
+            "certificates_issued": 0, "pending_retirements": 0}
+
+
+def certificate_number(retirement_id: int, issued_at: datetime) -> str:
+    return f"RET-{issued_at.year}-{retirement_id:06d}"
+
+
+def certificate_jobs(retirement_ids: List[int]) -> List[Dict]:
+    """Payloads of the CERTIFICATE_TASK jobs covering the retirements"""
+    return [
+        {"retirement_ids": retirement_ids[i:i + CERTIFICATE_BATCH]}
+        for i in range(0, len(retirement_ids), CERTIFICATE_BATCH)
+    ]
+
+
+@register_task(CERTIFICATE_TASK)
+def issue_retirement_certificates(payload: Dict) -> Dict[str, int]:
+    """Task handler: issue and render the certificates of a batch of retirements"""
+    retirement_ids = payload.get("retirement_ids") or []
+    db = SessionLocal()
+    try:
+        result = RetirementService(db).issue_certificates(retirement_ids)
+        result.update(CertificateRenderer(db, container.file_storage).render(retirement_ids))
+        return result
+    finally:
+        db.close()
@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, desc, text
 from passlib.context import CryptContext
 
+from backend.core.loaders import Loaders
 from backend.core.models import (
     User, UserRole, Project, ProjectStatus, Document,
     Transaction, TransactionType, TransactionStatus,
@@ -33,6 +34,7 @@ START_TIME = time.time()
 class SuperAdminService:
     def __init__(self, db: Session):
         self.db = db
+        self.loaders = Loaders(db)
 
     # ===== Dashboard Stats =====
     def get_dashboard_stats(self) -> DashboardStats:
@@ -88,12 +90,10 @@ class SuperAdminService:
     def get_recent_activity(self, limit: int = 20) -> List[ActivityItem]:
         """Get recent audit log entries"""
         logs = self.db.query(AuditLog).order_by(desc(AuditLog.timestamp)).limit(limit).all()
+        self.loaders.users.prime(log.actor_id for log in logs)
         result = []
         for log in logs:
-            actor_email = None
-            if log.actor_id:
-                actor = self.db.query(User).filter(User.id == log.actor_id).first()
-                actor_email = actor.email if actor else None
+            actor_email = self.loaders.user_email(log.actor_id)
             result.append(ActivityItem(
                 id=log.id,
                 action=log.action,
@@ -209,9 +209,9 @@ class SuperAdminService:
         total = query.count()
         projects = query.order_by(desc(Project.created_at)).offset((page - 1) * page_size).limit(page_size).all()
         
+        self.loaders.users.prime(p.developer_id for p in projects)
         result = []
         for p in projects:
-            developer = self.db.query(User).filter(User.id == p.developer_id).first()
             result.append(ProjectListItem(
                 id=p.id,
                 name=p.name,
@@ -219,7 +219,7 @@ class SuperAdminService:
                 project_type=p.project_type,
                 status=p.status.value if hasattr(p.status, 'value') else str(p.status),
                 developer_id=p.developer_id,
-                developer_email=developer.email if developer else None,
+                developer_email=self.loaders.user_email(p.developer_id),
                 country=p.country,
                 created_at=p.created_at,
                 updated_at=p.updated_at
@@ -252,19 +252,19 @@ class SuperAdminService:
         total = query.count()
         transactions = query.order_by(desc(Transaction.created_at)).offset((page - 1) * page_size).limit(page_size).all()
         
+        self.loaders.users.prime(t.user_id for t in transactions)
+        self.loaders.projects.prime(t.project_id for t in transactions)
         result = []
         for t in transactions:
-            user = self.db.query(User).filter(User.id == t.user_id).first()
-            project = self.db.query(Project).filter(Project.id == t.project_id).first() if t.project_id else None
             result.append(TransactionListItem(
                 id=t.id,
                 user_id=t.user_id,
-                user_email=user.email if user else None,
+                user_email=self.loaders.user_email(t.user_id),
                 type=t.type.value if hasattr(t.type, 'value') else str(t.type),
                 status=t.status.value if hasattr(t.status, 'value') else str(t.status),
                 quantity=t.quantity,
                 project_id=t.project_id,
-                project_name=project.name if project else None,
+                project_name=self.loaders.project_name(t.project_id),
                 amount_cents=t.amount_cents,
                 created_at=t.created_at
             ))
@@ -282,16 +282,16 @@ class SuperAdminService:
         total = query.count()
         listings = query.order_by(desc(MarketListing.created_at)).offset((page - 1) * page_size).limit(page_size).all()
         
+        self.loaders.users.prime(l.seller_id for l in listings)
+        self.loaders.projects.prime(l.project_id for l in listings)
         result = []
         for l in listings:
-            seller = self.db.query(User).filter(User.id == l.seller_id).first()
-            project = self.db.query(Project).filter(Project.id == l.project_id).first()
             result.append(ListingListItem(
                 id=l.id,
                 seller_id=l.seller_id,
-                seller_email=seller.email if seller else None,
+                seller_email=self.loaders.user_email(l.seller_id),
                 project_id=l.project_id,
-                project_name=project.name if project else None,
+                project_name=self.loaders.project_name(l.project_id),
                 vintage=l.vintage,
                 quantity=l.quantity,
                 quantity_sold=l.quantity_sold,
@@ -322,16 +322,16 @@ class SuperAdminService:
         total = query.count()
         retirements = query.order_by(desc(Retirement.created_at)).offset((page - 1) * page_size).limit(page_size).all()
         
+        self.loaders.users.prime(r.user_id for r in retirements)
+        self.loaders.projects.prime(r.project_id for r in retirements)
         result = []
         for r in retirements:
-            user = self.db.query(User).filter(User.id == r.user_id).first()
-            project = self.db.query(Project).filter(Project.id == r.project_id).first()
             result.append(RetirementListItem(
                 id=r.id,
                 user_id=r.user_id,
-                user_email=user.email if user else None,
+                user_email=self.loaders.user_email(r.user_id),
                 project_id=r.project_id,
-                project_name=project.name if project else None,
+                project_name=self.loaders.project_name(r.project_id),
                 certificate_id=r.certificate_id,
                 quantity=r.quantity,
                 vintage=r.vintage,
@@ -356,12 +356,10 @@ class SuperAdminService:
         total = query.count()
         logs = query.order_by(desc(AuditLog.timestamp)).offset((page - 1) * page_size).limit(page_size).all()
         
+        self.loaders.users.prime(log.actor_id for log in logs)
         result = []
         for log in logs:
-            actor_email = None
-            if log.actor_id:
-                actor = self.db.query(User).filter(User.id == log.actor_id).first()
-                actor_email = actor.email if actor else None
+            actor_email = self.loaders.user_email(log.actor_id)
             result.append(AuditLogItem(
                 id=log.id,
                 actor_id=log.actor_id,
@@ -498,12 +496,10 @@ class SuperAdminService:
         total = query.count()
         tasks = query.order_by(desc(AdminTask.created_at)).offset((page - 1) * page_size).limit(page_size).all()
         
+        self.loaders.users.prime(t.created_by for t in tasks)
         result = []
         for t in tasks:
-            creator_email = None
-            if t.created_by:
-                creator = self.db.query(User).filter(User.id == t.created_by).first()
-                creator_email = creator.email if creator else None
+            creator_email = self.loaders.user_email(t.created_by)
             result.append(TaskListItem(
                 id=t.id,
                 type=t.type.value if hasattr(t.type, 'value') else str(t.type),
@@ -0,0 +1,33 @@
+"""
+Task Delivery API Module
+Entry point for background tasks pushed by Cloud Tasks / Cloud Scheduler
+"""
+import hmac
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Body, Header, HTTPException
+
+from backend.core.config import settings
+from backend.core.tasks import get_task_handler, run_task
+
+router = APIRouter(prefix="/tasks", tags=["tasks"])
+
+# ============ Endpoints ============
+
+@router.post("/{task_name}")
+def run_background_task(
+    task_name: str,
+    payload: Optional[Dict[str, Any]] = Body(None),
+    x_task_token: Optional[str] = Header(None)
+):
+    """Run a registered task. Requires the shared CLOUD_TASKS_AUTH_TOKEN."""
+
+    expected = settings.gcp.cloud_tasks_auth_token
+    if not expected or not x_task_token or not hmac.compare_digest(x_task_token, expected):
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    if get_task_handler(task_name) is None:
+        raise HTTPException(status_code=404, detail="Unknown task")
+
+    # A 5xx makes Cloud Tasks retry with backoff
+    return {"task": task_name, "result": run_task(task_name, payload)}
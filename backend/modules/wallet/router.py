@@ -2,18 +2,20 @@
 Wallet/Portfolio API Module
 Database-backed credit holdings and transactions
 """
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Iterator, List, Optional
 from datetime import datetime
+import csv
+import io
+import json
 
-from backend.core.database import get_db
-from backend.core.models import (
-    User, Project, CreditHolding as HoldingModel,
-    Transaction as TransactionModel, TransactionType, TransactionStatus
-)
-from backend.modules.auth.dependencies import get_current_user
+from backend.core.database import SessionLocal, get_db
+from backend.core.models import User, TransactionType, TransactionStatus
+from backend.modules.auth.dependencies import get_current_user, get_current_user_id
+from backend.modules.wallet.service import PortfolioService, TransactionFilters, TransactionHistoryService
 
 router = APIRouter(prefix="/wallet", tags=["wallet"])
 
@@ -29,7 +31,8 @@ class CreditHoldingResponse(BaseModel):
     quantity: int
     available: int
     locked: int
-    unit_price: float
+    unit_price: float  # What the credits were bought at
+    market_price: Optional[float]  # Latest traded price of the registry/vintage, if any
     serial_start: Optional[str]
     serial_end: Optional[str]
 
@@ -51,15 +54,20 @@ class TransactionResponse(BaseModel):
     date: str
     status: str
 
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_COLUMNS = [
+    "id", "created_at", "completed_at", "type", "status", "quantity",
+    "project_id", "project_name", "counterparty", "amount", "notes",
+]
+
 # ============ Endpoints ============
 
 @router.get("/summary", response_model=WalletSummary)
 def get_wallet_summary(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Get wallet summary with all credit holdings from database"""
+    """Get wallet summary with all credit holdings, valued at current market prices"""
     
-    holdings = db.query(HoldingModel)\
-        .filter(HoldingModel.user_id == current_user.id)\
-        .all()
+    portfolio = PortfolioService(db)
+    rows, prices = portfolio.holdings(current_user.id)
     
     holdings_response = []
     total_credits = 0
@@ -67,123 +75,142 @@ def get_wallet_summary(current_user: User = Depends(get_current_user), db: Sessi
     available_credits = 0
     locked_credits = 0
     
-    for h in holdings:
-        project = db.query(Project).filter(Project.id == h.project_id).first()
-        project_name = project.name if project else f"Project {h.project_id}"
-        project_type = project.project_type if project else "unknown"
-        
-        # Get registry from wizard_data if available
-        registry = "VCS"
-        if project and project.wizard_data:
-            registry = project.wizard_data.get("credit_estimation", {}).get("registry", "VCS")
-        
-        unit_price = h.unit_price / 100.0  # Convert cents to dollars
+    for row in rows:
+        h = row.CreditHolding
+        unit_price = h.unit_price / 100.0 if h.unit_price else 0.0  # Convert cents to dollars
+        market_cents = prices.get((row.registry, h.vintage))
+        market_price = market_cents / 100.0 if market_cents is not None else None
         
         holdings_response.append(CreditHoldingResponse(
             id=h.id,
             project_id=h.project_id,
-            project_name=project_name,
-            project_type=project_type,
-            registry=registry,
+            project_name=row.project_name or f"Project {h.project_id}",
+            project_type=row.project_type or "unknown",
+            registry=row.registry,
             vintage=h.vintage,
             quantity=h.quantity,
             available=h.available,
-            locked=h.locked,
+            locked=h.locked or 0,
             unit_price=unit_price,
+            market_price=market_price,
             serial_start=h.serial_start,
             serial_end=h.serial_end
         ))
         
         total_credits += h.quantity
-        total_value += h.quantity * unit_price
+        # Retired credits stay in quantity but are worth nothing on the market
+        total_value += (h.available + (h.locked or 0)) * (market_price if market_price is not None else unit_price)
         available_credits += h.available
-        locked_credits += h.locked
-    
-    # Count retired credits from transactions
-    retired = db.query(TransactionModel)\
-        .filter(TransactionModel.user_id == current_user.id, 
-                TransactionModel.type == TransactionType.RETIREMENT,
-                TransactionModel.status == TransactionStatus.COMPLETED)\
-        .all()
-    retired_credits = sum(t.quantity for t in retired)
+        locked_credits += h.locked or 0
     
     return WalletSummary(
         total_credits=total_credits,
         total_value=total_value,
         available_credits=available_credits,
         locked_credits=locked_credits,
-        retired_credits=retired_credits,
+        retired_credits=portfolio.retired_credits(current_user.id),
         holdings=holdings_response
     )
 
 @router.get("/transactions", response_model=List[TransactionResponse])
 def get_transactions(
-    limit: int = 20,
+    response: Response,
+    type: Optional[TransactionType] = None,
+    status: Optional[TransactionStatus] = None,
+    project_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=200),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get recent transactions from database"""
+    """
+    Get transaction history, newest first.
     
-    transactions = db.query(TransactionModel)\
-        .filter(TransactionModel.user_id == current_user.id)\
-        .order_by(TransactionModel.created_at.desc())\
-        .limit(limit)\
-        .all()
+    When more results exist, the X-Next-Cursor response header holds the
+    cursor for the next page.
+    """
+    filters = TransactionFilters(type=type, status=status, project_id=project_id, start=start, end=end)
+    try:
+        rows, next_cursor = TransactionHistoryService(db).page(current_user.id, filters, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
-    result = []
-    for t in transactions:
-        project = db.query(Project).filter(Project.id == t.project_id).first() if t.project_id else None
-        project_name = project.name if project else "Unknown Project"
-        
-        counterparty = None
-        if t.counterparty_id:
-            cp = db.query(User).filter(User.id == t.counterparty_id).first()
-            if cp and cp.profile_data:
-                counterparty = cp.profile_data.get("company") or cp.profile_data.get("name") or cp.email
-        
-        result.append(TransactionResponse(
-            id=t.id,
-            type=t.type.value if hasattr(t.type, 'value') else str(t.type),
-            quantity=t.quantity,
-            project_name=project_name,
-            counterparty=counterparty,
-            amount=t.amount_cents / 100.0 if t.amount_cents else None,
-            date=t.created_at.strftime("%Y-%m-%d") if t.created_at else "",
-            status=t.status.value if hasattr(t.status, 'value') else str(t.status)
-        ))
+    return [
+        TransactionResponse(
+            id=r["id"],
+            type=r["type"],
+            quantity=r["quantity"],
+            project_name=r["project_name"] or "Unknown Project",
+            counterparty=r["counterparty"],
+            amount=r["amount"],
+            date=r["created_at"][:10] if r["created_at"] else "",
+            status=r["status"]
+        )
+        for r in rows
+    ]
+
+@router.get("/transactions/export")
+def export_transactions(
+    format: str = "csv",
+    type: Optional[TransactionType] = None,
+    status: Optional[TransactionStatus] = None,
+    project_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_id: int = Depends(get_current_user_id)
+):
+    """Full transaction history, oldest first, streamed as CSV or NDJSON"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format. Options: {', '.join(EXPORT_FORMATS)}")
+    filters = TransactionFilters(type=type, status=status, project_id=project_id, start=start, end=end)
     
-    return result
+    def rows():
+        # The export outlives the request's dependencies, so it owns its session
+        db = SessionLocal()
+        try:
+            yield from TransactionHistoryService(db).stream(user_id, filters)
+        finally:
+            db.close()
+    
+    body = _csv_lines(rows()) if format == "csv" else (json.dumps(r) + "\n" for r in rows())
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format}"'}
+    )
 
 @router.get("/stats")
 def get_wallet_stats(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """Get wallet statistics from database"""
-    
-    holdings = db.query(HoldingModel).filter(HoldingModel.user_id == current_user.id).all()
-    
-    total_credits = sum(h.quantity for h in holdings)
-    available_credits = sum(h.available for h in holdings)
-    locked_credits = sum(h.locked for h in holdings)
-    total_value = sum(h.quantity * (h.unit_price / 100.0) for h in holdings)
+    """Get wallet statistics: SQL totals, market value and its 24h change"""
     
-    # Count sales revenue this month
-    from datetime import datetime
+    portfolio = PortfolioService(db)
+    totals = portfolio.totals(current_user.id)
     current_month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     
-    sales = db.query(TransactionModel)\
-        .filter(
-            TransactionModel.user_id == current_user.id,
-            TransactionModel.type == TransactionType.SALE,
-            TransactionModel.status == TransactionStatus.COMPLETED,
-            TransactionModel.created_at >= current_month_start
-        ).all()
-    
-    monthly_revenue = sum(t.amount_cents / 100.0 for t in sales if t.amount_cents)
-    
     return {
-        "portfolio_value": total_value,
-        "portfolio_change": 12.5,  # Would need historical data
-        "available_credits": available_credits,
-        "locked_credits": locked_credits,
-        "monthly_revenue": monthly_revenue,
-        "total_credits": total_credits
+        "portfolio_value": totals["portfolio_value"],
+        "portfolio_change": totals["portfolio_change"],
+        "available_credits": totals["available_credits"],
+        "locked_credits": totals["locked_credits"],
+        "monthly_revenue": portfolio.revenue_since(current_user.id, current_month_start),
+        "total_credits": totals["total_credits"]
     }
+
+# ============ Helpers ============
+
+def _csv_lines(rows: Iterator[dict]) -> Iterator[str]:
+    """CSV text for streamed rows, yielded in chunks of a few hundred lines"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % 500 == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,236 @@
+"""
+Wallet Portfolio Service
+Aggregate holdings reads, mark-to-market valuation and transaction history
+"""
+from dataclasses import dataclass
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session, aliased
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
+import base64
+import json
+
+from backend.core.loaders import profile_display_name
+from backend.core.models import (
+    User, Project, CreditHolding, Transaction, TransactionType, TransactionStatus
+)
+from backend.modules.marketplace.history import PriceHistoryService, DEFAULT_REGISTRY
+
+
+class PortfolioService:
+    """
+    Reads a wallet with a fixed number of queries whatever its size: the
+    holdings joined to their projects, the totals as SUM/GROUP BY, and the
+    latest traded prices of the (registry, vintage) series held.
+
+    Held (available and locked) credits are valued at the latest daily
+    VWAP of their series; series that never traded fall back to the price
+    the credits were bought at. Retired credits stay in quantity but have
+    no market value.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.history = PriceHistoryService(db)
+
+    def holdings(self, user_id: int) -> Tuple[List, Dict[Tuple[str, int], int]]:
+        """A user's holdings with project details, and the current price of each series held"""
+        rows = self.db.query(
+            CreditHolding,
+            Project.name.label("project_name"),
+            Project.project_type.label("project_type"),
+            func.coalesce(Project.registry, DEFAULT_REGISTRY).label("registry"),
+        ).outerjoin(Project, Project.id == CreditHolding.project_id).filter(
+            CreditHolding.user_id == user_id
+        ).order_by(CreditHolding.id).all()
+
+        prices = self.history.mark_prices((r.registry, r.CreditHolding.vintage) for r in rows)
+        return rows, prices
+
+    def totals(self, user_id: int, now: Optional[datetime] = None) -> Dict:
+        """Credit totals, current market value and its change over the last 24h"""
+        now = now or datetime.utcnow()
+        registry = func.coalesce(Project.registry, DEFAULT_REGISTRY)
+        held = CreditHolding.available + func.coalesce(CreditHolding.locked, 0)
+        series = self.db.query(
+            registry,
+            CreditHolding.vintage,
+            func.sum(CreditHolding.quantity),
+            func.sum(CreditHolding.available),
+            func.sum(func.coalesce(CreditHolding.locked, 0)),
+            func.sum(held * func.coalesce(CreditHolding.unit_price, 0)),
+        ).outerjoin(Project, Project.id == CreditHolding.project_id).filter(
+            CreditHolding.user_id == user_id
+        ).group_by(registry, CreditHolding.vintage).all()
+
+        keys = [(r[0], r[1]) for r in series]
+        current = self.history.mark_prices(keys)
+        previous = self.history.mark_prices(keys, as_of=now - timedelta(days=1))
+
+        total_credits = available = locked = 0
+        value_cents = previous_value_cents = 0
+        for registry_name, vintage, quantity, avail, lock, cost_cents in series:
+            avail, lock, cost_cents = int(avail or 0), int(lock or 0), int(cost_cents or 0)
+            total_credits += int(quantity or 0)
+            available += avail
+            locked += lock
+            value_cents += _value(avail + lock, cost_cents, current.get((registry_name, vintage)))
+            previous_value_cents += _value(
+                avail + lock, cost_cents,
+                previous.get((registry_name, vintage), current.get((registry_name, vintage)))
+            )
+
+        change = (
+            round((value_cents - previous_value_cents) / previous_value_cents * 100, 2)
+            if previous_value_cents else 0.0
+        )
+        return {
+            "total_credits": total_credits,
+            "available_credits": available,
+            "locked_credits": locked,
+            "portfolio_value": value_cents / 100,
+            "portfolio_change": change,
+        }
+
+    def retired_credits(self, user_id: int) -> int:
+        return int(self.db.query(func.coalesce(func.sum(Transaction.quantity), 0)).filter(
+            Transaction.user_id == user_id,
+            Transaction.type == TransactionType.RETIREMENT,
+            Transaction.status == TransactionStatus.COMPLETED
+        ).scalar())
+
+    def revenue_since(self, user_id: int, since: datetime) -> float:
+        cents = self.db.query(func.coalesce(func.sum(Transaction.amount_cents), 0)).filter(
+            Transaction.user_id == user_id,
+            Transaction.type == TransactionType.SALE,
+            Transaction.status == TransactionStatus.COMPLETED,
+            Transaction.created_at >= since
+        ).scalar()
+        return int(cents) / 100
+
+
+# Rows fetched per round trip of the export's server-side cursor
+EXPORT_BATCH = 1000
+
+
+@dataclass
+class TransactionFilters:
+    type: Optional[TransactionType] = None
+    status: Optional[TransactionStatus] = None
+    project_id: Optional[int] = None
+    start: Optional[datetime] = None  # Inclusive
+    end: Optional[datetime] = None  # Exclusive
+
+
+class TransactionHistoryService:
+    """
+    A user's transactions with project and counterparty names joined in, so
+    a page or an export is one query however many rows it covers.
+
+    Pages are keyset-paginated on (created_at, id), newest first, which
+    ix_transactions_user_created serves directly at any depth. Exports run
+    oldest first through a server-side cursor and are never materialized.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def page(
+        self,
+        user_id: int,
+        filters: TransactionFilters,
+        cursor: Optional[str] = None,
+        limit: int = 20
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One page of history and the cursor of the next one (None on the last page)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query = self._query(user_id, filters)
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            query = query.filter(or_(
+                Transaction.created_at < created_at,
+                and_(Transaction.created_at == created_at, Transaction.id < last_id)
+            ))
+
+        rows = query.order_by(Transaction.created_at.desc(), Transaction.id.desc()).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1].Transaction
+            next_cursor = encode_cursor(last.created_at, last.id)
+        return [transaction_row(r) for r in rows], next_cursor
+
+    def stream(self, user_id: int, filters: TransactionFilters) -> Iterator[Dict]:
+        """Every matching transaction, oldest first, fetched EXPORT_BATCH rows at a time"""
+        query = self._query(user_id, filters).order_by(
+            Transaction.created_at, Transaction.id
+        ).yield_per(EXPORT_BATCH)
+        for row in query:
+            yield transaction_row(row)
+
+    def _query(self, user_id: int, filters: TransactionFilters):
+        counterparty = aliased(User)
+        query = self.db.query(
+            Transaction,
+            Project.name.label("project_name"),
+            counterparty.email.label("counterparty_email"),
+            counterparty.profile_data.label("counterparty_profile"),
+        ).outerjoin(
+            Project, Project.id == Transaction.project_id
+        ).outerjoin(
+            counterparty, counterparty.id == Transaction.counterparty_id
+        ).filter(Transaction.user_id == user_id)
+
+        if filters.type:
+            query = query.filter(Transaction.type == filters.type)
+        if filters.status:
+            query = query.filter(Transaction.status == filters.status)
+        if filters.project_id is not None:
+            query = query.filter(Transaction.project_id == filters.project_id)
+        if filters.start:
+            query = query.filter(Transaction.created_at >= filters.start)
+        if filters.end:
+            query = query.filter(Transaction.created_at < filters.end)
+        return query
+
+
+def transaction_row(row) -> Dict:
+    """A history row as plain values, shared by the JSON, CSV and NDJSON outputs"""
+    t = row.Transaction
+    return {
+        "id": t.id,
+        "type": t.type.value if hasattr(t.type, 'value') else str(t.type),
+        "status": t.status.value if hasattr(t.status, 'value') else str(t.status),
+        "quantity": t.quantity,
+        "project_id": t.project_id,
+        "project_name": row.project_name or ("Unknown Project" if t.project_id else None),
+        "counterparty": profile_display_name(row.counterparty_profile, row.counterparty_email),
+        "amount": t.amount_cents / 100.0 if t.amount_cents else None,
+        "created_at": t.created_at.isoformat() if t.created_at else None,
+        "completed_at": t.completed_at.isoformat() if t.completed_at else None,
+        "notes": t.notes,
+    }
+
+
+def encode_cursor(created_at: datetime, transaction_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), transaction_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, transaction_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(transaction_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def _value(quantity: int, cost_cents: int, price_cents: Optional[int]) -> int:
+    """Market value in cents, or the purchase value when the series has no price"""
+    return quantity * price_cents if price_cents is not None else cost_cents
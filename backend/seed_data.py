@@ -22,6 +22,7 @@ from backend.core.models import (
     Retirement, RetirementStatus,
     MarketListing, ListingStatus, Offer, OfferStatus
 )
+from backend.modules.ledger.service import LedgerService
 from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -375,6 +376,11 @@ def main():
         seed_transactions(db, developer, buyer, projects)
         print()
         
+        print("Opening ledger balances...")
+        opened = LedgerService(db).open_balances()
+        print(f"✓ Opened {opened['groups']} ledger balance(s)")
+        print()
+        
         print("="*50)
         print("  Seed data complete!")
         print("="*50)
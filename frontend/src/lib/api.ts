@@ -56,6 +56,33 @@ async function apiRequest<T>(
     return response.json();
 }
 
+// Largest page the keyset-paginated list endpoints serve
+const MAX_PAGE_SIZE = 200;
+
+// Fetch every page of a keyset-paginated list, following X-Next-Cursor
+async function apiRequestAll<T>(endpoint: string): Promise<T[]> {
+    const separator = endpoint.includes('?') ? '&' : '?';
+    const items: T[] = [];
+    let cursor: string | null = null;
+
+    do {
+        const page = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+        const response = await fetch(`${API_BASE_URL}${endpoint}${separator}limit=${MAX_PAGE_SIZE}${page}`, {
+            headers: getHeaders(),
+        });
+
+        if (!response.ok) {
+            const error = await response.json().catch(() => ({ detail: 'Request failed' }));
+            throw new Error(error.detail || `HTTP ${response.status}`);
+        }
+
+        items.push(...(await response.json()));
+        cursor = response.headers.get('X-Next-Cursor');
+    } while (cursor);
+
+    return items;
+}
+
 // ============ AUTH API ============
 
 export interface LoginCredentials {
@@ -414,7 +441,7 @@ export const marketplaceApi = {
         if (filters?.min_price) params.append('min_price', filters.min_price.toString());
         if (filters?.max_price) params.append('max_price', filters.max_price.toString());
         const query = params.toString() ? `?${params.toString()}` : '';
-        return apiRequest<any[]>(`/marketplace/listings${query}`);
+        return apiRequestAll<any>(`/marketplace/listings${query}`);
     },
 
     getListing: async (id: number): Promise<any> => {